@@ -163,6 +163,18 @@ class Pyjo_Asset_File(Pyjo.Asset.object):
 
         return -1
 
+    def fileno(self):
+        """::
+
+            fd = asset_file.fileno()
+
+        Number of descriptor for :attr:`handle`, for system calls like
+        :func:`os.sendfile` which read the file directly. Flushes writing buffer.
+        """
+        handle = self.handle
+        handle.flush()
+        return handle.fileno()
+
     def get_chunk(self, offset, maximum=131072):
         """::
 
@@ -262,8 +274,8 @@ class Pyjo_Asset_File(Pyjo.Asset.object):
         # Open existing file
         path = self.path
         if path is not None and os.path.isfile(path):
-            handle = open(path, 'rb')
-            return handle
+            self._handle = open(path, 'rb')
+            return self._handle
 
         # Open new or temporary file
         base = os.path.join(self.tmpdir, 'pyjo.tmp')
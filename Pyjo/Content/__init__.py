@@ -492,6 +492,27 @@ class Pyjo_Content(Pyjo.EventEmitter.object):
 
         return self
 
+    def parse_head(self, chunk, start, end):
+        r"""::
+
+            content = content.parse_head(b"Content-Length: 2\x0d\x0a\x0d\x0aHi", 0, 19)
+            content = content.parse(b'')
+
+        Parse content chunk with a complete header block between offsets ``start``
+        and ``end`` in a single pass with :meth:`Pyjo.Headers.parse_block`, ``end``
+        being the position of the empty line after the last header. The rest of the
+        chunk is parsed as body with the next call of :meth:`parse`. Meant for content
+        that has not been parsed yet. Returns ``None`` and leaves the content untouched
+        if :meth:`Pyjo.Headers.parse_block` refuses the header block.
+        """
+        if self.headers.parse_block(chunk, start, end) is None:
+            return None
+        self._raw_size += len(chunk) - start
+        self._header_size = end + 2 - start
+        self._state = 'body'
+        self._pre_buffer.extend(chunk[end + 2:])
+        return self
+
     def parse_body(self, body):
         """::
 
@@ -786,6 +786,68 @@ class Pyjo_Headers(Pyjo.Base.object, Pyjo.String.Mixin.object):
 
         return self
 
+    def parse_block(self, buf, start=0, end=None):
+        r"""::
+
+            headers = headers.parse_block(b"Host: a\x0d\x0aAccept: */*\x0d\x0a\x0d\x0a", 0, 22)
+
+        Parse a complete block of formatted headers between offsets ``start`` and
+        ``end`` of a buffer in a single pass, ``end`` being the position of the empty
+        line after the last header. Fields are split at offsets, without copying the
+        buffer or matching regular expressions for every line. Returns ``None`` and
+        leaves the headers untouched for blocks :meth:`parse` would handle differently,
+        like blocks exceeding limits, lines which are neither fields nor continuations
+        and names with trailing whitespace.
+        """
+        end = len(buf) if end is None else end
+        size = self.max_line_size
+        lines = self.max_lines
+        fields = []
+        pos = start
+
+        while pos < end:
+            nl = buf.find(b'\x0a', pos, end)
+            if nl < 0:
+                nl = end
+            stop = nl - 1 if nl > pos and buf[nl - 1:nl] == b'\x0d' else nl
+
+            # Limits and early empty lines are left to the line by line parser
+            if nl + 1 - pos > size or len(fields) >= lines or stop == pos:
+                return None
+
+            # Multiline
+            first = buf[pos:pos + 1]
+            if first.isspace():
+                if fields:
+                    fields[-1][1] += b' ' + bytes(buf[pos:stop]).lstrip()
+
+            # New header
+            else:
+                colon = buf.find(b':', pos, stop)
+                if colon <= pos or buf[colon - 1:colon].isspace():
+                    return None
+                fields.append([bytes(buf[pos:colon]), bytes(buf[colon + 1:stop]).lstrip()])
+
+            pos = nl + 1
+
+        # The empty line counts as well
+        if len(fields) >= lines:
+            return None
+
+        headers = self._headers
+        normalcase = self._normalcase
+        for name, value in fields:
+            key = name.lower()
+            if key not in NORMALCASE:
+                normalcase[key] = name
+            values = headers.get(key)
+            if values is None:
+                values = headers[key] = []
+            values.append(value)
+
+        self._state = 'finished'
+        return self
+
     @property
     def proxy_authenticate(self):
         """::
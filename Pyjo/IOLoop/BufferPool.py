@@ -0,0 +1,88 @@
+"""
+Pyjo.IOLoop.BufferPool - Pool of reusable read buffers
+======================================================
+::
+
+    import Pyjo.IOLoop.BufferPool
+
+    # Read into a reusable buffer
+    pool = Pyjo.IOLoop.BufferPool.new()
+    buffer = pool.acquire(65536)
+    size = handle.recv_into(buffer, 65536)
+    ...
+    pool.release(buffer)
+
+:mod:`Pyjo.IOLoop.BufferPool` keeps :class:`bytearray` objects which have been
+used to read from streams, so the next read can reuse them instead of allocating
+new memory. Every :mod:`Pyjo.IOLoop` has its own pool for all of its streams.
+
+Buffers are grouped by size and a buffer must not be used anymore after it has
+been released.
+
+Classes
+-------
+"""
+
+import Pyjo.Base
+
+
+class Pyjo_IOLoop_BufferPool(Pyjo.Base.object):
+    """
+    :mod:`Pyjo.IOLoop.BufferPool` inherits all attributes and methods from
+    :mod:`Pyjo.Base` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        self.max_buffers = kwargs.get('max_buffers', 16)
+        """::
+
+            max_buffers = pool.max_buffers
+            pool = pool.set(max_buffers=64)
+
+        Maximum number of unused buffers to keep for every size, defaults to ``16``.
+        """
+
+        self._buffers = {}
+        self._stats = {'allocated': 0, 'reused': 0}
+
+    def acquire(self, size):
+        """::
+
+            buffer = pool.acquire(65536)
+
+        Get an unused buffer of the given size in bytes, a new one is allocated if
+        the pool has none.
+        """
+        buffers = self._buffers.get(size)
+        if buffers:
+            self._stats['reused'] += 1
+            return buffers.pop()
+
+        self._stats['allocated'] += 1
+        return bytearray(size)
+
+    def release(self, buffer):
+        """::
+
+            pool.release(buffer)
+
+        Return a buffer to the pool.
+        """
+        buffers = self._buffers.setdefault(len(buffer), [])
+        if len(buffers) < self.max_buffers:
+            buffers.append(buffer)
+
+    @property
+    def stats(self):
+        """::
+
+            stats = pool.stats
+
+        Counters of :meth:`acquire` calls which had to ``allocate`` a new buffer or
+        ``reused`` one from the pool.
+        """
+        return dict(self._stats)
+
+
+new = Pyjo_IOLoop_BufferPool.new
+object = Pyjo_IOLoop_BufferPool
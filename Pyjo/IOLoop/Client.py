@@ -23,6 +23,15 @@ Pyjo.IOLoop.Client - Non-blocking TCP/UDP client
             client.reactor.start()
 
 :mod:`Pyjo.IOLoop.Client` opens TCP/UDP connections for :mod:`Pyjo.IOLoop`.
+Host names are resolved with :attr:`Pyjo_IOLoop_Client.resolver` and connections
+are established non-blocking, so neither a slow name server nor an unresponsive
+peer holds up other connections.
+
+Host names with IPv6 and IPv4 addresses are connected to with "Happy Eyeballs"
+as described in :rfc:`8305`. Addresses of both families are tried alternately,
+a new attempt is started whenever the previous one fails or hasn't succeeded
+after ``attempt_delay`` seconds, the first connection established wins and all
+other attempts are canceled.
 
 Events
 ------
@@ -59,6 +68,9 @@ import Pyjo.IOLoop
 
 from Pyjo.Util import getenv, notnone, warn
 
+import collections
+import errno
+import os
 import socket
 import weakref
 
@@ -111,7 +123,33 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
         global :mod:`Pyjo.IOLoop` singleton.
         """
 
+        self.resolver = notnone(kwargs.get('resolver'), lambda: Pyjo.IOLoop.singleton.resolver)
+        """::
+
+            resolver = client.resolver
+            client.resolver = Pyjo.IOLoop.Resolver.new()
+
+        Resolver for host names, defaults to the :attr:`resolver` attribute value of the
+        global :mod:`Pyjo.IOLoop` singleton.
+        """
+
+        self.tls_cache = notnone(kwargs.get('tls_cache'), lambda: Pyjo.IOLoop.singleton.tls_cache)
+        """::
+
+            cache = client.tls_cache
+            client.tls_cache = Pyjo.IOLoop.TLSCache.new()
+
+        TLS contexts and sessions to resume, defaults to the :attr:`tls_cache` attribute
+        value of the global :mod:`Pyjo.IOLoop` singleton.
+        """
+
+        self._addresses = []
+        self._attempts = []
+        self._delay = None
+        self._error = None
+        self._resolving = None
         self._timer = None
+        self._tls_session = None
 
     def __del__(self):
         if DEBUG:
@@ -135,11 +173,12 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
 
         Close all server connections and server itself. Used by context manager.
         """
-        if self.handle:
-            self.handle.close()
-
+        handle = self.handle
         self._cleanup()
 
+        if handle:
+            handle.close()
+
     def connect(self, **kwargs):
         """::
 
@@ -156,6 +195,14 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
 
             Address or host name of the peer to connect to, defaults to ``127.0.0.1``.
 
+        ``attempt_delay``
+            ::
+
+                attempt_delay=0.1
+
+            Time in seconds to wait for a connection attempt before starting the next
+            one with another address in parallel, defaults to ``0.25``.
+
         ``handle``
             ::
 
@@ -184,6 +231,13 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
 
             Transport protocol: ``tcp`` or ``udp``, defaults to ``tcp``.
 
+        ``resolver``
+            ::
+
+                resolver=Pyjo.IOLoop.Resolver.new()
+
+            Resolver for host names, defaults to the value of :attr:`resolver`.
+
         ``timeout``
             ::
 
@@ -219,6 +273,14 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
                 tls_key='/etc/ssl/private/ssl-cert-snakeoil.key'
 
             Path to the TLS key file.
+
+        ``tls_cache``
+            ::
+
+                tls_cache=Pyjo.IOLoop.TLSCache.new()
+
+            TLS contexts and sessions to resume, defaults to the value of
+            :attr:`tls_cache`.
         """
 
         reactor = self.reactor
@@ -229,16 +291,40 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
 
         def timeout_cb(reactor):
             if dir(client):
+                client.close()
                 client.emit('error', 'Connect timeout')
 
         self._timer = reactor.timer(timeout_cb, timeout)
 
-        # Blocking name resolution
-        def resolved_cb(reactor):
-            if dir(client):
-                client._connect(**kwargs)
+        # Non-blocking name resolution
+        self._resolving = token = object()
 
-        return reactor.next_tick(resolved_cb)
+        def resolved_cb(resolver, err, addresses):
+            try:
+                if client._resolving is not token:
+                    return
+            except ReferenceError:
+                return
+
+            client._resolving = None
+            if err:
+                return client.emit('error', err)
+            client._connect(addresses, **kwargs)
+
+        if kwargs.get('handle'):
+            return reactor.next_tick(lambda reactor: resolved_cb(None, None, None))
+
+        # Local address determines the address family
+        family = socket.AF_UNSPEC
+        local_address = kwargs.get('local_address')
+        if local_address:
+            family = socket.AF_INET6 if ':' in local_address else socket.AF_INET
+
+        address = kwargs.get('address', 'localhost')
+        socktype = SOCK[kwargs.get('proto', 'tcp')]
+        resolver = notnone(kwargs.get('resolver'), lambda: self.resolver)
+        resolver.resolve(resolved_cb, address, self._port(**kwargs), family=family, socktype=socktype,
+                         reactor=reactor)
 
     @property
     def fd(self):
@@ -257,32 +343,110 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
         if not dir(reactor):
             return
 
+        self._resolving = None
+
         if self._timer:
             reactor.remove(self._timer)
             self._timer = None
 
+        # Cancel remaining connection attempts
+        self._addresses = []
+        if self._delay:
+            reactor.remove(self._delay)
+            self._delay = None
+        for handle in self._attempts:
+            reactor.remove(handle)
+            handle.close()
+        self._attempts = []
+
         if self.handle:
             reactor.remove(self.handle)
             self.handle = None
 
         return self
 
-    def _connect(self, **kwargs):
+    def _attempt(self, **kwargs):
+        reactor = self.reactor
+        if self._delay:
+            reactor.remove(self._delay)
+            self._delay = None
+
+        client = weakref.proxy(self)
+
+        # Start connection attempt with next address
+        while self._addresses:
+            family, socktype, proto, canonname, address = self._addresses.pop(0)
+            handle = socket.socket(family, socktype, proto)
+            handle.setblocking(0)
+            try:
+                local_address = kwargs.get('local_address')
+                if local_address:
+                    handle.bind((local_address, 0))
+                err = handle.connect_ex(address)
+            except socket.error as e:
+                err = e.errno
+            if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EINTR):
+                handle.close()
+                self._error = socket.error(err, os.strerror(err))
+                continue
+            if DEBUG:
+                warn("-- Connecting to {0}\n".format(address))
+
+            def attempt_cb(reactor, write, handle=handle):
+                if dir(client):
+                    client._attempted(handle, **kwargs)
+
+            self._attempts.append(handle)
+            reactor.io(attempt_cb, handle).watch(handle, False, True)
+
+            # Next attempt in parallel if this one takes too long
+            if self._addresses:
+                def delay_cb(reactor):
+                    if dir(client):
+                        client._attempt(**kwargs)
+
+                self._delay = reactor.timer(delay_cb, kwargs.get('attempt_delay', 0.25))
+            return
+
+        # All attempts failed
+        if not self._attempts:
+            self.close()
+            self.emit('error', self._error)
+
+    def _attempted(self, handle, **kwargs):
+        reactor = self.reactor
+        self._attempts.remove(handle)
+        reactor.remove(handle)
+
+        # Failed, try next address right away
+        err = handle.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            handle.close()
+            self._error = socket.error(err, os.strerror(err))
+            return self._attempt(**kwargs)
+
+        # First connection wins
+        for attempt in self._attempts:
+            reactor.remove(attempt)
+            attempt.close()
+        self._attempts = []
+        self._addresses = []
+        if self._delay:
+            reactor.remove(self._delay)
+            self._delay = None
+
+        self.handle = handle
+        self._ready(**kwargs)
+
+    def _connect(self, addresses, **kwargs):
         handle = kwargs.get('handle')
         if not handle:
             handle = self.handle
         if not handle:
-            address = kwargs.get('address', 'localhost')
-            port = self._port(**kwargs)
-            proto = kwargs.get('proto', 'tcp')
-
-            handle = socket.socket(socket.AF_INET, SOCK[proto])
-            try:
-                handle.connect((address, port))
-            except Exception as e:
-                return self.emit('error', e)
-            self.handle = handle
+            self._addresses = self._interleave(addresses)
+            return self._attempt(**kwargs)
 
+        self.handle = handle
         handle.setblocking(0)
 
         # Wait for handle to become writable
@@ -294,15 +458,33 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
 
         self.reactor.io(ready_cb, handle).watch(handle, False, True)
 
+    def _interleave(self, addresses):
+        # Alternate address families, starting with the preferred one
+        families = collections.OrderedDict()
+        for address in addresses:
+            families.setdefault(address[0], collections.deque()).append(address)
+        interleaved = []
+        while families:
+            for family in list(families):
+                group = families[family]
+                interleaved.append(group.popleft())
+                if not group:
+                    del families[family]
+        return interleaved
+
     def _port(self, **kwargs):
-        port = int(kwargs.get('port'))
+        port = int(kwargs.get('port') or 0)
         if not port:
-            port = 80
+            port = 443 if kwargs.get('tls') else 80
         return port
 
     def _ready(self, **kwargs):
         # Retry or handle exceptions
         handle = self.handle
+        err = handle.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            self.close()
+            return self.emit('error', socket.error(err, os.strerror(err)))
 
         if handle.getsockopt(socket.SOL_SOCKET, socket.SO_TYPE) == socket.SOCK_DGRAM:
             return self._cleanup().emit('connect', handle)
@@ -319,6 +501,8 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
         try:
             handle.do_handshake()
             # Connected
+            tls_cache, host, port = self._tls_session
+            tls_cache.store(host, port, handle)
             return self._cleanup().emit('connect', handle)
         except getattr(ssl, 'SSLWantReadError', NoneType):
             return self.reactor.watch(handle, True, False)
@@ -341,22 +525,21 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
         if not ssl:
             return self.emit('error', 'ssl required for TLS support')
 
-        tls_kwargs = {
-            'do_handshake_on_connect': False,
-            'server_side': False,
-            'ca_certs': kwargs.get('tls_ca'),
-            'certfile': kwargs.get('tls_cert'),
-            'keyfile': kwargs.get('tls_key'),
-        }
-
-        if tls_kwargs['ca_certs']:
-            tls_kwargs['cert_reqs'] = ssl.CERT_REQUIRED
-
         reactor = self.reactor
         reactor.remove(handle)
 
+        # Reuse context and resume last session with the same host
+        tls_cache = notnone(kwargs.get('tls_cache'), lambda: self.tls_cache)
+        host = kwargs.get('address', 'localhost')
+        port = self._port(**kwargs)
+
         try:
-            ssl_handle = ssl.wrap_socket(handle, **tls_kwargs)
+            context = tls_cache.context(kwargs.get('tls_ca'), kwargs.get('tls_cert'), kwargs.get('tls_key'))
+            tls_kwargs = {'server_hostname': host, 'do_handshake_on_connect': False}
+            session = tls_cache.session(host, port, context)
+            if session is not None:
+                tls_kwargs['session'] = session
+            ssl_handle = context.wrap_socket(handle, **tls_kwargs)
             self.handle = ssl_handle
         except getattr(ssl, 'SSLError', NoneType) as ex:
             if DIE:
@@ -364,6 +547,8 @@ class Pyjo_IOLoop_Client(Pyjo.EventEmitter.object):
             else:
                 return self.emit('error', 'TLS upgrade failed')
 
+        self._tls_session = (tls_cache, host, port)
+
         def tls_cb(reactor, write):
             self._tls()
 
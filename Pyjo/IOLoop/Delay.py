@@ -102,6 +102,7 @@ Classes
 
 import Pyjo.EventEmitter
 import Pyjo.IOLoop
+import Pyjo.Promise
 import Pyjo.Util
 
 from Pyjo.Util import notnone
@@ -133,6 +134,7 @@ class Pyjo_IOLoop_Delay(Pyjo.EventEmitter.object):
         self._pending = 0
         self._lock = False
         self._fail = False
+        self._promise = None
 
         self._data = {}
         self._args = []
@@ -221,6 +223,29 @@ class Pyjo_IOLoop_Delay(Pyjo.EventEmitter.object):
         """
         return Pyjo.Util._stash(self, self._data, *args, **kwargs)
 
+    @property
+    def promise(self):
+        """::
+
+            promise = delay.promise
+
+        :mod:`Pyjo.Promise` object resolving to the arguments of the ``finish`` event or
+        rejecting with the exception of the ``error`` event, which then doesn't need
+        another subscriber. ::
+
+            # Wait for the steps from a coroutine
+            async def main():
+                delay = Pyjo.IOLoop.delay(step1, step2)
+                delay.wait()
+                result = await delay.promise
+        """
+        if self._promise is None:
+            promise = self._promise = Pyjo.Promise.new(ioloop=self.ioloop)
+            self.on(lambda delay, *args: promise.resolve(*args), 'finish')
+            self.on(lambda delay, err: promise.reject(err), 'error')
+
+        return self._promise
+
     def remaining(self, steps=None):
         """::
 
@@ -0,0 +1,294 @@
+"""
+Pyjo.IOLoop.Resolver - Non-blocking name resolution
+===================================================
+::
+
+    import Pyjo.IOLoop.Resolver
+
+    # Resolve host name
+    resolver = Pyjo.IOLoop.Resolver.new()
+
+    def resolved_cb(resolver, err, addresses):
+        if err:
+            print('Resolving failed: {0}'.format(err))
+        else:
+            for family, socktype, proto, canonname, address in addresses:
+                print(address)
+
+    resolver.resolve(resolved_cb, 'mojolicio.us', 80)
+
+    # Start reactor if necessary
+    if not resolver.reactor.is_running:
+        resolver.reactor.start()
+
+:mod:`Pyjo.IOLoop.Resolver` resolves host names for :mod:`Pyjo.IOLoop.Client`
+with :func:`socket.getaddrinfo` in a pool of threads, so a slow name server
+doesn't freeze the event loop. Results are always delivered from the thread
+running the reactor.
+
+Results are cached for :attr:`Pyjo_IOLoop_Resolver.cache_ttl` seconds and
+failed lookups for :attr:`Pyjo_IOLoop_Resolver.negative_ttl` seconds, since
+:func:`socket.getaddrinfo` doesn't report the TTL of records. Names in use get
+refreshed in the background shortly before they expire and concurrent lookups
+of the same name share one thread.
+
+Numeric addresses are converted right away without using a thread. Without
+:mod:`concurrent.futures` all names are resolved blocking.
+
+Classes
+-------
+"""
+
+import Pyjo.Base
+import Pyjo.IOLoop
+
+from Pyjo.Util import getenv, notnone, steady_time, warn
+
+import socket
+import threading
+import weakref
+
+try:
+    import concurrent.futures
+except ImportError:
+    concurrent = None
+
+
+DEBUG = getenv('PYJO_IOLOOP_DEBUG', False)
+
+
+class Pyjo_IOLoop_Resolver(Pyjo.Base.object):
+    """
+    :mod:`Pyjo.IOLoop.Resolver` inherits all attributes and methods from
+    :mod:`Pyjo.Base` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        self.cache_ttl = kwargs.get('cache_ttl', 60)
+        """::
+
+            ttl = resolver.cache_ttl
+            resolver = resolver.set(cache_ttl=300)
+
+        Time in seconds results are cached for, defaults to ``60``. Setting the value to
+        ``0`` disables the cache, every :meth:`resolve` call will then start a new
+        lookup, unless one for the same name is already in progress.
+        """
+
+        self.max_cache = kwargs.get('max_cache', 1024)
+        """::
+
+            size = resolver.max_cache
+            resolver = resolver.set(max_cache=4096)
+
+        Maximum number of cached results, defaults to ``1024``.
+        """
+
+        self.max_workers = kwargs.get('max_workers', 4)
+        """::
+
+            max_workers = resolver.max_workers
+            resolver = resolver.set(max_workers=8)
+
+        The maximum number of threads resolving names at the same time, defaults to
+        ``4``.
+        """
+
+        self.negative_ttl = kwargs.get('negative_ttl', 5)
+        """::
+
+            ttl = resolver.negative_ttl
+            resolver = resolver.set(negative_ttl=0)
+
+        Time in seconds failed lookups are cached for, defaults to ``5``.
+        """
+
+        self.prefetch = kwargs.get('prefetch', 0.75)
+        """::
+
+            fraction = resolver.prefetch
+            resolver = resolver.set(prefetch=0.5)
+
+        Fraction of :attr:`cache_ttl` after which a cache hit starts a new lookup in
+        the background, so names in use get refreshed before they expire, defaults to
+        ``0.75``. Setting the value to ``1`` disables prefetching.
+        """
+
+        self.reactor = notnone(kwargs.get('reactor'), lambda: Pyjo.IOLoop.singleton.reactor)
+        """::
+
+            reactor = resolver.reactor
+            resolver.reactor = Pyjo.Reactor.Poll.new()
+
+        Low-level event reactor results are delivered to by default, defaults to the
+        :attr:`reactor` attribute value of the global :mod:`Pyjo.IOLoop` singleton.
+        """
+
+        self._cache = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._stats = {'hits': 0, 'misses': 0, 'prefetches': 0}
+
+    def resolve(self, cb, host, port, **kwargs):
+        """::
+
+            resolver.resolve(cb, 'mojolicio.us', 80)
+            resolver.resolve(cb, 'mojolicio.us', 53, socktype=socket.SOCK_DGRAM)
+
+        Resolve host name non-blocking and invoke the callback with an exception or a
+        list of addresses in the format returned by :func:`socket.getaddrinfo`.
+
+        These options are currently available:
+
+        ``family``
+            ::
+
+                family=socket.AF_INET
+
+            Address family, defaults to ``socket.AF_UNSPEC`` for all families.
+
+        ``reactor``
+            ::
+
+                reactor=loop.reactor
+
+            Reactor to invoke the callback from, defaults to :attr:`reactor`.
+
+        ``socktype``
+            ::
+
+                socktype=socket.SOCK_DGRAM
+
+            Socket type, defaults to ``socket.SOCK_STREAM``.
+        """
+        family = kwargs.get('family', socket.AF_UNSPEC)
+        socktype = kwargs.get('socktype', socket.SOCK_STREAM)
+        reactor = notnone(kwargs.get('reactor'), lambda: self.reactor)
+
+        # Numeric addresses don't need a thread
+        try:
+            addresses = socket.getaddrinfo(host, port, family, socktype, 0, socket.AI_NUMERICHOST)
+        except socket.gaierror:
+            pass
+        else:
+            return reactor.next_tick(self._result_cb(cb, None, addresses))
+
+        # Cached
+        key = (host, port, family, socktype)
+        now = steady_time()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > now:
+                self._stats['hits'] += 1
+                expires, created, err, addresses, refreshing = entry
+
+                # Refresh popular names before they expire
+                if not err and not refreshing and now - created >= (expires - created) * self.prefetch:
+                    entry[4] = True
+                    self._stats['prefetches'] += 1
+                    self._pending.setdefault(key, [])
+                    prefetch = True
+                else:
+                    prefetch = False
+                if DEBUG:
+                    warn("-- Cached {0} {1}\n".format(host, err or addresses))
+            else:
+                self._stats['misses'] += 1
+                prefetch = entry = None
+
+                # Lookup for the same name in progress
+                waiters = self._pending.get(key)
+                if waiters is not None:
+                    return waiters.append((reactor, cb))
+                self._pending[key] = [(reactor, cb)]
+
+        if entry:
+            reactor.next_tick(self._result_cb(cb, err, addresses))
+            if not prefetch:
+                return
+
+        # Blocking without concurrent.futures
+        if concurrent is None:
+            return self._lookup(key)
+        self._submit(self._lookup, key)
+
+    @property
+    def stats(self):
+        """::
+
+            stats = resolver.stats
+
+        Counters for :meth:`resolve` calls answered from the cache as ``hits``, calls
+        which had to wait for a lookup as ``misses`` and lookups started early to
+        refresh popular names as ``prefetches``. ::
+
+            # Cache efficiency
+            stats = resolver.stats
+            print(stats['hits'] / float(stats['hits'] + stats['misses']))
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['size'] = len(self._cache)
+        return stats
+
+    def _lookup(self, key):
+        host, port, family, socktype = key
+        try:
+            addresses, err = socket.getaddrinfo(host, port, family, socktype), None
+        except Exception as e:
+            addresses, err = None, e
+        if DEBUG:
+            warn("-- Resolved {0} {1}\n".format(host, err or addresses))
+
+        now = steady_time()
+        with self._lock:
+            cache = self._cache
+            entry = cache.get(key)
+
+            # Failed refresh keeps the old result until it expires
+            ttl = self.negative_ttl if err else self.cache_ttl
+            if ttl and not (err and entry and not entry[2] and entry[0] > now):
+                cache[key] = [now + ttl, now, err, addresses, False]
+                if len(cache) > self.max_cache:
+                    self._expire(now)
+            elif entry:
+                entry[4] = False
+
+            waiters = self._pending.pop(key, [])
+
+        for reactor, cb in waiters:
+            # Reactor might be gone already
+            try:
+                reactor.call_soon_threadsafe(self._result_cb(cb, err, addresses))
+            except ReferenceError:
+                pass
+
+    def _expire(self, now):
+        # Remove expired entries first and then the ones expiring soonest
+        cache = self._cache
+        for key in [key for key, entry in cache.items() if entry[0] <= now]:
+            del cache[key]
+        if len(cache) > self.max_cache:
+            expiring = sorted(cache, key=lambda key: cache[key][0])
+            for key in expiring[:len(cache) - self.max_cache]:
+                del cache[key]
+
+    def _result_cb(self, cb, err, addresses):
+        resolver = weakref.proxy(self)
+
+        def result_cb(reactor):
+            cb(resolver, err, addresses)
+
+        result_cb.__wrapped__ = cb
+        return result_cb
+
+    def _submit(self, func, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+            self._executor.submit(func, *args)
+
+
+new = Pyjo_IOLoop_Resolver.new
+object = Pyjo_IOLoop_Resolver
@@ -50,6 +50,7 @@ import Pyjo.IOLoop
 from Pyjo.Regexp import r
 from Pyjo.Util import getenv, notnone, setenv, warn
 
+import itertools
 import os
 import re
 import socket
@@ -97,7 +98,8 @@ class Pyjo_IOLoop_Server(Pyjo.EventEmitter.object):
             multi = server.multi_accept
             server.multi_accept = 100
 
-        Number of connections to accept at once, defaults to ``50``.
+        Number of connections to accept at once, defaults to ``50``. Edge-triggered
+        reactors report waiting connections only once, so all of them are accepted.
         """
 
         self.reactor = notnone(kwargs.get('reactor'), lambda: Pyjo.IOLoop.singleton.reactor)
@@ -112,7 +114,7 @@ class Pyjo_IOLoop_Server(Pyjo.EventEmitter.object):
 
         self._handles = {}
         self._reuse = None
-        self._tls_kwargs = {}
+        self._tls_context = None
 
     def __del__(self):
         if DEBUG:
@@ -199,6 +201,13 @@ class Pyjo_IOLoop_Server(Pyjo.EventEmitter.object):
 
             Maximum backlog size, defaults to :attr:`socket.SOMAXCONN`.
 
+        ``fd``
+            ::
+
+                fd=3
+
+            File descriptor with an already prepared listen socket.
+
         ``port``
             ::
 
@@ -219,7 +228,9 @@ class Pyjo_IOLoop_Server(Pyjo.EventEmitter.object):
 
                 tls=True
 
-            Enable TLS.
+            Enable TLS. All connections accepted on the listen socket share one
+            :class:`ssl.SSLContext` with a session cache and session tickets, so
+            returning clients can resume their sessions with an abbreviated handshake.
 
         ``tls_ca``
             ::
@@ -254,18 +265,19 @@ class Pyjo_IOLoop_Server(Pyjo.EventEmitter.object):
 
                 tls_verify=0x00
 
-            TLS verification mode, defaults to ``0x03``.
+            TLS verification mode, defaults to ``0x03`` with ``tls_ca`` and ``0x00``
+            otherwise.
         """
         address = kwargs.get('address', None) or '127.0.0.1'
         port = int(kwargs.get('port', 0))
         backlog = kwargs.get('backlog', None) or socket.SOMAXCONN
 
-        address_port = '{0}:{1}'.format(address, port)
-        m = r(r'(?:^|\,){0}:(\d+)'.format(re.escape(address_port))).match(getenv('PYJO_REUSE', ''))
-        if m:
-            fd = int(m.group(1))
-        else:
-            fd = None
+        fd = kwargs.get('fd')
+        if fd is None:
+            address_port = '{0}:{1}'.format(address, port)
+            m = r(r'(?:^|\,){0}:(\d+)'.format(re.escape(address_port))).search(getenv('PYJO_REUSE', ''))
+            if m:
+                fd = int(m.group(1))
 
         # Reuse file descriptor
         if fd:
@@ -293,24 +305,28 @@ class Pyjo_IOLoop_Server(Pyjo.EventEmitter.object):
         if not kwargs.get('tls'):
             return
 
-        tls_kwargs = {
-            'do_handshake_on_connect': False,
-            'server_side': True,
-            'ca_certs': kwargs.get('tls_ca'),
-            'certfile': kwargs.get('tls_cert', CERT),
-            'keyfile': kwargs.get('tls_key', KEY),
-            'ciphers': kwargs.get('tls_ciphers'),
-        }
-
-        if 'tls_verify' in kwargs:
-            tls_kwargs['cert_reqs'] = kwargs['tls_verify']
+        # One context for all connections shares the session cache and ticket keys
+        # PROTOCOL_TLS_SERVER and OP_NO_TICKET require Python 3.6
+        context = ssl.SSLContext(getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23))
+        context.load_cert_chain(kwargs.get('tls_cert') or CERT, kwargs.get('tls_key') or KEY)
+        context.options &= ~getattr(ssl, 'OP_NO_TICKET', 0)
+
+        ca = kwargs.get('tls_ca')
+        if ca:
+            context.load_verify_locations(ca)
+        ciphers = kwargs.get('tls_ciphers')
+        if ciphers:
+            context.set_ciphers(ciphers)
+
+        verify = kwargs.get('tls_verify', 0x03 if ca else 0x00)
+        if not verify:
+            context.verify_mode = ssl.CERT_NONE
+        elif verify & 0x02:
+            context.verify_mode = ssl.CERT_REQUIRED
         else:
-            if tls_kwargs['ca_certs']:
-                tls_kwargs['cert_reqs'] = 0x03
-            else:
-                tls_kwargs['cert_reqs'] = 0x00
+            context.verify_mode = ssl.CERT_OPTIONAL
 
-        self._tls_kwargs = tls_kwargs
+        self._tls_context = context
 
     @property
     def port(self):
@@ -348,7 +364,8 @@ class Pyjo_IOLoop_Server(Pyjo.EventEmitter.object):
 
     def _accept(self):
         # Greedy accept
-        for _ in range(0, self.multi_accept):
+        edge_triggered = getattr(self.reactor, 'edge_triggered', False)
+        for _ in itertools.count() if edge_triggered else range(0, self.multi_accept):
             try:
                 (handle, unused) = self.handle.accept()
             except:
@@ -360,18 +377,19 @@ class Pyjo_IOLoop_Server(Pyjo.EventEmitter.object):
             # Disable Nagle's algorithm
             handle.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
-            self.emit('accept', handle)
-
-            if self._tls_kwargs:
-                try:
-                    ssl_handle = ssl.wrap_socket(handle, **self._tls_kwargs)
-                    self._handles[ssl_handle] = ssl_handle
-                    self._handshake(ssl_handle)
-                except getattr(ssl, 'SSLError', NoneType) as ex:
-                    if DIE:
-                        raise ex
-                    else:
-                        return self.emit('error', 'TLS upgrade failed')
+            if not self._tls_context:
+                self.emit('accept', handle)
+                continue
+
+            try:
+                ssl_handle = self._tls_context.wrap_socket(handle, server_side=True, do_handshake_on_connect=False)
+                self._handles[ssl_handle] = ssl_handle
+                self._handshake(ssl_handle)
+            except getattr(ssl, 'SSLError', NoneType) as ex:
+                if DIE:
+                    raise ex
+                else:
+                    return self.emit('error', 'TLS upgrade failed')
 
     def _handshake(self, handle):
         server = weakref.proxy(self)
@@ -31,6 +31,30 @@ Pyjo.IOLoop.Stream - Non-blocking I/O stream
 
 :mod:`Pyjo.IOLoop.Stream` is a container for I/O streams used by :mod:`Pyjo.IOLoop`.
 
+Written chunks are queued without being concatenated and sent with a single
+:meth:`socket.socket.sendmsg` call where available, partially written chunks
+are consumed by slicing a :class:`memoryview`, so no data gets copied again
+however slowly the peer reads. Parts of files are sent with :func:`os.sendfile`
+straight from the file to the socket, see :meth:`Pyjo_IOLoop_Stream.write`.
+
+Data is read with :meth:`socket.socket.recv_into` into buffers from :attr:`pool`.
+The read size starts at ``16384`` bytes and adapts to the observed throughput,
+it doubles whenever a read fills the whole buffer and halves when reads stay
+small, within ``4096`` and ``262144`` bytes.
+
+Producers writing faster than the peer reads should respect
+:attr:`Pyjo_IOLoop_Stream.high_watermark`, the stream emits a ``pause`` event once
+more data is waiting in memory and a ``resume`` event when it has dropped to
+:attr:`Pyjo_IOLoop_Stream.low_watermark` again. ::
+
+    # Generate data only as fast as the peer reads it
+    def produce(stream):
+        while not stream.is_full:
+            stream.write(generate())
+
+    stream.on(produce, 'resume')
+    produce(stream)
+
 Events
 ------
 
@@ -67,6 +91,17 @@ error
 
 Emitted if an error occurs on the stream, fatal if unhandled.
 
+pause
+~~~~~
+::
+
+    @stream.on
+    def pause(stream):
+        ...
+
+Emitted if the data waiting to be written has grown beyond
+:attr:`Pyjo_IOLoop_Stream.high_watermark`.
+
 read
 ~~~~
 ::
@@ -75,7 +110,19 @@ read
     def read(stream, chunk):
         ...
 
-Emitted if new data arrives on the stream.
+Emitted if new data arrives on the stream. The chunk is a :class:`bytes` object,
+or a :class:`memoryview` if :attr:`zero_copy` is enabled.
+
+resume
+~~~~~~
+::
+
+    @stream.on
+    def resume(stream):
+        ...
+
+Emitted after a ``pause`` event once the data waiting to be written has dropped
+to :attr:`Pyjo_IOLoop_Stream.low_watermark`.
 
 timeout
 ~~~~~~~
@@ -107,7 +154,10 @@ import Pyjo.IOLoop
 
 from Pyjo.Util import getenv, notnone, warn
 
+import collections
 import errno
+import itertools
+import os
 import socket
 import weakref
 
@@ -117,6 +167,21 @@ DEBUG = getenv('PYJO_IOLOOP_DEBUG', False)
 
 NoneType = type(None)
 
+# Limits for adaptive read size
+READ_MIN = 4096
+READ_MAX = 262144
+
+# Maximum number of bytes for one sendfile call
+SENDFILE_MAX = 1 << 30
+
+sendfile = hasattr(os, 'sendfile')
+
+# Maximum number of chunks for one sendmsg call
+try:
+    IOV_MAX = min(os.sysconf('SC_IOV_MAX'), 1024)
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 16
+
 if getenv('PYJO_NO_TLS', False):
     ssl = None
 else:
@@ -135,6 +200,27 @@ class Pyjo_IOLoop_Stream(Pyjo.EventEmitter.object):
     def __init__(self, handle, *args, **kwargs):
         super(Pyjo_IOLoop_Stream, self).__init__(*args, **kwargs)
 
+        self.high_watermark = kwargs.get('high_watermark', 262144)
+        """::
+
+            size = stream.high_watermark
+            stream.high_watermark = 1048576
+
+        Maximum number of bytes waiting in memory to be written before the stream is
+        considered full and emits a ``pause`` event, defaults to ``262144`` (256KB).
+        Parts of files queued with :meth:`write` don't count.
+        """
+
+        self.low_watermark = kwargs.get('low_watermark', 65536)
+        """::
+
+            size = stream.low_watermark
+            stream.low_watermark = 16384
+
+        Number of bytes waiting in memory to be written a full stream has to drop to
+        before it emits a ``resume`` event, defaults to ``65536`` (64KB).
+        """
+
         self.reactor = notnone(kwargs.get('reactor'), lambda: Pyjo.IOLoop.singleton.reactor)
         """::
 
@@ -153,11 +239,56 @@ class Pyjo_IOLoop_Stream(Pyjo.EventEmitter.object):
         Handle for stream.
         """
 
-        self._buffer = b''
+        self.pool = kwargs.get('pool')
+        """::
+
+            pool = stream.pool
+            stream.pool = Pyjo.IOLoop.BufferPool.new()
+
+        Pool of reusable read buffers, usually the :attr:`Pyjo.IOLoop.pool` attribute
+        value of the event loop the stream belongs to. Without it every read allocates
+        a new buffer.
+        """
+
+        self.wheel = kwargs.get('wheel')
+        """::
+
+            wheel = stream.wheel
+            stream.wheel = Pyjo.IOLoop.Wheel.new()
+
+        Timing wheel for the inactivity timeout, usually the :attr:`Pyjo.IOLoop.wheel`
+        attribute value of the event loop the stream belongs to. Without it the
+        timeout uses a timer of :attr:`reactor`.
+        """
+
+        self.zero_copy = kwargs.get('zero_copy', False)
+        """::
+
+            boolean = stream.zero_copy
+            stream.zero_copy = True
+
+        Emit ``read`` events with a :class:`memoryview` of the read buffer instead of a
+        copy as :class:`bytes` object, defaults to ``False``. The buffer is returned to
+        :attr:`pool` after the event, so subscribers need to copy all data they want to
+        keep. ::
+
+            # Collect data without an intermediate copy
+            data = bytearray()
+            stream.zero_copy = True
+            stream.on(lambda stream, chunk: data.extend(chunk), 'read')
+        """
+
+        self._buffer = collections.deque()
+        self._buffered = 0
+        self._full = False
         self._graceful = False
+        self._memory = 0
+        self._no_sendfile = False
         self._paused = False
+        self._read_size = 16384
         self._timeout = 15
         self._timer = None
+        self._timers = None
 
     def __del__(self):
         if DEBUG:
@@ -222,6 +353,17 @@ class Pyjo_IOLoop_Stream(Pyjo.EventEmitter.object):
         if self.handle:
             return self.handle.fileno()
 
+    @property
+    def is_full(self):
+        """::
+
+            boolean = stream.is_full
+
+        Check if more data than :attr:`high_watermark` is waiting to be written, and it
+        has not dropped to :attr:`low_watermark` since.
+        """
+        return self._full
+
     @property
     def is_readable(self):
         """::
@@ -246,7 +388,7 @@ class Pyjo_IOLoop_Stream(Pyjo.EventEmitter.object):
         """
         if not self.handle:
             return None
-        return len(self._buffer) or self.has_subscribers('drain')
+        return self._buffered or self.has_subscribers('drain')
 
     def start(self):
         """::
@@ -310,9 +452,8 @@ class Pyjo_IOLoop_Stream(Pyjo.EventEmitter.object):
 
     @timeout.setter
     def timeout(self, value):
-        reactor = self.reactor
         if self._timer:
-            reactor.remove(self._timer)
+            self._timers.remove(self._timer)
             self._timer = None
 
         self._timeout = value
@@ -322,25 +463,56 @@ class Pyjo_IOLoop_Stream(Pyjo.EventEmitter.object):
 
         stream = weakref.proxy(self)
 
-        def timeout_cb(reactor):
+        def timeout_cb(timers):
             if bool(dir(stream)):
                 stream.emit('timeout').close()
 
-        self._timer = reactor.timer(timeout_cb, value)
+        # Timing wheel or reactor timer
+        if self.wheel is not None:
+            self._timers = self.wheel
+        else:
+            self._timers = self.reactor
+        self._timer = self._timers.timer(timeout_cb, value)
 
     def write(self, chunk, cb=None):
         """::
 
             stream = stream.write(bstring)
             stream = stream.write(bstring, cb)
+            stream = stream.write((asset_file, offset, size))
 
         Write data to stream, the optional drain callback will be invoked once all data
-        has been written.
+        has been written. A tuple with an object providing a ``fileno`` method, like
+        :mod:`Pyjo.Asset.File`, a position and a size in bytes queues a part of a file,
+        which gets sent with :func:`os.sendfile` without reading it into memory where
+        possible. ::
+
+            # Send file
+            asset = Pyjo.Asset.File.new(path='/home/pyjo/video.mp4')
+            stream.write((asset, 0, asset.size), lambda stream: stream.close())
         """
-        self._buffer += chunk
+        if isinstance(chunk, tuple):
+            if chunk[2] > 0:
+                self._buffer.append(list(chunk))
+                self._buffered += chunk[2]
+
+        elif len(chunk):
+            # Mutable buffers could change while queued
+            if isinstance(chunk, memoryview):
+                chunk = chunk.tobytes()
+            elif not isinstance(chunk, bytes):
+                chunk = bytes(chunk)
+            self._buffer.append(memoryview(chunk))
+            self._buffered += len(chunk)
+            self._memory += len(chunk)
+
+            if not self._full and self._memory > self.high_watermark:
+                self._full = True
+                self.emit('pause')
+
         if cb:
             self.once(cb, 'drain')
-        elif not len(self._buffer):
+        elif not self._buffered:
             return self
         if self.handle:
             self.reactor.watch(self.handle, not self._paused, 1)
@@ -349,7 +521,7 @@ class Pyjo_IOLoop_Stream(Pyjo.EventEmitter.object):
 
     def _again(self):
         if self._timer:
-            self.reactor.again(self._timer)
+            self._timers.again(self._timer)
 
     def _error(self, e):
         # Retry
@@ -370,34 +542,139 @@ class Pyjo_IOLoop_Stream(Pyjo.EventEmitter.object):
         self.emit('error', e).close()
 
     def _read(self):
-        readbuffer = b''
-        try:
-            readbuffer = self.handle.recv(131072)
-        except socket.error as e:
-            return self._error(e)
-        if not readbuffer:
-            return self.close()
-        self.emit('read', readbuffer)._again()
+        # Edge-triggered reactors report new data only once, so read until drained
+        drain = getattr(self.reactor, 'edge_triggered', False)
+        while self._read_chunk() and drain and self.handle and not self._paused:
+            pass
 
-    def _write(self):
-        handle = self.handle
-        if len(self._buffer):
+    def _read_chunk(self):
+        size = self._read_size
+        pool = self.pool
+        buffer = pool.acquire(size) if pool is not None else bytearray(size)
+
+        try:
             try:
-                written = handle.send(self._buffer)
+                read = self.handle.recv_into(buffer, size)
             except socket.error as e:
-                self._error(e)
-            self.emit('write', self._buffer[:written])
-            self._buffer = self._buffer[written:]
-            if not len(self._buffer):
-                self.emit('drain')
-            self._again()
+                return self._error(e)
+            if not read:
+                return self.close()
+
+            # Adapt read size to throughput
+            if read == size:
+                if size < READ_MAX:
+                    self._read_size = size * 2
+            elif read < size // 4 and size > READ_MIN:
+                self._read_size = size // 2
+
+            chunk = memoryview(buffer)[:read]
+            self.emit('read', chunk if self.zero_copy else chunk.tobytes())._again()
+        finally:
+            if pool is not None:
+                pool.release(buffer)
+
+        # More data might be waiting in the socket or the TLS layer
+        handle = self.handle
+        return read == size or (hasattr(handle, 'pending') and handle.pending() > 0)
+
+    def _write(self):
+        # Edge-triggered reactors report writability only once, so write until blocked
+        drain = getattr(self.reactor, 'edge_triggered', False)
+        while self._buffered:
+            if not self._write_chunk():
+                return
+            if not drain or not self.handle:
+                break
 
         if self.is_writing:
             return
         if self._graceful:
             return self.close()
         if self.handle:
-            self.reactor.watch(handle, not self._paused, 0)
+            self.reactor.watch(self.handle, not self._paused, 0)
+
+    def _write_chunk(self):
+        handle = self.handle
+        buffer = self._buffer
+        try:
+            if isinstance(buffer[0], list) and not self._sendfile(handle):
+                self._read_file()
+
+            if isinstance(buffer[0], list):
+                f, offset, size = buffer[0]
+                written = os.sendfile(handle.fileno(), f.fileno(), offset, min(size, SENDFILE_MAX))
+                if not written:
+                    raise IOError(errno.EIO, 'Unexpected end of file')
+            elif len(buffer) > 1 and self._sendmsg(handle):
+                chunks = itertools.takewhile(lambda chunk: not isinstance(chunk, list), buffer)
+                written = handle.sendmsg(list(itertools.islice(chunks, IOV_MAX)))
+            else:
+                written = handle.send(buffer[0])
+        except (IOError, OSError, socket.error) as e:
+            # File system without sendfile support
+            if e.errno in (errno.EINVAL, errno.ENOSYS) and isinstance(buffer[0], list):
+                self._no_sendfile = True
+                return True
+            self._error(e)
+            return False
+
+        # Consume written chunks without copying the rest
+        self._buffered -= written
+        chunks = [] if self.has_subscribers('write') else None
+        while written:
+            chunk = buffer[0]
+            if isinstance(chunk, list):
+                chunk[1] += written
+                chunk[2] -= written
+                if not chunk[2]:
+                    buffer.popleft()
+                break
+            if len(chunk) > written:
+                buffer[0] = chunk[written:]
+                chunk = chunk[:written]
+            else:
+                buffer.popleft()
+            written -= len(chunk)
+            self._memory -= len(chunk)
+            if chunks is not None:
+                chunks.append(chunk.tobytes())
+
+        if chunks is not None:
+            self.emit('write', b''.join(chunks))
+        if self._full and self._memory <= self.low_watermark:
+            self._full = False
+            self.emit('resume')
+        if not self._buffered:
+            self.emit('drain')
+        self._again()
+        return True
+
+    def _read_file(self):
+        # Move the next part of a file into memory
+        buffer = self._buffer
+        region = buffer[0]
+        f, offset, size = region
+        fd = f.fileno()
+        os.lseek(fd, offset, os.SEEK_SET)
+        chunk = os.read(fd, min(size, 131072))
+        if not chunk:
+            raise IOError(errno.EIO, 'Unexpected end of file')
+
+        region[1] += len(chunk)
+        region[2] -= len(chunk)
+        if not region[2]:
+            buffer.popleft()
+        buffer.appendleft(memoryview(chunk))
+        self._memory += len(chunk)
+
+    def _sendfile(self, handle):
+        # Data needs to pass through Python for TLS and write events
+        return sendfile and not self._no_sendfile and not (ssl and isinstance(handle, ssl.SSLSocket)) \
+            and not self.has_subscribers('write')
+
+    def _sendmsg(self, handle):
+        # TLS sockets don't support scatter-gather I/O
+        return hasattr(handle, 'sendmsg') and not (ssl and isinstance(handle, ssl.SSLSocket))
 
 
 new = Pyjo_IOLoop_Stream.new
@@ -0,0 +1,275 @@
+"""
+Pyjo.IOLoop.Subprocess - Subprocesses
+=====================================
+::
+
+    import Pyjo.IOLoop.Subprocess
+
+    # Operation that would block the event loop for 5 seconds
+    subprocess = Pyjo.IOLoop.Subprocess.new()
+
+    def child(subprocess):
+        time.sleep(5)
+        return ['Hello', 'Pyjo']
+
+    def parent(subprocess, err, result):
+        print('Subprocess error: {0}'.format(err) if err else
+              'I {0} {1}!'.format(*result))
+
+    subprocess.run(child, parent)
+
+    # Start event loop if necessary
+    if not subprocess.ioloop.is_running:
+        subprocess.ioloop.start()
+
+:mod:`Pyjo.IOLoop.Subprocess` allows :mod:`Pyjo.IOLoop` to perform computationally
+expensive operations in subprocesses, without blocking the event loop. Unlike
+threads, subprocesses are not limited by the global interpreter lock, so they
+can use all CPU cores. The result of the child is serialized with :attr:`serialize`
+and sent back to the parent over a socket pair watched by the event loop.
+
+Events
+------
+
+:mod:`Pyjo.IOLoop.Subprocess` inherits all events from :mod:`Pyjo.EventEmitter`
+and can emit the following new ones.
+
+progress
+~~~~~~~~
+::
+
+    @subprocess.on
+    def progress(subprocess, *data):
+        ...
+
+Emitted in the parent process when the subprocess calls :meth:`progress`.
+
+spawn
+~~~~~
+::
+
+    @subprocess.on
+    def spawn(subprocess):
+        ...
+
+Emitted in the parent process when the subprocess has been spawned. ::
+
+    @subprocess.on
+    def spawn(subprocess):
+        print('Performing work in process {0}'.format(subprocess.pid))
+
+Classes
+-------
+"""
+
+import Pyjo.EventEmitter
+import Pyjo.IOLoop
+import Pyjo.IOLoop.Stream
+
+from Pyjo.Util import getenv, notnone, warn
+
+import os
+import pickle
+import socket
+import struct
+
+
+DEBUG = getenv('PYJO_IOLOOP_DEBUG', False)
+
+
+class Error(Exception):
+    """
+    Exception raised when the subprocess failed without an exception of its own.
+    """
+    pass
+
+
+class Pyjo_IOLoop_Subprocess(Pyjo.EventEmitter.object):
+    """
+    :mod:`Pyjo.IOLoop.Subprocess` inherits all attributes and methods from
+    :mod:`Pyjo.EventEmitter` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        super(Pyjo_IOLoop_Subprocess, self).__init__(**kwargs)
+
+        self.deserialize = kwargs.get('deserialize', pickle.loads)
+        """::
+
+            cb = subprocess.deserialize
+            subprocess.deserialize = lambda data: json.loads(data.decode('utf-8'))
+
+        A callback used to deserialize messages, defaults to :func:`pickle.loads`.
+        """
+
+        self.ioloop = notnone(kwargs.get('ioloop'), lambda: Pyjo.IOLoop.singleton)
+        """::
+
+            loop = subprocess.ioloop
+            subprocess.ioloop = Pyjo.IOLoop.new()
+
+        Event loop object to control, defaults to the global :mod:`Pyjo.IOLoop`
+        singleton.
+        """
+
+        self.serialize = kwargs.get('serialize', _serialize)
+        """::
+
+            cb = subprocess.serialize
+            subprocess.serialize = lambda data: json.dumps(data).encode('utf-8')
+
+        A callback used to serialize messages, defaults to :func:`pickle.dumps` with
+        the highest protocol available.
+        """
+
+        self.pid = None
+        """::
+
+            pid = subprocess.pid
+
+        Process id of the spawned subprocess if available.
+        """
+
+        self._buffer = bytearray()
+        self._result = None
+        self._writer = None
+
+    def progress(self, *data):
+        """::
+
+            subprocess.progress(*data)
+
+        Send data serialized with :attr:`serialize` to the parent process at any time
+        during the subprocess's execution. Must be called by the subprocess and emits
+        the :attr:`progress` event in the parent process with the data. ::
+
+            # Send progress information to the parent process
+            def child(subprocess):
+                subprocess.progress('0%')
+                time.sleep(5)
+                subprocess.progress('50%')
+                time.sleep(5)
+                return 'Hello Pyjo!'
+
+            def parent(subprocess, err, result):
+                print('Progress is 100%')
+                print(result)
+
+            @subprocess.on
+            def progress(subprocess, *data):
+                print('Progress is {0}'.format(data[0]))
+
+            subprocess.run(child, parent)
+        """
+        self._send(['progress', list(data)])
+
+    def run(self, child, parent):
+        """::
+
+            subprocess = subprocess.run(child, parent)
+
+        Execute the first callback in a child process and wait for it to return one
+        value, which will be serialized with :attr:`serialize` and passed to the second
+        callback in the parent process together with an exception, if the child
+        raised one. The callbacks are invoked as ``child(subprocess)`` and
+        ``parent(subprocess, err, result)``.
+        """
+        if not hasattr(os, 'fork'):
+            raise Error('Subprocesses require fork')
+
+        reader, writer = socket.socketpair()
+        pid = os.fork()
+
+        # Child
+        if not pid:
+            reader.close()
+            self._writer = writer
+            self._child(child)
+
+        # Parent
+        writer.close()
+        reader.setblocking(False)
+        self.pid = pid
+        if DEBUG:
+            warn("-- Subprocess spawned ({0})".format(pid))
+        self.emit('spawn')
+
+        stream = Pyjo.IOLoop.Stream.new(reader)
+        self.ioloop.stream(stream)
+        stream.timeout = 0
+
+        def read_cb(stream, chunk):
+            self._read(chunk)
+
+        def close_cb(stream):
+            self._close(parent)
+
+        stream.on(read_cb, 'read')
+        stream.on(close_cb, 'close')
+
+        return self
+
+    def _child(self, child):
+        # Don't touch the event loop of the parent process
+        try:
+            self.ioloop.reset()
+        except Exception:
+            pass
+
+        try:
+            try:
+                result = [None, child(self)]
+            except Exception as e:
+                result = [e, None]
+
+            try:
+                self._send(['result', result])
+            except Exception as e:
+                self._send(['result', [Error('Unable to serialize result: {0}'.format(e)), None]])
+        finally:
+            os._exit(0)
+
+    def _close(self, parent):
+        status = 0
+        try:
+            status = os.waitpid(self.pid, 0)[1]
+        except OSError:
+            pass
+
+        if self._result is not None:
+            err, result = self._result
+        else:
+            err, result = Error('Subprocess exited without result (status {0})'.format(status)), None
+
+        if DEBUG:
+            warn("-- Subprocess finished ({0})".format(self.pid))
+        parent(self, err, result)
+
+    def _read(self, chunk):
+        buffer = self._buffer
+        buffer.extend(chunk)
+
+        while len(buffer) >= 4:
+            size = struct.unpack('>I', bytes(buffer[:4]))[0]
+            if len(buffer) < size + 4:
+                break
+
+            message = self.deserialize(bytes(buffer[4:size + 4]))
+            del buffer[:size + 4]
+
+            if message[0] == 'progress':
+                self.emit('progress', *message[1])
+            else:
+                self._result = message[1]
+
+    def _send(self, message):
+        data = self.serialize(message)
+        self._writer.sendall(struct.pack('>I', len(data)) + data)
+
+
+def _serialize(data):
+    return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+
+new = Pyjo_IOLoop_Subprocess.new
+object = Pyjo_IOLoop_Subprocess
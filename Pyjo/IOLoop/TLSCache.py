@@ -0,0 +1,202 @@
+"""
+Pyjo.IOLoop.TLSCache - Reusable TLS contexts and sessions
+=========================================================
+::
+
+    import Pyjo.IOLoop.TLSCache
+
+    # Share TLS state between connections
+    cache = Pyjo.IOLoop.TLSCache.new()
+    context = cache.context(ca='/etc/ssl/certs/ca-certificates.crt')
+    handle = context.wrap_socket(handle, server_hostname='mojolicio.us',
+                                 session=cache.session('mojolicio.us', 443, context))
+    ...
+    cache.store('mojolicio.us', 443, handle)
+
+:mod:`Pyjo.IOLoop.TLSCache` keeps the :class:`ssl.SSLContext` objects used by
+:mod:`Pyjo.IOLoop.Client` for outgoing TLS connections, so certificates and keys
+are loaded only once, and the last :class:`ssl.SSLSession` for every host and
+port, so the next connection can resume it with an abbreviated handshake.
+Session resumption requires Python 3.6 or newer, older versions only share the
+contexts.
+
+With TLS 1.3 the server sends session tickets after the handshake, they arrive
+with the first data read from the connection. Sessions are therefore taken from
+the last connection to a host again while it is still open and right before it
+gets closed. Sessions of closed connections are only kept with Python 3.7 or
+newer.
+
+Classes
+-------
+"""
+
+import Pyjo.Base
+
+from Pyjo.Util import getenv, warn
+
+import collections
+import weakref
+
+if getenv('PYJO_NO_TLS', False):
+    ssl = None
+else:
+    try:
+        import ssl
+    except ImportError:
+        ssl = None
+
+
+DEBUG = getenv('PYJO_IOLOOP_DEBUG', False)
+
+
+if ssl:
+    class _SSLSocket(ssl.SSLSocket):
+        _tls_session = None
+
+        def close(self):
+            # Keep session tickets received after the handshake
+            entry = self._tls_session
+            if entry is not None:
+                self._tls_session = None
+                try:
+                    session = self.session
+                except (AttributeError, ValueError):
+                    session = None
+                if session is not None:
+                    entry[0] = session
+            super(_SSLSocket, self).close()
+
+
+class Pyjo_IOLoop_TLSCache(Pyjo.Base.object):
+    """
+    :mod:`Pyjo.IOLoop.TLSCache` inherits all attributes and methods from
+    :mod:`Pyjo.Base` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        self.max_sessions = kwargs.get('max_sessions', 128)
+        """::
+
+            size = cache.max_sessions
+            cache = cache.set(max_sessions=1024)
+
+        Maximum number of hosts to keep sessions for, defaults to ``128``. Setting the
+        value to ``0`` disables session resumption.
+        """
+
+        self._contexts = {}
+        self._sessions = collections.OrderedDict()
+        self._stats = {'handshakes': 0, 'resumed': 0}
+
+    def context(self, ca=None, cert=None, key=None):
+        """::
+
+            context = cache.context()
+            context = cache.context(ca='/etc/ssl/certs/ca-certificates.crt')
+
+        Get :class:`ssl.SSLContext` for outgoing connections with the given
+        certificate authority, certificate and key files, a new one is only created
+        the first time. The peer certificate and host name are verified if a
+        certificate authority file has been given.
+        """
+        options = (ca, cert, key)
+        context = self._contexts.get(options)
+        if context:
+            return context
+
+        # PROTOCOL_TLS_CLIENT requires Python 3.6
+        protocol = getattr(ssl, 'PROTOCOL_TLS_CLIENT', None)
+        context = ssl.SSLContext(protocol or ssl.PROTOCOL_SSLv23)
+        if ca:
+            if not protocol:
+                context.verify_mode = ssl.CERT_REQUIRED
+                context.check_hostname = True
+            context.load_verify_locations(ca)
+        else:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        if cert:
+            context.load_cert_chain(cert, key)
+
+        # SSLContext.sslsocket_class requires Python 3.7
+        if hasattr(ssl.SSLContext, 'sslsocket_class'):
+            context.sslsocket_class = _SSLSocket
+
+        self._contexts[options] = context
+        return context
+
+    def session(self, host, port, context=None):
+        """::
+
+            session = cache.session('mojolicio.us', 443)
+            session = cache.session('mojolicio.us', 443, context)
+
+        Get the last :class:`ssl.SSLSession` for host and port, or ``None``. Sessions
+        can only be resumed with the :class:`ssl.SSLContext` they have been created
+        with, so ``None`` is also returned for sessions of other contexts. Without
+        :class:`ssl.SSLSession` support there are never any sessions.
+        """
+        entry = self._sessions.get((host, port))
+        if not entry or (context is not None and entry[2] is not context):
+            return None
+
+        # Open connections might have received a newer session ticket
+        session, ref, unused = entry
+        handle = ref()
+        if handle is not None:
+            try:
+                current = handle.session
+            except (AttributeError, ValueError):
+                current = None
+            if current is not None:
+                entry[0] = session = current
+
+        return session
+
+    @property
+    def stats(self):
+        """::
+
+            stats = cache.stats
+
+        Counters of completed ``handshakes``, how many of them ``resumed`` a cached
+        session and the number of hosts with ``sessions``. ::
+
+            # Resumption rate
+            stats = cache.stats
+            print(stats['resumed'] / float(stats['handshakes']))
+        """
+        stats = dict(self._stats)
+        stats['sessions'] = len(self._sessions)
+        return stats
+
+    def store(self, host, port, handle):
+        """::
+
+            cache.store('mojolicio.us', 443, handle)
+
+        Remember session of a connected :class:`ssl.SSLSocket` for host and port.
+        """
+        reused = getattr(handle, 'session_reused', False)
+        self._stats['handshakes'] += 1
+        if reused:
+            self._stats['resumed'] += 1
+        if DEBUG:
+            warn("-- TLS session for {0}:{1} {2}\n".format(host, port, 'resumed' if reused else 'new'))
+
+        # SSLSession requires Python 3.6
+        if not self.max_sessions or getattr(ssl, 'SSLSession', None) is None:
+            return
+
+        key = (host, port)
+        sessions = self._sessions
+        sessions.pop(key, None)
+        sessions[key] = entry = [handle.session, weakref.ref(handle), handle.context]
+        if isinstance(handle, _SSLSocket):
+            handle._tls_session = entry
+        while len(sessions) > self.max_sessions:
+            sessions.popitem(last=False)
+
+
+new = Pyjo_IOLoop_TLSCache.new
+object = Pyjo_IOLoop_TLSCache
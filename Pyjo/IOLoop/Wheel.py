@@ -0,0 +1,204 @@
+"""
+Pyjo.IOLoop.Wheel - Timing wheel for inactivity timeouts
+========================================================
+::
+
+    import Pyjo.IOLoop.Wheel
+
+    # Create timing wheel
+    wheel = Pyjo.IOLoop.Wheel.new(resolution=0.5)
+
+    # Add a timeout
+    def timeout_cb(wheel):
+        print('Timeout!')
+
+    key = wheel.timer(timeout_cb, 15)
+
+    # Postpone timeout after activity
+    wheel.again(key)
+
+    # Cancel timeout
+    wheel.remove(key)
+
+:mod:`Pyjo.IOLoop.Wheel` is a coarse-grained timing wheel used by :mod:`Pyjo.IOLoop`
+for connection inactivity timeouts. Restarting a timeout only updates its
+deadline, entries are moved to the right slot lazily when their slot comes up,
+and the whole wheel is driven by a single recurring reactor timer which exists
+only as long as there are active timeouts.
+
+Timeouts expire with a precision of :attr:`resolution` seconds.
+
+Classes
+-------
+"""
+
+import Pyjo.Base
+import Pyjo.IOLoop
+
+from Pyjo.Util import getenv, notnone, steady_time, warn
+
+import itertools
+import weakref
+
+
+DEBUG = getenv('PYJO_IOLOOP_DEBUG', False)
+
+
+class Pyjo_IOLoop_Wheel(Pyjo.Base.object):
+    """
+    :mod:`Pyjo.IOLoop.Wheel` inherits all attributes and methods from
+    :mod:`Pyjo.Base` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        self.reactor = notnone(kwargs.get('reactor'), lambda: Pyjo.IOLoop.singleton.reactor)
+        """::
+
+            reactor = wheel.reactor
+            wheel.reactor = Pyjo.Reactor.Poll.new()
+
+        Low-level event reactor, defaults to the :attr:`reactor` attribute value of the
+        global :mod:`Pyjo.IOLoop` singleton.
+        """
+
+        self.resolution = kwargs.get('resolution', 0.25)
+        """::
+
+            resolution = wheel.resolution
+            wheel = wheel.set(resolution=1)
+
+        Length of one slot in seconds, defaults to ``0.25``. Changes take effect
+        once the wheel has been emptied.
+        """
+
+        self.slots = kwargs.get('slots', 256)
+        """::
+
+            slots = wheel.slots
+            wheel = wheel.set(slots=1024)
+
+        Number of slots, defaults to ``256``. Timeouts longer than one full turn of
+        the wheel are visited once per turn. Changes take effect once the wheel has
+        been emptied.
+        """
+
+        self._entries = {}
+        self._keys = itertools.count(1)
+        self._tick = None
+        self._timer = None
+        self._wheel = None
+
+    def again(self, key):
+        """::
+
+            wheel.again(key)
+
+        Restart active timeout.
+        """
+        entry = self._entries[key]
+        entry['deadline'] = steady_time() + entry['after']
+
+    def remove(self, key):
+        """::
+
+            boolean = wheel.remove(key)
+
+        Remove timeout.
+        """
+        entry = self._entries.pop(key, None)
+        if not entry:
+            return False
+
+        del self._wheel[entry['slot']][key]
+        if not self._entries:
+            self._stop()
+        return True
+
+    def reset(self):
+        """::
+
+            wheel.reset()
+
+        Remove all timeouts.
+        """
+        self._entries = {}
+        self._wheel = None
+        self._stop()
+
+    def timer(self, cb, after):
+        """::
+
+            key = wheel.timer(cb, 15)
+
+        Create a new timeout, invoking the callback after a given amount of time in
+        seconds.
+        """
+        if not self._entries:
+            self._start()
+
+        key = next(self._keys)
+        entry = self._entries[key] = {'cb': cb, 'after': after, 'deadline': steady_time() + after}
+        self._insert(key, entry)
+
+        return key
+
+    def _expire(self):
+        now = steady_time()
+        tick = int(now / self.resolution)
+
+        # Visit each slot once at most, even after a long pause
+        first = max(self._tick + 1, tick - self.slots + 1)
+        for t in range(first, tick + 1):
+            if not self._entries:
+                break
+
+            slot = self._wheel[t % self.slots]
+            for key, entry in list(slot.items()):
+                if key not in slot:
+                    continue
+
+                # Restarted or not yet due in this turn
+                if entry['deadline'] > now:
+                    del slot[key]
+                    self._insert(key, entry)
+                    continue
+
+                del slot[key]
+                del self._entries[key]
+                if DEBUG:
+                    warn("-- Wheel timeout[{0}] = {1}".format(key, entry))
+                entry['cb'](self)
+
+            self._tick = t
+
+        if not self._entries:
+            self._stop()
+
+    def _insert(self, key, entry):
+        slot = (int(entry['deadline'] / self.resolution) + 1) % self.slots
+        entry['slot'] = slot
+        self._wheel[slot][key] = entry
+
+    def _start(self):
+        # Timeouts created by expiring callbacks keep the running timer
+        if self._timer:
+            return
+
+        self._wheel = [{} for _ in range(self.slots)]
+        self._tick = int(steady_time() / self.resolution)
+
+        wheel = weakref.proxy(self)
+
+        def expire_cb(reactor):
+            wheel._expire()
+
+        self._timer = self.reactor.recurring(expire_cb, self.resolution)
+
+    def _stop(self):
+        if self._timer:
+            self.reactor.remove(self._timer)
+            self._timer = None
+
+
+new = Pyjo_IOLoop_Wheel.new
+object = Pyjo_IOLoop_Wheel
@@ -64,6 +64,15 @@ finish
 Emitted when the event loop wants to shut down gracefully and is just waiting
 for all existing connections to be closed.
 
+Threads
+-------
+
+Every thread has its own :attr:`singleton`, so separate threads can run separate
+event loops. The only method which may be called from other threads is
+:meth:`Pyjo_IOLoop.call_soon_threadsafe`, which hands callbacks over to the thread
+running the event loop. Per-thread singletons require Python 3.7 or newer, on
+older versions all threads share one singleton.
+
 Debugging
 ---------
 
@@ -77,18 +86,31 @@ Classes
 """
 
 import Pyjo.EventEmitter
+import Pyjo.IOLoop.BufferPool
 import Pyjo.IOLoop.Client
 import Pyjo.IOLoop.Delay
+import Pyjo.IOLoop.Resolver
 import Pyjo.IOLoop.Server
 import Pyjo.IOLoop.Stream
+import Pyjo.IOLoop.Subprocess
+import Pyjo.IOLoop.TLSCache
+import Pyjo.IOLoop.Wheel
+import Pyjo.Promise
 import Pyjo.Reactor.Base
 
 from Pyjo.Util import decorator, decoratormethod, getenv, md5_sum, notnone, steady_time, rand, warn
 
 import importlib
+import sys
+import threading
 import traceback
 import weakref
 
+try:
+    import concurrent.futures
+except ImportError:
+    concurrent = None
+
 
 DEBUG = getenv('PYJO_IOLOOP_DEBUG', False)
 
@@ -122,6 +144,16 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
         randomly to improve load balancing between multiple server processes.
         """
 
+        self.max_workers = kwargs.get('max_workers', 4)
+        """::
+
+            max_workers = loop.max_workers
+            loop.max_workers = 8
+
+        The maximum number of threads used by :meth:`offload`, defaults to ``4``.
+        Changes take effect after :meth:`reset`.
+        """
+
         self.max_connections = kwargs.get('max_connections', 1000)
         """::
 
@@ -150,9 +182,9 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
             reactor = loop.reactor
             loop.reactor = Pyjo.Reactor.new()
 
-        Low-level event reactor, usually a :mod:`Pyjo.Reactor.Poll` or
-        :mod:`Pyjo.Reactor.Select` object with a default subscriber to the event
-        ``error``. ::
+        Low-level event reactor, usually a :mod:`Pyjo.Reactor.Epoll`,
+        :mod:`Pyjo.Reactor.Poll` or :mod:`Pyjo.Reactor.Select` object with a default
+        subscriber to the event ``error``. ::
 
             # Watch if handle becomes readable or writable
             def io_cb(reactor, writable):
@@ -174,7 +206,16 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
         self._acceptors = {}
         self._accepts = None
         self._connections = {}
+        self._executor = None
+        self._offloads = {'queued': 0, 'running': 0, 'done': 0}
+        self._offloads_lock = threading.Lock()
+        self._offloads_pending = 0
+        self._offloads_timer = None
+        self._pool = kwargs.get('pool')
+        self._resolver = kwargs.get('resolver')
         self._stop_timer = None
+        self._tls_cache = kwargs.get('tls_cache')
+        self._wheel = kwargs.get('wheel')
 
         if DEBUG:
             warn("-- Reactor initialized ({0})".format(self.reactor))
@@ -211,6 +252,39 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
 
         return cid
 
+    @decoratormethod
+    def call_soon_threadsafe(self, cb):
+        """::
+
+            loop.call_soon_threadsafe(cb)
+
+        Invoke callback as soon as possible from the thread running the event loop,
+        always returns ``None``. Unlike all other methods, this one may be called from
+        other threads and wakes up the event loop if necessary. ::
+
+            # Hand result from a worker thread back to the event loop
+            loop = Pyjo.IOLoop.singleton
+
+            def work():
+                result = compute()
+
+                @loop.call_soon_threadsafe
+                def done(loop):
+                    print(result)
+
+            threading.Thread(target=work).start()
+            loop.start()
+        """
+        loop = weakref.proxy(self)
+
+        def call_soon_cb(reactor):
+            if dir(loop):
+                cb(loop)
+
+        call_soon_cb.__wrapped__ = cb
+
+        self.reactor.call_soon_threadsafe(call_soon_cb)
+
     def client(self, cb=None, **kwargs):
         """::
 
@@ -239,6 +313,8 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
         self._connections[cid] = {'client': client}
 
         client.reactor = weakref.proxy(self.reactor)
+        client.resolver = self.resolver
+        client.tls_cache = self.tls_cache
         loop = weakref.proxy(self)
 
         def connect_cb(client, handle):
@@ -260,6 +336,34 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
         client.connect(**kwargs)
         return cid
 
+    def client_p(self, **kwargs):
+        """::
+
+            promise = Pyjo.IOLoop.client_p(address='127.0.0.1', port=3000)
+            promise = loop.client_p(address='127.0.0.1', port=3000)
+
+        Same as :meth:`client`, but returns a :mod:`Pyjo.Promise` object resolving to
+        the :mod:`Pyjo.IOLoop.Stream` object instead of accepting a callback.
+        Cancelling the promise aborts the connection attempt. ::
+
+            async def main():
+                stream = await Pyjo.IOLoop.client_p(port=3000)
+                stream.write(b"GET / HTTP/1.1\x0d\x0a\x0d\x0a")
+        """
+        loop = weakref.proxy(self)
+        promise = Pyjo.Promise.new(ioloop=loop)
+
+        def client_cb(loop, err, stream):
+            if err:
+                promise.reject(err)
+            else:
+                promise.resolve(stream)
+
+        cid = self.client(client_cb, **kwargs)
+        promise.on_cancel(lambda promise: loop.remove(cid))
+
+        return promise
+
     def delay(self, *args):
         """::
 
@@ -375,8 +479,110 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
             if dir(loop):
                 cb(loop)
 
+        next_tick_cb.__wrapped__ = cb
+
         return self.reactor.next_tick(next_tick_cb)
 
+    def offload(self, func, *args, **kwargs):
+        """::
+
+            loop.offload(func, *args, cb=cb)
+
+        Run blocking function with arguments in a pool of up to
+        :attr:`max_workers` threads, so it doesn't freeze the event loop, and invoke
+        the callback from the event loop thread with an exception or the return value.
+        The event loop keeps running until all results have been delivered. Requires
+        :mod:`concurrent.futures`. ::
+
+            # Hash password without blocking other connections
+            def hashed_cb(loop, err, digest):
+                if err:
+                    print('Hashing failed: {0}'.format(err))
+                else:
+                    print(digest)
+
+            loop.offload(hashlib.pbkdf2_hmac, 'sha256', password, salt, 100000, cb=hashed_cb)
+        """
+        cb = kwargs.pop('cb', None)
+        if concurrent is None:
+            raise Error('concurrent.futures required for offload')
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+
+        # Keep the event loop running until the result has been delivered
+        self._offloads_pending += 1
+        if self._offloads_timer is None:
+            self._offloads_timer = self.reactor.recurring(lambda reactor: None, 3600)
+
+        counts = self._offloads
+        lock = self._offloads_lock
+        with lock:
+            counts['queued'] += 1
+
+        def run():
+            with lock:
+                counts['queued'] -= 1
+                counts['running'] += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with lock:
+                    counts['running'] -= 1
+                    counts['done'] += 1
+
+        executor = self._executor
+        loop = weakref.proxy(self)
+
+        def result_cb(loop):
+            # Event loop has been reset in the meantime
+            if loop._executor is not executor:
+                return
+
+            loop._offloads_pending -= 1
+            if not loop._offloads_pending:
+                loop.reactor.remove(loop._offloads_timer)
+                loop._offloads_timer = None
+
+            try:
+                result, err = future.result(), None
+            except (Exception, concurrent.futures.CancelledError) as e:
+                result, err = None, e
+
+            if cb:
+                cb(loop, err, result)
+
+        if cb:
+            result_cb.__wrapped__ = cb
+
+        def done_cb(future):
+            try:
+                loop.call_soon_threadsafe(result_cb)
+            except ReferenceError:
+                pass
+
+        future = executor.submit(run)
+        future.add_done_callback(done_cb)
+
+    @property
+    def offload_stats(self):
+        """::
+
+            stats = loop.offload_stats
+
+        Counters for :meth:`offload`, ``workers`` for the size of the thread pool,
+        ``queued`` for functions waiting for a free thread, ``running`` for functions
+        currently running and ``done`` for all functions finished since the last
+        :meth:`reset`. ::
+
+            # Queue depth
+            print(loop.offload_stats['queued'])
+        """
+        with self._offloads_lock:
+            stats = dict(self._offloads)
+        stats['workers'] = self.max_workers
+        return stats
+
     def one_tick(self):
         """::
 
@@ -443,9 +649,55 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
         self._accepting_timer = False
         self._stop_timer = None
 
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._offloads = {'queued': 0, 'running': 0, 'done': 0}
+        self._offloads_lock = threading.Lock()
+        self._offloads_pending = 0
+        self._offloads_timer = None
+
+        if self._wheel is not None:
+            self._wheel.reset()
         self.reactor.reset()
         self.stop()
 
+    @property
+    def pool(self):
+        """::
+
+            pool = loop.pool
+            loop.pool = Pyjo.IOLoop.BufferPool.new(max_buffers=64)
+
+        Pool of reusable read buffers shared by all connections, defaults to a
+        :mod:`Pyjo.IOLoop.BufferPool` object.
+        """
+        if self._pool is None:
+            self._pool = Pyjo.IOLoop.BufferPool.new()
+        return self._pool
+
+    @pool.setter
+    def pool(self, value):
+        self._pool = value
+
+    @property
+    def resolver(self):
+        """::
+
+            resolver = loop.resolver
+            loop.resolver = Pyjo.IOLoop.Resolver.new(max_workers=8)
+
+        Resolver for host names of all outgoing connections, defaults to a
+        :mod:`Pyjo.IOLoop.Resolver` object.
+        """
+        if self._resolver is None:
+            self._resolver = Pyjo.IOLoop.Resolver.new(reactor=weakref.proxy(self.reactor))
+        return self._resolver
+
+    @resolver.setter
+    def resolver(self, value):
+        self._resolver = value
+
     def server(self, cb=None, **kwargs):
         """::
 
@@ -505,6 +757,30 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
 
         return self.acceptor(server)
 
+    def spawn(self, coro):
+        """::
+
+            promise = Pyjo.IOLoop.spawn(coro)
+            promise = loop.spawn(coro)
+
+        Run a coroutine on the event loop and return a :mod:`Pyjo.Promise` object
+        resolving to its return value, or rejecting with the exception it raised. The
+        coroutine is started during the next reactor tick and resumed whenever a
+        promise it awaits has been settled, generators yielding promises work too. ::
+
+            async def fetch(ua, url):
+                tx = await ua.get_p(url)
+                return tx.res.code
+
+            codes = Pyjo.Promise.all(Pyjo.IOLoop.spawn(fetch(ua, 'http://pyjo.org')),
+                                     Pyjo.IOLoop.spawn(fetch(ua, 'http://mojolicious.org')))
+            print(codes.wait())
+        """
+        promise = Pyjo.Promise.new(ioloop=weakref.proxy(self))
+        driver = Pyjo.Promise._Coroutine(coro, promise)
+        self.next_tick(lambda loop: driver.step('send', None))
+        return promise
+
     def start(self):
         """::
 
@@ -522,6 +798,33 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
             raise Error('Pyjo.IOLoop already running')
         self.reactor.start()
 
+    @decoratormethod
+    def signal(self, cb, signum):
+        """::
+
+            sid = Pyjo.IOLoop.signal(cb, signal.SIGHUP)
+            sid = loop.signal(cb, signal.SIGHUP)
+
+        Watch for signal, invoking the callback as ``cb(loop, signum)`` from the event
+        loop whenever the signal has been received. The event loop is woken up
+        immediately, the callback can be removed again with :meth:`remove`. Must be
+        called from the main thread. ::
+
+            # Stop event loop gracefully
+            @Pyjo.IOLoop.signal(signal.SIGTERM)
+            def terminate(loop, signum):
+                loop.stop_gracefully()
+        """
+        loop = weakref.proxy(self)
+
+        def signal_cb(reactor, signum):
+            if dir(loop):
+                cb(loop, signum)
+
+        signal_cb.__wrapped__ = cb
+
+        return self.reactor.signal(signal_cb, signum)
+
     def stop(self):
         """::
 
@@ -571,6 +874,28 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
 
         return self._stream(stream, self._id())
 
+    def subprocess(self, child, parent):
+        """::
+
+            subprocess = Pyjo.IOLoop.subprocess(child, parent)
+            subprocess = loop.subprocess(child, parent)
+
+        Build :mod:`Pyjo.IOLoop.Subprocess` object to perform computationally expensive
+        operations in subprocesses, without blocking the event loop. Callbacks will be
+        passed along to :meth:`Pyjo.IOLoop.Subprocess.run`. ::
+
+            # Operation that would block the event loop for 5 seconds
+            def child(subprocess):
+                time.sleep(5)
+                return ['Hello', 'Pyjo']
+
+            def parent(subprocess, err, result):
+                print('I {0} {1}!'.format(*result))
+
+            Pyjo.IOLoop.subprocess(child, parent)
+        """
+        return Pyjo.IOLoop.Subprocess.new(ioloop=self).run(child, parent)
+
     @decoratormethod
     def timer(self, cb, after):
         """::
@@ -591,6 +916,46 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
             warn("-- Timer after {0} cb {1}".format(after, cb))
         return self._timer(cb, 'timer', after)
 
+    @property
+    def tls_cache(self):
+        """::
+
+            cache = loop.tls_cache
+            loop.tls_cache = Pyjo.IOLoop.TLSCache.new(max_sessions=1024)
+
+        TLS contexts and sessions shared by all outgoing connections, defaults to a
+        :mod:`Pyjo.IOLoop.TLSCache` object.
+        """
+        if self._tls_cache is None:
+            self._tls_cache = Pyjo.IOLoop.TLSCache.new()
+        return self._tls_cache
+
+    @tls_cache.setter
+    def tls_cache(self, value):
+        self._tls_cache = value
+
+    @property
+    def wheel(self):
+        """::
+
+            wheel = loop.wheel
+            loop.wheel = Pyjo.IOLoop.Wheel.new(resolution=1)
+
+        Timing wheel used for inactivity timeouts of all connections, defaults to a
+        :mod:`Pyjo.IOLoop.Wheel` object. Restarting a timeout after every read and
+        write only updates a deadline instead of restarting a reactor timer. ::
+
+            # Expire inactive connections with one second precision
+            loop.wheel.resolution = 1
+        """
+        if self._wheel is None:
+            self._wheel = Pyjo.IOLoop.Wheel.new(reactor=weakref.proxy(self.reactor))
+        return self._wheel
+
+    @wheel.setter
+    def wheel(self, value):
+        self._wheel = value
+
     def _id(self):
         taskid = None
         while True:
@@ -664,7 +1029,9 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
         if DEBUG:
             warn("-- New connection {0} ({1} connections)".format(cid, len(self._connections)))
 
+        stream.pool = self.pool
         stream.reactor = weakref.proxy(self.reactor)
+        stream.wheel = weakref.proxy(self.wheel)
         loop = weakref.proxy(self)
 
         def close_cb(stream):
@@ -683,6 +1050,8 @@ class Pyjo_IOLoop(Pyjo.EventEmitter.object):
             if dir(loop):
                 cb(loop)
 
+        timer_cb.__wrapped__ = cb
+
         return getattr(self.reactor, method)(timer_cb, after)
 
 
@@ -690,98 +1059,135 @@ def new(*args, **kwargs):
     return Pyjo_IOLoop(*args, **kwargs)
 
 
-singleton = Pyjo_IOLoop()
-"""::
+_local = threading.local()
 
-    loop = Pyjo.IOLoop.singleton
 
-The global :mod:`Pyjo.IOLoop` singleton, used to access a single shared event
-loop object from everywhere inside the process. ::
+def _singleton():
+    """::
 
-    # Many methods also allow you to take shortcuts
-    Pyjo.IOLoop.timer(lambda loop: Pyjo.IOLoop.stop(), 2)
-    Pyjo.IOLoop.start()
+        loop = Pyjo.IOLoop.singleton
 
-    # Restart active timer
-    @Pyjo.IOLoop.timer(3)
-    def timeouter(loop):
-        print('Timeout!')
+    The global :mod:`Pyjo.IOLoop` singleton of the current thread, used to access a
+    single shared event loop object from everywhere inside the thread. ::
+
+        # Many methods also allow you to take shortcuts
+        Pyjo.IOLoop.timer(lambda loop: Pyjo.IOLoop.stop(), 2)
+        Pyjo.IOLoop.start()
+
+        # Restart active timer
+        @Pyjo.IOLoop.timer(3)
+        def timeouter(loop):
+            print('Timeout!')
+
+        Pyjo.IOLoop.singleton.reactor.again(timeouter)
+    """
+    loop = getattr(_local, 'loop', None)
+    if loop is None:
+        loop = _local.loop = Pyjo_IOLoop()
+    return loop
 
-    Pyjo.IOLoop.singleton.reactor.again(timeouter)
-"""
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name == 'singleton':
+            return _singleton()
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+else:
+    singleton = _singleton()
 
 
 def acceptor(acceptor):
-    return singleton.acceptor(acceptor)
+    return _singleton().acceptor(acceptor)
 
 
 def client(cb=None, **kwargs):
     if cb is None:
         def wrap(func):
-            return singleton.client(func, **kwargs)
+            return _singleton().client(func, **kwargs)
         return wrap
 
-    return singleton.client(cb, **kwargs)
+    return _singleton().client(cb, **kwargs)
+
+
+def client_p(**kwargs):
+    return _singleton().client_p(**kwargs)
 
 
 def delay(*args):
-    return singleton.delay(*args)
+    return _singleton().delay(*args)
 
 
 def is_running():
-    return singleton.is_running
+    return _singleton().is_running
 
 
 @decorator
 def next_tick(cb):
-    return singleton.next_tick(cb)
+    return _singleton().next_tick(cb)
+
+
+def offload(func, *args, **kwargs):
+    return _singleton().offload(func, *args, **kwargs)
 
 
 def one_tick():
-    return singleton.one_tick()
+    return _singleton().one_tick()
 
 
 @decorator
 def recurring(cb, after):
-    return singleton.recurring(cb, after)
+    return _singleton().recurring(cb, after)
 
 
 def remove(taskid):
-    return singleton.remove(taskid)
+    return _singleton().remove(taskid)
 
 
 def reset():
-    return singleton.reset()
+    return _singleton().reset()
 
 
 def server(cb=None, **kwargs):
     if cb is None:
         def wrap(func):
-            return singleton.server(func, **kwargs)
+            return _singleton().server(func, **kwargs)
         return wrap
 
-    return singleton.server(cb, **kwargs)
+    return _singleton().server(cb, **kwargs)
+
+
+@decorator
+def signal(cb, signum=None):
+    return _singleton().signal(cb, signum)
+
+
+def spawn(coro):
+    return _singleton().spawn(coro)
 
 
 def start():
-    return singleton.start()
+    return _singleton().start()
 
 
 def stop():
-    return singleton.stop()
+    return _singleton().stop()
 
 
 def stop_gracefully():
-    return singleton.stop_gracefully()
+    return _singleton().stop_gracefully()
 
 
 def stream(stream):
-    return singleton.stream(stream)
+    return _singleton().stream(stream)
+
+
+def subprocess(child, parent):
+    return _singleton().subprocess(child, parent)
 
 
 @decorator
 def timer(cb, after=None):
-    return singleton.timer(cb, after)
+    return _singleton().timer(cb, after)
 
 
 object = Pyjo_IOLoop
@@ -78,6 +78,18 @@ class Pyjo_Message_Request(Pyjo.Message.object):
             version = req.environ['wsgi.version']
         """
 
+        self.fast_parse = kwargs.get('fast_parse', False)
+        """::
+
+            boolean = req.fast_parse
+            req.fast_parse = boolean
+
+        Parse request-line and headers in a single pass if the first chunk already
+        contains all of them, with :meth:`Pyjo.Content.parse_head`, defaults to a
+        false value. Requests arriving in smaller pieces are still parsed line by
+        line.
+        """
+
         self.method = kwargs.get('method', 'GET')
         """::
 
@@ -364,6 +376,13 @@ class Pyjo_Message_Request(Pyjo.Message.object):
 
         # Parse normal message
         if self._state != 'cgi':
+            # Complete request-line and headers in one pass
+            if self.fast_parse and not self._state and not self._buffer and not self._error:
+                if isinstance(chunk, memoryview):
+                    chunk = chunk.tobytes()
+                if self._parse_head(chunk):
+                    self._raw_size += len(chunk)
+                    chunk = b''
             super(Pyjo_Message_Request, self).parse(chunk)
 
         # Parse CGI content
@@ -558,6 +577,39 @@ class Pyjo_Message_Request(Pyjo.Message.object):
         # Bypass normal message parser
         self._state = 'cgi'
 
+    def _parse_head(self, chunk):
+        # Leave incomplete and unusual requests to the line by line parser
+        end = chunk.find(b'\x0d\x0a\x0d\x0a')
+        if end < 0:
+            return False
+        nl = chunk.find(b'\x0d\x0a', 0, end + 2)
+        if not 0 < nl < self.max_line_size:
+            return False
+
+        # Request-line
+        line = chunk[:nl]
+        parts = line.split(b' ')
+        if len(parts) != 3 or parts != line.split():
+            return False
+        method, target, protocol = parts
+        version = protocol[5:]
+        if not method or not target or protocol[:5] != b'HTTP/' or len(version) != 3 or \
+                not version[:1].isdigit() or version[1:2] != b'.' or not version[2:].isdigit():
+            return False
+
+        # Headers (body gets parsed with the message)
+        if self.content.parse_head(chunk, nl + 2, end + 2) is None:
+            return False
+        self._state = 'content'
+
+        self.method = u(method, 'ascii')
+        self.version = u(version, 'ascii')
+        if self.method == 'CONNECT':
+            self.url.authority = target
+        else:
+            self.url.parse(target)
+        return True
+
 
 new = Pyjo_Message_Request.new
 object = Pyjo_Message_Request
@@ -0,0 +1,616 @@
+"""
+Pyjo.Promise - Promises/A+
+==========================
+::
+
+    import Pyjo.Promise
+    import Pyjo.UserAgent
+
+    # Wrap continuation-passing style APIs with promises
+    ua = Pyjo.UserAgent.new()
+
+    def get_p(url):
+        promise = Pyjo.Promise.new()
+
+        def cb(ua, tx):
+            err = tx.error
+            if not err or err.get('code'):
+                promise.resolve(tx)
+            else:
+                promise.reject(Pyjo.Promise.Error(err['message']))
+
+        ua.get(url, cb=cb)
+        return promise
+
+    # Perform non-blocking operations sequentially
+    def first(tx):
+        print(tx.res.code)
+        print(tx.req.url)
+        return get_p('http://pyjo.org')
+
+    def second(tx):
+        print(tx.res.code)
+        print(tx.req.url)
+
+    def failure(err):
+        print('Something went wrong: {0}'.format(err))
+
+    get_p('http://mojolicious.org').then(first).then(second).catch(failure).wait()
+
+    # Synchronize non-blocking operations (all)
+    mojo = get_p('http://mojolicious.org')
+    pyjo = get_p('http://pyjo.org')
+
+    def success(results):
+        mojo, pyjo = results
+        print(mojo.res.code)
+        print(pyjo.res.code)
+
+    Pyjo.Promise.all(mojo, pyjo).then(success).catch(failure).wait()
+
+    # Synchronize non-blocking operations (race)
+    def fastest(tx):
+        print(tx.req.url + ' won!')
+
+    Pyjo.Promise.race(mojo, pyjo).then(fastest).catch(failure).wait()
+
+:mod:`Pyjo.Promise` is a Python implementation of
+`Promises/A+ <https://promisesaplus.com>`_. Callbacks are always invoked from
+the next tick of :attr:`ioloop` and every settled promise schedules at most one
+:meth:`Pyjo.IOLoop.next_tick` for all of its callbacks.
+
+Promises are awaitable, so coroutines started with :meth:`Pyjo.IOLoop.spawn` can
+wait for them without nesting callbacks. ::
+
+    async def main():
+        tx = await get_p('http://pyjo.org')
+        print(tx.res.code)
+
+    Pyjo.IOLoop.spawn(main()).wait()
+
+Results
+-------
+
+A promise can be resolved or rejected with any number of values. Callbacks
+registered with :meth:`then` receive them as positional arguments, while
+:func:`all`, :func:`any`, :func:`race` and coroutines work with a single value:
+``None`` for no value, the value itself for one and a :class:`tuple` for many.
+Promises should be rejected with an exception, coroutines get it raised by
+``await``.
+
+Classes
+-------
+"""
+
+import Pyjo.Base
+import Pyjo.IOLoop
+
+from Pyjo.Util import getenv, notnone, warn
+
+import weakref
+
+
+DEBUG = getenv('PYJO_PROMISE_DEBUG', False)
+
+
+class Error(Exception):
+    """
+    Exception raised by :meth:`Pyjo_Promise.wait` and coroutines if a promise has
+    been rejected with something else than an exception.
+    """
+    pass
+
+
+class Cancelled(Error):
+    """
+    Exception a promise is rejected with by :meth:`Pyjo_Promise.cancel`.
+    """
+    pass
+
+
+class Timeout(Error):
+    """
+    Exception a promise is rejected with by :meth:`Pyjo_Promise.timeout`.
+    """
+    pass
+
+
+class Pyjo_Promise(Pyjo.Base.object):
+    """
+    :mod:`Pyjo.Promise` inherits all attributes and methods from
+    :mod:`Pyjo.Base` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        self.ioloop = notnone(kwargs.get('ioloop'), lambda: Pyjo.IOLoop.singleton)
+        """::
+
+            loop = promise.ioloop
+            promise.ioloop = Pyjo.IOLoop.new()
+
+        Event loop object to control, defaults to the global :mod:`Pyjo.IOLoop`
+        singleton.
+        """
+
+        self._cancel = None
+        self._cbs = []
+        self._result = None
+        self._status = None
+        self._timer = None
+
+    def __await__(self):
+        return _Await(self)
+
+    __iter__ = __await__
+
+    def cancel(self):
+        """::
+
+            promise = promise.cancel()
+
+        Reject the promise with a :class:`Cancelled` exception, if it is still
+        pending, and invoke the callbacks registered with :meth:`on_cancel` to abort
+        the operation the promise is waiting for.
+        """
+        if self._status is not None:
+            return self
+
+        cbs, self._cancel = self._cancel or [], None
+        self.reject(Cancelled('Promise cancelled'))
+        for cb in cbs:
+            cb(self)
+
+        return self
+
+    def catch(self, cb):
+        """::
+
+            new = promise.catch(lambda reason: ...)
+
+            @promise.catch
+            def new(reason):
+                ...
+
+        Append a rejection handler callback to the promise, and return a new
+        :mod:`Pyjo.Promise` object resolving to the return value of the callback if
+        it is called, or to its original fulfillment value if the promise is instead
+        fulfilled. ::
+
+            # Longer version
+            new = promise.then(None, cb)
+
+            # Pass along the rejection reason
+            def cb(err):
+                warn('Something went wrong: {0}'.format(err))
+                raise err
+
+            # Change the rejection reason
+            def cb(err):
+                raise Exception('Something went wrong')
+
+            promise.catch(cb)
+        """
+        return self.then(None, cb)
+
+    def finally_(self, cb):
+        """::
+
+            new = promise.finally_(lambda: ...)
+
+            @promise.finally_
+            def new():
+                ...
+
+        Append a fulfillment and rejection handler to the promise, and return a new
+        :mod:`Pyjo.Promise` object resolving to the original fulfillment value or
+        rejection reason. The trailing underscore avoids the ``finally`` keyword. ::
+
+            # Do something on fulfillment and rejection
+            promise.finally_(lambda: print('Done!'))
+        """
+        return self._then(_Finally(cb, 'resolve', self.ioloop), _Finally(cb, 'reject', self.ioloop))
+
+    @property
+    def is_pending(self):
+        """::
+
+            boolean = promise.is_pending
+
+        Check if promise is still pending.
+        """
+        return self._status is None
+
+    def on_cancel(self, cb):
+        """::
+
+            promise = promise.on_cancel(lambda promise: ...)
+
+        Register a callback to abort the underlying operation when :meth:`cancel` is
+        called. ::
+
+            # Remove a timer when cancelled
+            promise = Pyjo.Promise.new()
+            tid = Pyjo.IOLoop.timer(lambda loop: promise.resolve(), 5)
+            promise.on_cancel(lambda promise: Pyjo.IOLoop.remove(tid))
+        """
+        if self._status is None:
+            if self._cancel is None:
+                self._cancel = []
+            self._cancel.append(cb)
+        return self
+
+    def reject(self, *reason):
+        """::
+
+            promise = promise.reject(err)
+
+        Reject the promise with an exception or other reason.
+        """
+        return self._settle('reject', reason)
+
+    def resolve(self, *result):
+        """::
+
+            promise = promise.resolve()
+            promise = promise.resolve(value)
+            promise = promise.resolve(*values)
+
+        Resolve the promise with one or more fulfillment values. A
+        :mod:`Pyjo.Promise` object or any other object with a ``then`` method passed
+        as only value is followed instead.
+        """
+        return self._settle('resolve', result)
+
+    def then(self, on_resolve=None, on_reject=None):
+        """::
+
+            new = promise.then(lambda *result: ...)
+            new = promise.then(lambda *result: ..., lambda *reason: ...)
+            new = promise.then(None, lambda *reason: ...)
+
+            @promise.then
+            def new(*result):
+                ...
+
+        Append fulfillment and rejection handlers to the promise, and return a new
+        :mod:`Pyjo.Promise` object resolving to the return value of the called
+        handler, or rejecting with the exception it raised. ::
+
+            # Pass along the fulfillment value or rejection reason
+            promise.then(lambda value: value,
+                         lambda err: promise.new(ioloop=promise.ioloop).reject(err))
+
+            # Change the fulfillment value or rejection reason
+            def bad(err):
+                raise Exception('This is bad: {0}'.format(err))
+
+            promise.then(lambda value: 'This is good: ' + value, bad)
+        """
+        return self._then(on_resolve, on_reject)
+
+    def timeout(self, after, reason=None):
+        """::
+
+            promise = promise.timeout(5)
+            promise = promise.timeout(5, Exception('Timeout!'))
+
+        Reject the promise after a given amount of time in seconds, if it is still
+        pending by then, with a reason defaulting to a :class:`Timeout` exception.
+        The timer is removed as soon as the promise has been settled.
+        """
+        if self._status is not None:
+            return self
+
+        promise = weakref.proxy(self)
+
+        def timeout_cb(loop):
+            try:
+                promise._timer = None
+                promise.reject(Timeout('Promise timeout') if reason is None else reason)
+            except ReferenceError:
+                pass
+
+        if self._timer is not None:
+            self.ioloop.remove(self._timer)
+        self._timer = self.ioloop.timer(timeout_cb, after)
+
+        return self
+
+    def wait(self):
+        """::
+
+            result = promise.wait()
+
+        Start :attr:`ioloop` and stop it again once the promise has been settled, then
+        return the fulfillment value or raise the rejection reason. Returns ``None``
+        immediately if :attr:`ioloop` is already running.
+        """
+        loop = self.ioloop
+        if loop.is_running:
+            return
+
+        if self._status is None:
+            def stop_cb(*args):
+                loop.stop()
+
+            self._subscribe(stop_cb, stop_cb)
+            loop.start()
+
+        if self._status == 'resolve':
+            return _value(self._result)
+        elif self._status == 'reject':
+            raise _exception(self._result)
+
+    def _defer(self):
+        cbs, self._cbs = self._cbs, []
+        if not cbs:
+            return
+
+        status, result = self._status, self._result
+
+        def defer_cb(loop):
+            for resolve_cb, reject_cb, new in cbs:
+                _then_cb(new, resolve_cb if status == 'resolve' else reject_cb, status, result)
+
+        self.ioloop.next_tick(defer_cb)
+
+    def _settle(self, status, result):
+        if len(result) == 1 and _is_thenable(result[0]) and result[0] is not self:
+            _subscribe(result[0], self.resolve, self.reject)
+            return self
+
+        if self._status is not None:
+            return self
+
+        if DEBUG:
+            warn("-- Promise {0} {1}".format(status, result))
+
+        self._status, self._result = status, result
+        self._cancel = None
+        if self._timer is not None:
+            self.ioloop.remove(self._timer)
+            self._timer = None
+
+        self._defer()
+        return self
+
+    def _subscribe(self, on_resolve, on_reject):
+        # Like then, but without a new promise for the return value
+        self._cbs.append((on_resolve, on_reject, None))
+        if self._status is not None:
+            self._defer()
+
+    def _then(self, on_resolve, on_reject):
+        new = self.new(ioloop=self.ioloop)
+        self._cbs.append((on_resolve, on_reject, new))
+        if self._status is not None:
+            self._defer()
+        return new
+
+
+class _Await(object):
+    # Iterator used by "await" and "yield from", yields the promise once and
+    # returns its result afterwards
+
+    def __init__(self, promise):
+        self.promise = promise
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+    next = __next__
+
+    def send(self, value):
+        promise = self.promise
+        if promise._status is None:
+            return promise
+        if promise._status == 'reject':
+            raise _exception(promise._result)
+        raise StopIteration(_value(promise._result))
+
+    def throw(self, *args):
+        raise args[1] if len(args) > 1 and args[1] is not None else args[0]
+
+    def close(self):
+        pass
+
+
+class _Coroutine(object):
+    # Drive a coroutine, every promise it awaits resumes it once settled
+
+    def __init__(self, coro, promise):
+        self.coro = coro
+        self.promise = promise
+
+    def resolve(self, *result):
+        self.step('send', _value(result))
+
+    def reject(self, *reason):
+        self.step('throw', _exception(reason))
+
+    def step(self, method, value):
+        try:
+            awaited = getattr(self.coro, method)(value)
+        except StopIteration as e:
+            self.promise.resolve(e.args[0] if e.args else None)
+            return
+        except Exception as e:
+            self.promise.reject(e)
+            return
+
+        if not _is_thenable(awaited):
+            self.step('throw', Error('Coroutine yielded {0!r} instead of a promise'.format(awaited)))
+            return
+
+        _subscribe(awaited, self.resolve, self.reject)
+
+
+class _Finally(object):
+    # Run callback, then pass along the original result
+
+    def __init__(self, cb, status, ioloop):
+        self.cb = cb
+        self.status = status
+        self.ioloop = ioloop
+
+    def __call__(self, *result):
+        self.cb()
+        return Pyjo_Promise.new(ioloop=self.ioloop)._settle(self.status, result)
+
+
+def _exception(reason):
+    if len(reason) == 1 and isinstance(reason[0], BaseException):
+        return reason[0]
+    return Error(*reason)
+
+
+def _is_thenable(value):
+    return callable(getattr(value, 'then', None)) and not isinstance(value, type)
+
+
+def _subscribe(thenable, on_resolve, on_reject):
+    if isinstance(thenable, Pyjo_Promise):
+        thenable._subscribe(on_resolve, on_reject)
+    else:
+        thenable.then(lambda *result: on_resolve(*result) and None,
+                      lambda *reason: on_reject(*reason) and None)
+
+
+def _then_cb(new, cb, status, result):
+    if new is None:
+        if cb is not None:
+            cb(*result)
+        return
+
+    if cb is None:
+        new._settle(status, result)
+        return
+
+    try:
+        value = cb(*result)
+    except Exception as e:
+        new.reject(e)
+        return
+
+    new.resolve(value)
+
+
+def _value(result):
+    if not result:
+        return None
+    elif len(result) == 1:
+        return result[0]
+    else:
+        return tuple(result)
+
+
+def _all(*promises):
+    """::
+
+        new = Pyjo.Promise.all(promise1, promise2, promise3)
+
+    Returns a new :mod:`Pyjo.Promise` object that either fulfills when all of the
+    passed promises have been fulfilled or rejects as soon as one of them rejects.
+    If the returned promise fulfills, it is fulfilled with a list of the values from
+    the fulfilled promises, in the same order as the passed promises.
+    """
+    new = _new_for(promises)
+    results = [None] * len(promises)
+    state = {'remaining': len(promises)}
+
+    if not promises:
+        return new.resolve(results)
+
+    def wrap(i):
+        def resolve_cb(*result):
+            results[i] = _value(result)
+            state['remaining'] -= 1
+            if not state['remaining']:
+                new.resolve(results)
+        return resolve_cb
+
+    for i, promise in enumerate(promises):
+        _subscribe(promise, wrap(i), new.reject)
+
+    return new
+
+
+def _any(*promises):
+    """::
+
+        new = Pyjo.Promise.any(promise1, promise2, promise3)
+
+    Returns a new :mod:`Pyjo.Promise` object that fulfills as soon as one of the
+    passed promises fulfills, with the value from that promise. If all of them
+    reject, it is rejected with an :class:`Error` exception, whose first argument is
+    a list of the rejection reasons in the same order as the passed promises.
+    """
+    new = _new_for(promises)
+    reasons = [None] * len(promises)
+    state = {'remaining': len(promises)}
+
+    if not promises:
+        return new.reject(Error(reasons))
+
+    def wrap(i):
+        def reject_cb(*reason):
+            reasons[i] = _value(reason)
+            state['remaining'] -= 1
+            if not state['remaining']:
+                new.reject(Error(reasons))
+        return reject_cb
+
+    for i, promise in enumerate(promises):
+        _subscribe(promise, new.resolve, wrap(i))
+
+    return new
+
+
+def _new_for(promises):
+    for promise in promises:
+        if isinstance(promise, Pyjo_Promise):
+            return Pyjo_Promise.new(ioloop=promise.ioloop)
+    return Pyjo_Promise.new()
+
+
+def _race(*promises):
+    """::
+
+        new = Pyjo.Promise.race(promise1, promise2, promise3)
+
+    Returns a new :mod:`Pyjo.Promise` object that fulfills or rejects as soon as one
+    of the passed promises fulfills or rejects, with the value or reason from that
+    promise.
+    """
+    new = _new_for(promises)
+    for promise in promises:
+        _subscribe(promise, new.resolve, new.reject)
+    return new
+
+
+def _timeout(after, reason=None, ioloop=None):
+    """::
+
+        new = Pyjo.Promise.timeout(5)
+        new = Pyjo.Promise.timeout(5, Exception('Timeout!'))
+
+    Returns a new :mod:`Pyjo.Promise` object which is rejected after a given amount
+    of time in seconds, see :meth:`Pyjo_Promise.timeout`. ::
+
+        # Give up after 5 seconds
+        Pyjo.Promise.race(get_p('http://pyjo.org'), Pyjo.Promise.timeout(5))
+    """
+    return Pyjo_Promise.new(ioloop=ioloop).timeout(after, reason)
+
+
+new = Pyjo_Promise.new
+object = Pyjo_Promise
+
+# Named like the builtins they shadow for users of this module only
+all = _all
+any = _any
+race = _race
+timeout = _timeout
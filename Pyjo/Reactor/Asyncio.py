@@ -0,0 +1,458 @@
+"""
+Pyjo.Reactor.Asyncio - Low-level event reactor with asyncio support
+===================================================================
+::
+
+    import Pyjo.Reactor.Asyncio
+
+    # Watch if handle becomes readable or writable
+    reactor = Pyjo.Reactor.Asyncio.new()
+
+    def io_cb(reactor, writable):
+        if writable:
+            print('Handle is writable')
+        else:
+            print('Handle is readable')
+
+    reactor.io(io_cb, handle)
+
+    # Change to watching only if handle becomes writable
+    reactor.watch(handle, read=False, write=True)
+
+    # Add a timer
+    def timer_cb(reactor):
+        reactor.remove(handle)
+        print('Timeout!')
+
+    reactor.timer(timer_cb, 15)
+
+    # Start reactor if necessary
+    if not reactor.is_running:
+        reactor.start()
+
+:mod:`Pyjo.Reactor.Asyncio` is a low-level event reactor based on an :mod:`asyncio`
+event loop. Handles are watched with :meth:`asyncio.AbstractEventLoop.add_reader`
+and :meth:`asyncio.AbstractEventLoop.add_writer` and timers are scheduled with
+:meth:`asyncio.AbstractEventLoop.call_later`, so :mod:`Pyjo` servers and user
+agents can share one event loop with other :mod:`asyncio` libraries. ::
+
+    import asyncio
+    import Pyjo.IOLoop
+    import Pyjo.Reactor.Asyncio
+
+    async def main():
+        # Use the running event loop
+        loop = Pyjo.IOLoop.new(reactor=Pyjo.Reactor.Asyncio.new())
+        ...
+        await asyncio.sleep(60)
+
+    asyncio.run(main())
+
+The reactor uses the event loop which is running in the current thread, or
+the current event loop otherwise. If :mod:`uvloop` is installed, event loops
+created by the reactor itself are :mod:`uvloop` event loops unless the
+``PYJO_NO_UVLOOP`` environment variable is set. The event loop policy of the
+process is never changed. ::
+
+    PYJO_REACTOR=Pyjo.Reactor.Asyncio
+
+When the :mod:`asyncio` event loop is already running, :meth:`start` and
+:meth:`one_tick` return immediately, because the owner of the event loop
+dispatches all events.
+
+Events
+------
+
+:mod:`Pyjo.Reactor.Asyncio` inherits all events from :mod:`Pyjo.Reactor.Select`.
+
+Classes
+-------
+"""
+
+import Pyjo.Reactor.Select
+
+from Pyjo.Reactor.Select import READ, WRITE
+from Pyjo.Util import getenv, md5_sum, notnone, rand, steady_time, warn
+
+try:
+    import asyncio
+except ImportError:
+    import trollius as asyncio
+
+import socket
+import warnings
+import weakref
+
+if getenv('PYJO_NO_UVLOOP', False):
+    uvloop = None
+else:
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+
+
+DEBUG = getenv('PYJO_REACTOR_DEBUG', False)
+
+# Reactors sharing the event loop of a thread
+_reactors = weakref.WeakKeyDictionary()
+
+
+class Pyjo_Reactor_Asyncio(Pyjo.Reactor.Select.object):
+    """
+    :mod:`Pyjo.Reactor.Asyncio` inherits all attributes and methods from
+    :mod:`Pyjo.Reactor.Select` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        super(Pyjo_Reactor_Asyncio, self).__init__(**kwargs)
+
+        self.loop = notnone(kwargs.get('loop'), _event_loop)
+        """::
+
+            loop = reactor.loop
+            reactor = Pyjo.Reactor.Asyncio.new(loop=asyncio.new_event_loop())
+
+        The :mod:`asyncio` event loop, defaults to the running or current event loop of
+        the thread. If that event loop is already used by another reactor, a new
+        private event loop is created, so concurrent reactors don't share events.
+        """
+
+        self._exception = None
+        self._owner = False
+        self._private = False
+        self._tick = False
+
+        if 'loop' not in kwargs:
+            reactor = _reactors.get(self.loop)
+            if reactor and reactor():
+                self.loop = _new_event_loop()
+                self._private = True
+            else:
+                _reactors[self.loop] = weakref.ref(self)
+
+    def __del__(self):
+        super(Pyjo_Reactor_Asyncio, self).__del__()
+        if self._private:
+            try:
+                self.loop.close()
+            except Exception:
+                pass
+
+    def again(self, tid):
+        """::
+
+            reactor.again(tid)
+
+        Restart active timer.
+        """
+        timer = self._timers[tid]
+        timer['time'] = steady_time() + timer['after']
+        timer['handle'].cancel()
+        timer['handle'] = self.loop.call_later(timer['after'], self._alarm, tid)
+
+    def call_soon_threadsafe(self, cb):
+        """::
+
+            reactor.call_soon_threadsafe(cb)
+
+        Invoke callback as soon as possible from the thread running the :mod:`asyncio`
+        event loop. This method may be called from other threads, it uses
+        :meth:`asyncio.AbstractEventLoop.call_soon_threadsafe` to wake up the event
+        loop.
+        """
+        self._pending.append(cb)
+        try:
+            self.loop.call_soon_threadsafe(self._wakeup)
+        except RuntimeError:
+            # Event loop has been closed
+            pass
+
+    @property
+    def is_running(self):
+        """::
+
+            boolean = reactor.is_running
+
+        Check if reactor or the :mod:`asyncio` event loop is running.
+        """
+        return self._running or self.loop.is_running()
+
+    def one_tick(self):
+        """::
+
+            reactor.one_tick()
+
+        Run reactor until an event occurs. Returns immediately if the :mod:`asyncio`
+        event loop is already running.
+        """
+        if self.loop.is_running():
+            return
+
+        # Remember state for later
+        running = self._running
+        self._running = True
+
+        # Stop automatically if there is nothing to watch
+        if self._idle():
+            return self.stop()
+
+        self._tick = True
+        try:
+            self._run()
+        finally:
+            self._tick = False
+
+        # Restore state if necessary
+        if self._running:
+            self._running = running
+
+    def remove(self, remove):
+        """::
+
+            boolean = reactor.remove(handle)
+            boolean = reactor.remove(tid)
+
+        Remove handle or timer.
+        """
+        if remove is None:
+            if DEBUG:
+                warn("-- Reactor remove None")
+            return
+
+        if isinstance(remove, str):
+            if remove in self._signals_ids:
+                return self._remove_signal(remove)
+            if DEBUG:
+                if remove in self._timers:
+                    warn("-- Reactor remove timer[{0}] = {1}".format(remove, self._timers[remove]))
+                else:
+                    warn("-- Reactor remove timer[{0}] = None".format(remove))
+            if remove in self._timers:
+                self._timers.pop(remove)['handle'].cancel()
+                return True
+
+            return False
+
+        elif remove is not None:
+            try:
+                fd = remove.fileno()
+                if DEBUG:
+                    if fd in self._ios:
+                        warn("-- Reactor remove io[{0}]".format(fd))
+                self._unwatch(fd)
+                if fd in self._ios:
+                    del self._ios[fd]
+                    return True
+            except socket.error:
+                if DEBUG:
+                    warn("-- Reactor remove io {0} already closed".format(remove))
+
+        return False
+
+    def reset(self):
+        """::
+
+            reactor.reset()
+
+        Remove all handles and timers.
+        """
+        self._reset_signals()
+        for fd in list(self._masks):
+            self._unwatch(fd)
+        for timer in self._timers.values():
+            timer['handle'].cancel()
+        self._ios = {}
+        self._masks = {}
+        self._pending.clear()
+        self._timers = {}
+
+    def start(self):
+        """::
+
+            reactor.start()
+
+        Start watching for I/O and timer events, this will block until :meth:`stop` is
+        called or there is no any active I/O or timer event. Returns immediately if the
+        :mod:`asyncio` event loop is already running.
+        """
+        if self.loop.is_running():
+            return
+
+        self._running = True
+        if self._idle():
+            return self.stop()
+
+        self._run()
+        self._running = False
+
+    def stop(self):
+        """::
+
+            reactor.stop()
+
+        Stop watching for I/O and timer events. The :mod:`asyncio` event loop is
+        stopped only if it has been started by this reactor.
+        """
+        self._running = False
+        if self._owner:
+            self.loop.stop()
+
+    def _alarm(self, tid):
+        t = self._timers.get(tid)
+        if not t:
+            return
+
+        now = steady_time()
+        self._lag.append(max(now - t['time'], 0))
+
+        # Recurring timer
+        if 'recurring' in t:
+            t['time'] = now + t['recurring']
+            t['handle'] = self.loop.call_later(t['recurring'], self._alarm, tid)
+
+        # Normal timer
+        else:
+            del self._timers[tid]
+
+        if t['cb']:
+            if DEBUG:
+                warn("-- Alarm timer[{0}] = {1}".format(tid, t))
+            self._dispatch(t['cb'], "Timer {0}".format(tid))
+
+    def _dispatch(self, cb, event, *args):
+        try:
+            self._sandbox(cb, event, *args)
+        except Exception as e:
+            # Raise from start or one_tick
+            if not self._owner:
+                raise
+            if self._exception is None:
+                self._exception = e
+            return self.loop.stop()
+
+        if not self._owner:
+            return
+
+        # Stop automatically if there is nothing to watch
+        if self._idle():
+            self.stop()
+        elif self._tick:
+            self.loop.stop()
+
+    def _install_signal(self, signum):
+        reactor = weakref.proxy(self)
+
+        def signal_cb(reactor):
+            reactor._signal(signum)
+
+        def handler():
+            try:
+                reactor._dispatch(signal_cb, "Signal {0}".format(signum))
+            except ReferenceError:
+                pass
+
+        self.loop.add_signal_handler(signum, handler)
+
+    def _modify(self, fd, old, mask):
+        loop = self.loop
+
+        if old is None:
+            # Descriptor might have been closed and reused without removing
+            if not mask & READ:
+                loop.remove_reader(fd)
+            if not mask & WRITE:
+                loop.remove_writer(fd)
+            old = 0
+
+        if mask & READ and not old & READ:
+            loop.add_reader(fd, self._ready, fd, False)
+        elif not mask & READ and old & READ:
+            loop.remove_reader(fd)
+
+        if mask & WRITE and not old & WRITE:
+            loop.add_writer(fd, self._ready, fd, True)
+        elif not mask & WRITE and old & WRITE:
+            loop.remove_writer(fd)
+
+    def _ready(self, fd, write):
+        io = self._ios.get(fd)
+        if io:
+            if write:
+                self._dispatch(io['cb'], 'Write', True)
+            else:
+                self._dispatch(io['cb'], 'Read', False)
+
+    def _wakeup(self):
+        pending = self._pending
+        for _ in range(len(pending)):
+            self._dispatch(pending.popleft(), 'Pending')
+
+    def _run(self):
+        owner = self._owner
+        self._owner = True
+        try:
+            self.loop.run_forever()
+        finally:
+            self._owner = owner
+
+        e = self._exception
+        if e is not None:
+            self._exception = None
+            raise e
+
+    def _timer(self, cb, recurring, after):
+        tid = None
+        while True:
+            tid = md5_sum('t{0}{1}'.format(steady_time(), rand()).encode('ascii'))
+            if tid not in self._timers:
+                break
+
+        timer = {'cb': cb, 'after': after, 'time': steady_time() + after}
+        if recurring:
+            timer['recurring'] = after
+        timer['handle'] = self.loop.call_later(after, self._alarm, tid)
+        self._timers[tid] = timer
+
+        if DEBUG:
+            warn("-- Reactor adding timer[{0}] = {1}".format(tid, self._timers[tid]))
+
+        return tid
+
+    def _uninstall_signal(self, signum, previous):
+        self.loop.remove_signal_handler(signum)
+
+    def _unwatch(self, fd):
+        if fd in self._masks:
+            self._modify(fd, self._masks.pop(fd), 0)
+
+
+def _event_loop():
+    # Share the event loop which is already running in this thread
+    try:
+        return asyncio.get_running_loop()
+    except (AttributeError, RuntimeError):
+        pass
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            loop = None
+
+    if loop is None or loop.is_closed():
+        loop = _new_event_loop()
+        asyncio.set_event_loop(loop)
+
+    return loop
+
+
+def _new_event_loop():
+    if uvloop:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+new = Pyjo_Reactor_Asyncio.new
+object = Pyjo_Reactor_Asyncio
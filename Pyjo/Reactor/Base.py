@@ -9,6 +9,9 @@ Pyjo.Reactor.Base - Low-level event reactor base class
         def again(self, tid):
             ...
 
+        def call_soon_threadsafe(self, cb):
+            ...
+
         def io(self, cb, handle):
             ...
 
@@ -27,6 +30,9 @@ Pyjo.Reactor.Base - Low-level event reactor base class
         def reset(self):
             ...
 
+        def signal(self, cb, signum):
+            ...
+
         def start(self):
             ...
 
@@ -94,6 +100,25 @@ class Pyjo_Reactor_Base(Pyjo.EventEmitter.object):
         """
         pass
 
+    @not_implemented
+    def call_soon_threadsafe(self, cb):
+        """::
+
+            reactor.call_soon_threadsafe(cb)
+
+        Invoke callback as soon as possible from the thread running the reactor. This
+        is the only method which may be called from other threads, it wakes up the
+        reactor if necessary. Meant to be overloaded in a subclass. ::
+
+            # Hand result from a worker thread back to the reactor
+            def work():
+                result = compute()
+                reactor.call_soon_threadsafe(lambda reactor: print(result))
+
+            threading.Thread(target=work).start()
+        """
+        pass
+
     @classmethod
     def detect(self, reactor=None):
         """::
@@ -103,7 +128,8 @@ class Pyjo_Reactor_Base(Pyjo.EventEmitter.object):
 
         Detect and load the best reactor implementation available, will try the value
         of the argument or ``PYJO_REACTOR`` environment variable, then
-        :mod:`Pyjo.Reactor.Poll` if available or :mod:`Pyjo.Reactor.Select` otherwise. ::
+        :mod:`Pyjo.Reactor.Epoll` or :mod:`Pyjo.Reactor.Poll` if available or
+        :mod:`Pyjo.Reactor.Select` otherwise. ::
 
             # Instantiate best reactor implementation available
             reactor = Pyjo.Reactor.detect().new()
@@ -118,7 +144,9 @@ class Pyjo_Reactor_Base(Pyjo.EventEmitter.object):
             except ImportError:
                 pass
 
-        if hasattr(select, 'poll'):
+        if hasattr(select, 'epoll'):
+            return 'Pyjo.Reactor.Epoll'
+        elif hasattr(select, 'poll'):
             return 'Pyjo.Reactor.Poll'
         else:
             return 'Pyjo.Reactor.Select'
@@ -210,6 +238,24 @@ class Pyjo_Reactor_Base(Pyjo.EventEmitter.object):
         """
         pass
 
+    @not_implemented
+    def signal(self, cb, signum):
+        """::
+
+            sid = reactor.signal(cb, signal.SIGTERM)
+
+        Watch for signal, invoking the callback from the reactor whenever the signal
+        has been received. The returned id can be passed to :meth:`remove`. Meant to be
+        overloaded in a subclass. ::
+
+            # Reload configuration
+            def reload_cb(reactor, signum):
+                print('Received signal {0}'.format(signum))
+
+            reactor.signal(reload_cb, signal.SIGHUP)
+        """
+        pass
+
     @not_implemented
     def start(self):
         """::
@@ -0,0 +1,259 @@
+"""
+Pyjo.Reactor.Epoll - Low-level event reactor with epoll support
+===============================================================
+::
+
+    import Pyjo.Reactor.Epoll
+
+    # Watch if handle becomes readable or writable
+    reactor = Pyjo.Reactor.Epoll.new()
+
+    def io_cb(reactor, writable):
+        if writable:
+            print('Handle is writable')
+        else:
+            print('Handle is readable')
+
+    reactor.io(io_cb, handle)
+
+    # Change to watching only if handle becomes writable
+    reactor.watch(handle, read=False, write=True)
+
+    # Add a timer
+    def timer_cb(reactor):
+        reactor.remove(handle)
+        print('Timeout!')
+
+    reactor.timer(timer_cb, 15)
+
+    # Start reactor if necessary
+    if not reactor.is_running:
+        reactor.start()
+
+:mod:`Pyjo.Reactor.Epoll` is a low-level event reactor based on :meth:`select.epoll`.
+The kernel keeps the interest set, so the cost of one tick depends on the number
+of ready handles rather than on the number of watched handles. It is available
+on Linux only.
+
+Events
+------
+
+:mod:`Pyjo.Reactor.Epoll` inherits all events from :mod:`Pyjo.Reactor.Poll`.
+
+Edge-triggered mode
+-------------------
+
+You can set the ``PYJO_REACTOR_EPOLL_ET`` environment variable or the
+:attr:`edge_triggered` attribute to watch handles in edge-triggered mode. ::
+
+    PYJO_REACTOR_EPOLL_ET=1
+
+In this mode I/O callbacks are invoked only when the state of the handle
+changes, so they have to read or write until the operation would block.
+:mod:`Pyjo.IOLoop.Stream` and :mod:`Pyjo.IOLoop.Server` do that when
+:attr:`edge_triggered` is enabled, handlers of your own which read or write only
+once per event stall until the state of the handle changes again.
+
+Classes
+-------
+"""
+
+import Pyjo.Reactor.Poll
+
+from Pyjo.Util import getenv, notnone, steady_time, warn
+
+import errno
+import select
+import socket
+import time
+
+
+DEBUG = getenv('PYJO_REACTOR_DEBUG', False)
+
+
+class Pyjo_Reactor_Epoll(Pyjo.Reactor.Poll.object):
+    """
+    :mod:`Pyjo.Reactor.Epoll` inherits all attributes and methods from
+    :mod:`Pyjo.Reactor.Poll` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        super(Pyjo_Reactor_Epoll, self).__init__(**kwargs)
+
+        self.edge_triggered = notnone(kwargs.get('edge_triggered'), lambda: bool(getenv('PYJO_REACTOR_EPOLL_ET', False)))
+        """::
+
+            boolean = reactor.edge_triggered
+            reactor.edge_triggered = True
+
+        Watch handles in edge-triggered mode, defaults to the value of the
+        ``PYJO_REACTOR_EPOLL_ET`` environment variable or ``False``. Only handles
+        registered after the change are affected.
+        """
+
+        self._select_epoll = None
+
+    def one_tick(self):
+        """::
+
+            reactor.one_tick()
+
+        Run reactor until an event occurs. Note that this method can recurse back into
+        the reactor, so you need to be careful. Meant to be overloaded in a subclass.
+        """
+        # Remember state for later
+        running = self._running
+        self._running = True
+
+        # Wake up from other threads
+        if self._waker is None:
+            self._start_waker()
+
+        # Wait for one event
+        last = False
+        while not last and self._running:
+            # Stop automatically if there is nothing to watch
+            if self._idle():
+                return self.stop()
+
+            # Calculate ideal timeout based on timers
+            first = self._first_timer()
+            if self._pending:
+                timeout = 0
+            elif first is not None:
+                timeout = first - steady_time()
+            else:
+                timeout = 0.5
+
+            if timeout < 0:
+                timeout = 0
+
+            # I/O
+            if self._ios:
+                try:
+                    events = self._epoll().poll(timeout)
+                    for fd, flag in events:
+                        if fd in self._ios:
+                            if flag & (select.EPOLLIN | select.EPOLLPRI | select.EPOLLHUP | select.EPOLLERR):
+                                io = self._ios[fd]
+                                last = True
+                                self._sandbox(io['cb'], 'Read', False)
+                        if fd in self._ios:
+                            if flag & (select.EPOLLOUT):
+                                io = self._ios[fd]
+                                last = True
+                                self._sandbox(io['cb'], 'Write', True)
+                except (IOError, OSError) as e:
+                    # Ctrl-c generates EINTR on Python 2.x
+                    if e.args[0] != errno.EINTR:
+                        raise Exception(e)
+
+            # Wait for timeout if epoll can't be used
+            elif timeout:
+                time.sleep(timeout)
+
+            # Timers
+            if self._expire_timers():
+                last = True
+
+            # Callbacks from other threads
+            if self._pending:
+                self._run_pending()
+                last = True
+
+        # Restore state if necessary
+        if self._running:
+            self._running = running
+
+    def remove(self, remove):
+        """::
+
+            boolean = reactor.remove(handle)
+            boolean = reactor.remove(tid)
+
+        Remove handle or timer.
+        """
+        if remove is None:
+            if DEBUG:
+                warn("-- Reactor remove None")
+            return
+
+        if isinstance(remove, str):
+            if remove in self._signals_ids:
+                return self._remove_signal(remove)
+            return self._remove_timer(remove)
+
+        elif remove is not None:
+            try:
+                fd = remove.fileno()
+                if DEBUG:
+                    if fd in self._ios:
+                        warn("-- Reactor remove io[{0}]".format(fd))
+                if fd in self._masks:
+                    del self._masks[fd]
+                    self._epoll().unregister(fd)
+                if fd in self._ios:
+                    del self._ios[fd]
+                    return True
+            except (IOError, OSError, ValueError, socket.error):
+                if DEBUG:
+                    warn("-- Reactor remove io {0} already closed".format(remove))
+
+        return False
+
+    def reset(self):
+        """::
+
+            reactor.reset()
+
+        Remove all handles and timers.
+        """
+        if self._select_epoll:
+            self._select_epoll.close()
+        self._ios = {}
+        self._masks = {}
+        self._select_epoll = None
+        self._reset_signals()
+        self._reset_timers()
+        self._stop_waker()
+
+    def _mask(self, read, write):
+        mode = 0
+        if read:
+            mode |= select.EPOLLIN | select.EPOLLPRI
+        if write:
+            mode |= select.EPOLLOUT
+        if self.edge_triggered:
+            mode |= select.EPOLLET
+
+        return mode
+
+    def _modify(self, fd, old, mode):
+        epoll = self._epoll()
+
+        if old is None:
+            try:
+                epoll.register(fd, mode)
+            except (IOError, OSError) as e:
+                # Descriptor has been watched before without an I/O watcher
+                if e.errno != errno.EEXIST:
+                    raise
+                epoll.modify(fd, mode)
+        else:
+            try:
+                epoll.modify(fd, mode)
+            except (IOError, OSError) as e:
+                # Descriptor has been closed and reused without removing
+                if e.errno != errno.ENOENT:
+                    raise
+                epoll.register(fd, mode)
+
+    def _epoll(self):
+        if not self._select_epoll:
+            self._select_epoll = select.epoll()
+
+        return self._select_epoll
+
+
+new = Pyjo_Reactor_Epoll.new
+object = Pyjo_Reactor_Epoll
@@ -43,6 +43,7 @@ Classes
 
 import Pyjo.Reactor.Select
 
+from Pyjo.Reactor.Select import READ, WRITE
 from Pyjo.Util import getenv, steady_time, warn
 
 import errno
@@ -82,17 +83,23 @@ class Pyjo_Reactor_Poll(Pyjo.Reactor.Select.object):
 
         poll = self._poll()
 
+        # Wake up from other threads
+        if self._waker is None:
+            self._start_waker()
+
         # Wait for one event
         last = False
         while not last and self._running:
             # Stop automatically if there is nothing to watch
-            if not self._timers and not self._ios:
+            if self._idle():
                 return self.stop()
 
             # Calculate ideal timeout based on timers
-            times = [t['time'] for t in self._timers.values()]
-            if times:
-                timeout = min(times) - steady_time()
+            first = self._first_timer()
+            if self._pending:
+                timeout = 0
+            elif first is not None:
+                timeout = first - steady_time()
             else:
                 timeout = 0.5
 
@@ -125,27 +132,14 @@ class Pyjo_Reactor_Poll(Pyjo.Reactor.Select.object):
             elif timeout:
                 time.sleep(timeout / 1000)
 
-            # Timers (time should not change in between timers)
-            now = steady_time()
-            for tid in list(self._timers):
-                t = self._timers.get(tid)
-
-                if not t or t['time'] > now:
-                    continue
-
-                # Recurring timer
-                if 'recurring' in t:
-                    t['time'] = now + t['recurring']
-
-                # Normal timer
-                else:
-                    self.remove(tid)
+            # Timers
+            if self._expire_timers():
+                last = True
 
+            # Callbacks from other threads
+            if self._pending:
+                self._run_pending()
                 last = True
-                if t['cb']:
-                    if DEBUG:
-                        warn("-- Alarm timer[{0}] = {1}".format(tid, t))
-                    self._sandbox(t['cb'], "Timer {0}".format(tid))
 
         # Restore state if necessary
         if self._running:
@@ -165,16 +159,9 @@ class Pyjo_Reactor_Poll(Pyjo.Reactor.Select.object):
             return
 
         if isinstance(remove, str):
-            if DEBUG:
-                if remove in self._timers:
-                    warn("-- Reactor remove timer[{0}] = {1}".format(remove, self._timers[remove]))
-                else:
-                    warn("-- Reactor remove timer[{0}] = None".format(remove))
-            if remove in self._timers:
-                del self._timers[remove]
-                return True
-
-            return False
+            if remove in self._signals_ids:
+                return self._remove_signal(remove)
+            return self._remove_timer(remove)
 
         elif remove is not None:
             try:
@@ -182,6 +169,7 @@ class Pyjo_Reactor_Poll(Pyjo.Reactor.Select.object):
                 if DEBUG:
                     if fd in self._ios:
                         warn("-- Reactor remove io[{0}]".format(fd))
+                self._masks.pop(fd, None)
                 poll = self._poll()
                 if poll:
                     poll.unregister(remove)
@@ -207,28 +195,20 @@ class Pyjo_Reactor_Poll(Pyjo.Reactor.Select.object):
         Remove all handles and timers.
         """
         self._ios = {}
+        self._masks = {}
         self._select_poll = None
-        self._timers = {}
-
-    def watch(self, handle, read, write):
-        """::
-
-            reactor = reactor.watch(handle, read, write)
+        self._reset_signals()
+        self._reset_timers()
+        self._stop_waker()
 
-        Change I/O events to watch handle for with true and false values. Meant to be
-        overloaded in a subclass. Note that this method requires an active I/O
-        watcher.
-        """
+    def _modify(self, fd, old, mask):
         mode = 0
-        if read:
+        if mask & READ:
             mode |= select.POLLIN | select.POLLPRI
-        if write:
+        if mask & WRITE:
             mode |= select.POLLOUT
 
-        poll = self._poll()
-        poll.register(handle, mode)
-
-        return self
+        self._poll().register(fd, mode)
 
     def _poll(self):
         if not self._select_poll:
@@ -35,7 +35,21 @@ Pyjo.Reactor.Select - Low-level event reactor with select support
 Events
 ------
 
-:mod:`Pyjo.Reactor.Select` inherits all events from :mod:`Pyjo.Reactor.Base`.
+:mod:`Pyjo.Reactor.Select` inherits all events from :mod:`Pyjo.Reactor.Base` and
+can emit the following new ones.
+
+slow
+~~~~
+::
+
+    @reactor.on
+    def slow(reactor, name, elapsed, stack):
+        ...
+
+Emitted after an I/O or timer callback has been running for longer than
+:attr:`slow` seconds, with the qualified name of the callback, the time it took
+and a list of formatted stack entries showing where it was blocking. A warning
+is printed to ``stderr`` if this event is unhandled.
 
 Debugging
 ---------
@@ -50,23 +64,39 @@ dies with exception.
 
     PYJO_REACTOR_DIE=1
 
+You can set the ``PYJO_REACTOR_SLOW`` environment variable to get warnings about
+callbacks blocking the reactor for longer than the given number of seconds. ::
+
+    PYJO_REACTOR_SLOW=0.1
+
 Classes
 -------
 """
 
 import Pyjo.Reactor.Base
 
-from Pyjo.Util import getenv, md5_sum, rand, steady_time, warn
+from Pyjo.Util import getenv, md5_sum, notnone, rand, steady_time, warn
 
+import collections
 import errno
+import heapq
+import itertools
 import select
+import signal
 import socket
+import sys
+import threading
 import time
+import traceback
+import weakref
 
 
 DEBUG = getenv('PYJO_REACTOR_DEBUG', False)
 DIE = getenv('PYJO_REACTOR_DIE', False)
 
+READ = 1
+WRITE = 2
+
 
 class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
     """
@@ -77,14 +107,48 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
     def __init__(self, **kwargs):
         super(Pyjo_Reactor_Select, self).__init__(**kwargs)
 
+        self.slow = notnone(kwargs.get('slow'), lambda: float(getenv('PYJO_REACTOR_SLOW', 0)))
+        """::
+
+            threshold = reactor.slow
+            reactor.slow = 0.1
+
+        Maximum amount of time in seconds a callback may block the reactor before a
+        :attr:`slow` event is emitted, defaults to the value of the
+        ``PYJO_REACTOR_SLOW`` environment variable or ``0``, which disables the
+        watchdog. While enabled, a background thread takes a snapshot of the stack of
+        callbacks running for too long.
+        """
+
+        self._busy = None
+        self._lag = collections.deque(maxlen=1024)
+        self._masks = {}
+        self._pending = collections.deque()
         self._running = False
         self._select_select = None
+        self._signals = {}
+        self._signals_ids = {}
+        self._signals_wakeup = -1
+        self._stats = {'watch': 0, 'modify': 0, 'skip': 0, 'slow': 0}
+        self._waker = None
+        self._watchdog = None
         self._timers = {}
+        self._timers_queue = []
+        self._timers_seq = itertools.count()
+        self._timers_stale = 0
         self._ios = {}
 
         self._inputs = []
         self._outputs = []
 
+    def __del__(self):
+        try:
+            self._reset_signals()
+        except Exception:
+            pass
+        if self._waker:
+            self._waker.close()
+
     def again(self, tid):
         """::
 
@@ -94,6 +158,22 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
         """
         timer = self._timers[tid]
         timer['time'] = steady_time() + timer['after']
+        self._schedule(tid, timer)
+
+    def call_soon_threadsafe(self, cb):
+        """::
+
+            reactor.call_soon_threadsafe(cb)
+
+        Invoke callback as soon as possible from the thread running the reactor. This
+        method may be called from other threads, a reactor waiting for events is woken
+        up with a socket pair watched by the reactor.
+        """
+        # Queue first, so the reactor can't miss the callback
+        self._pending.append(cb)
+        waker = self._waker
+        if waker:
+            waker.wake()
 
     def io(self, cb, handle):
         """::
@@ -110,6 +190,8 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
                 warn("-- Reactor found io[{0}] = {1}".format(fd, self._ios[fd]))
         else:
             self._ios[fd] = {'cb': cb}
+            # Descriptor might have been closed and reused without removing
+            self._masks.pop(fd, None)
             if DEBUG:
                 warn("-- Reactor adding io[{0}] = {1}".format(fd, self._ios[fd]))
         return self.watch(handle, True, True)
@@ -136,17 +218,23 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
         running = self._running
         self._running = True
 
+        # Wake up from other threads
+        if self._waker is None:
+            self._start_waker()
+
         # Wait for one event
         last = False
         while not last and self._running:
             # Stop automatically if there is nothing to watch
-            if not self._timers and not self._ios:
+            if self._idle():
                 return self.stop()
 
             # Calculate ideal timeout based on timers
-            times = [t['time'] for t in self._timers.values()]
-            if times:
-                timeout = min(times) - steady_time()
+            first = self._first_timer()
+            if self._pending:
+                timeout = 0
+            elif first is not None:
+                timeout = first - steady_time()
             else:
                 timeout = 0.5
 
@@ -177,30 +265,14 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
             elif timeout:
                 time.sleep(timeout)
 
-            # Timers (time should not change in between timers)
-            now = steady_time()
-            for tid in list(self._timers):
-                if tid not in self._timers:
-                    continue
-
-                t = self._timers[tid]
-
-                if t['time'] > now:
-                    continue
-
-                # Recurring timer
-                if 'recurring' in t:
-                    t['time'] = now + t['recurring']
-
-                # Normal timer
-                else:
-                    self.remove(tid)
+            # Timers
+            if self._expire_timers():
+                last = True
 
+            # Callbacks from other threads
+            if self._pending:
+                self._run_pending()
                 last = True
-                if t['cb']:
-                    if DEBUG:
-                        warn("-- Alarm timer[{0}] = {1}".format(tid, t))
-                    self._sandbox(t['cb'], "Timer {0}".format(tid))
 
         # Restore state if necessary
         if self._running:
@@ -230,16 +302,9 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
             return
 
         if isinstance(remove, str):
-            if DEBUG:
-                if remove in self._timers:
-                    warn("-- Reactor remove timer[{0}] = {1}".format(remove, self._timers[remove]))
-                else:
-                    warn("-- Reactor remove timer[{0}] = None".format(remove))
-            if remove in self._timers:
-                del self._timers[remove]
-                return True
-
-            return False
+            if remove in self._signals_ids:
+                return self._remove_signal(remove)
+            return self._remove_timer(remove)
 
         elif remove is not None:
             try:
@@ -247,10 +312,8 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
                 if DEBUG:
                     if fd in self._ios:
                         warn("-- Reactor remove io[{0}]".format(fd))
-                if fd in self._inputs:
-                    self._inputs.remove(fd)
-                if fd in self._outputs:
-                    self._outputs.remove(fd)
+                if fd in self._masks:
+                    self._modify(fd, self._masks.pop(fd), 0)
                 if fd in self._ios:
                     del self._ios[fd]
                     return True
@@ -270,7 +333,42 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
         self._ios = {}
         self._inputs = []
         self._outputs = []
-        self._timers = {}
+        self._masks = {}
+        self._reset_signals()
+        self._reset_timers()
+        self._stop_waker()
+
+    def signal(self, cb, signum):
+        """::
+
+            sid = reactor.signal(cb, signal.SIGTERM)
+
+        Watch for signal, invoking the callback as ``cb(reactor, signum)`` from the
+        reactor whenever the signal has been received. The actual signal handler only
+        queues the callback with :meth:`call_soon_threadsafe`, which wakes up the
+        reactor immediately, so callbacks never interrupt the reactor in the middle of
+        something else. The previous signal handler is restored once all callbacks for
+        the signal have been removed with :meth:`remove`. Must be called from the main
+        thread.
+        """
+        watcher = self._signals.get(signum)
+        if watcher is None:
+            previous = self._install_signal(signum)
+            watcher = self._signals[signum] = {'cbs': {}, 'previous': previous}
+
+        sid = None
+        while True:
+            sid = md5_sum('s{0}{1}'.format(steady_time(), rand()).encode('ascii'))
+            if sid not in self._signals_ids and sid not in self._timers:
+                break
+
+        watcher['cbs'][sid] = cb
+        self._signals_ids[sid] = signum
+
+        if DEBUG:
+            warn("-- Reactor adding signal[{0}] = {1}".format(sid, signum))
+
+        return sid
 
     def start(self):
         """::
@@ -284,6 +382,41 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
         while self._running:
             self.one_tick()
 
+    @property
+    def stats(self):
+        """::
+
+            stats = reactor.stats
+
+        Counters of :meth:`watch` calls since the reactor has been created: ``watch``
+        for all calls, ``modify`` for calls which changed the events a handle is
+        watched for and ``skip`` for calls which have been skipped, because the handle
+        was already watched for the same events. ``slow`` counts callbacks which have
+        exceeded the :attr:`slow` threshold.
+
+        Loop lag, the delay between the time a timer was due and the time its callback
+        was invoked, is sampled for the last 1024 timers and published as ``lag_p50``,
+        ``lag_p99`` and ``lag_max`` in seconds. ::
+
+            # Saved registrations per second
+            before = reactor.stats['skip']
+            reactor.timer(lambda reactor: print(reactor.stats['skip'] - before), 1)
+
+            # Loop lag
+            print(reactor.stats['lag_p99'])
+        """
+        stats = dict(self._stats)
+
+        lag = sorted(self._lag)
+        if lag:
+            stats['lag_p50'] = lag[(len(lag) - 1) * 50 // 100]
+            stats['lag_p99'] = lag[(len(lag) - 1) * 99 // 100]
+            stats['lag_max'] = lag[-1]
+        else:
+            stats['lag_p50'] = stats['lag_p99'] = stats['lag_max'] = 0
+
+        return stats
+
     def stop(self):
         """::
 
@@ -308,29 +441,36 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
 
             reactor = reactor.watch(handle, read, write)
 
-        Change I/O events to watch handle for with true and false values. Meant to be
-        overloaded in a subclass. Note that this method requires an active I/O
-        watcher.
+        Change I/O events to watch handle for with true and false values. Note that
+        this method requires an active I/O watcher. Handles which are already watched
+        for the same events are not registered again.
         """
         fd = handle.fileno()
+        mask = self._mask(read, write)
+        old = self._masks.get(fd)
 
-        if read:
-            if fd not in self._inputs:
-                self._inputs.append(fd)
-        else:
-            if fd in self._inputs:
-                self._inputs.remove(fd)
+        stats = self._stats
+        stats['watch'] += 1
+        if mask == old:
+            stats['skip'] += 1
+            return self
+        stats['modify'] += 1
 
-        if write:
-            if fd not in self._outputs:
-                self._outputs.append(fd)
-        else:
-            if fd in self._outputs:
-                self._outputs.remove(fd)
+        self._modify(fd, old, mask)
+        self._masks[fd] = mask
 
         return self
 
+    def _run_pending(self):
+        # Only callbacks queued before, new ones have to wait for the next tick
+        pending = self._pending
+        for _ in range(len(pending)):
+            self._sandbox(pending.popleft(), 'Pending')
+
     def _sandbox(self, cb, event, *args):
+        if self.slow:
+            return self._sandbox_timed(cb, event, *args)
+
         if DIE:
             cb(self, *args)
         else:
@@ -339,6 +479,222 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
             except Exception as e:
                 self.emit('error', e, event)
 
+    def _sandbox_timed(self, cb, event, *args):
+        if not self._watchdog or not self._watchdog.is_alive():
+            self._watchdog = _watchdog(self)
+
+        # Nested callbacks can be invoked by one_tick
+        outer = self._busy
+        busy = self._busy = [threading.current_thread().ident, steady_time(), None]
+        try:
+            if DIE:
+                cb(self, *args)
+            else:
+                try:
+                    cb(self, *args)
+                except Exception as e:
+                    self.emit('error', e, event)
+        finally:
+            self._busy = outer
+            elapsed = steady_time() - busy[1]
+            if elapsed > self.slow:
+                self._slow(cb, elapsed, busy[2])
+
+    def _slow(self, cb, elapsed, stack):
+        self._stats['slow'] += 1
+
+        # Follow wrappers like the ones of Pyjo.IOLoop
+        while hasattr(cb, '__wrapped__'):
+            cb = cb.__wrapped__
+
+        name = getattr(cb, '__qualname__', None) or getattr(cb, '__name__', None) or repr(cb)
+        module = getattr(cb, '__module__', None)
+        if module:
+            name = '{0}.{1}'.format(module, name)
+
+        # Callback returned before the watchdog took a snapshot
+        if stack is None:
+            code = getattr(cb, '__code__', None)
+            if code:
+                stack = ['  File "{0}", line {1}, in {2}\n'.format(code.co_filename, code.co_firstlineno, code.co_name)]
+            else:
+                stack = []
+
+        if self.has_subscribers('slow'):
+            self.emit('slow', name, elapsed, stack)
+        else:
+            warn("-- Reactor slow callback {0} took {1:.3f} seconds\n{2}".format(name, elapsed, ''.join(stack)))
+
+    def _expire_timers(self):
+        # Time should not change in between timers
+        now = steady_time()
+        queue = self._timers_queue
+
+        expired = []
+        while queue and (queue[0][2] is None or queue[0][0] <= now):
+            entry = heapq.heappop(queue)
+            tid = entry[2]
+            if tid is None:
+                self._timers_stale -= 1
+                continue
+            del self._timers[tid]['entry']
+            expired.append(tid)
+
+        for tid in expired:
+            t = self._timers.get(tid)
+
+            # Removed or restarted by another timer
+            if not t or t['time'] > now:
+                continue
+
+            self._lag.append(now - t['time'])
+
+            # Recurring timer
+            if 'recurring' in t:
+                t['time'] = now + t['recurring']
+                self._schedule(tid, t)
+
+            # Normal timer
+            else:
+                self.remove(tid)
+
+            if t['cb']:
+                if DEBUG:
+                    warn("-- Alarm timer[{0}] = {1}".format(tid, t))
+                self._sandbox(t['cb'], "Timer {0}".format(tid))
+
+        return bool(expired)
+
+    def _first_timer(self):
+        queue = self._timers_queue
+        while queue and queue[0][2] is None:
+            heapq.heappop(queue)
+            self._timers_stale -= 1
+        if queue:
+            return queue[0][0]
+
+    def _idle(self):
+        # Nothing to watch but the waker
+        ios = len(self._ios)
+        if self._waker:
+            ios -= 1
+
+        return not ios and not self._timers and not self._pending
+
+    def _install_signal(self, signum):
+        # Let the C level handler wake up the reactor, no matter which thread
+        # receives the signal
+        if not self._signals:
+            if self._waker is None:
+                self._start_waker()
+            self._signals_wakeup = signal.set_wakeup_fd(self._waker.wakeup_fd())
+
+        reactor = weakref.proxy(self)
+
+        def signal_cb(reactor):
+            reactor._signal(signum)
+
+        def handler(signum, frame):
+            try:
+                reactor.call_soon_threadsafe(signal_cb)
+            except ReferenceError:
+                pass
+
+        return signal.signal(signum, handler)
+
+    def _mask(self, read, write):
+        return (READ if read else 0) | (WRITE if write else 0)
+
+    def _modify(self, fd, old, mask):
+        # Meant to be overloaded in a subclass
+        if old is None:
+            # Descriptor might have been closed and reused without removing
+            old = self._mask(fd in self._inputs, fd in self._outputs)
+
+        if mask & READ and not old & READ:
+            self._inputs.append(fd)
+        elif not mask & READ and old & READ:
+            self._inputs.remove(fd)
+
+        if mask & WRITE and not old & WRITE:
+            self._outputs.append(fd)
+        elif not mask & WRITE and old & WRITE:
+            self._outputs.remove(fd)
+
+    def _remove_signal(self, sid):
+        if DEBUG:
+            warn("-- Reactor remove signal[{0}]".format(sid))
+
+        signum = self._signals_ids.pop(sid, None)
+        if signum is None:
+            return False
+
+        watcher = self._signals[signum]
+        del watcher['cbs'][sid]
+        if not watcher['cbs']:
+            del self._signals[signum]
+            self._uninstall_signal(signum, watcher['previous'])
+
+        return True
+
+    def _remove_timer(self, tid):
+        if DEBUG:
+            if tid in self._timers:
+                warn("-- Reactor remove timer[{0}] = {1}".format(tid, self._timers[tid]))
+            else:
+                warn("-- Reactor remove timer[{0}] = None".format(tid))
+
+        if tid not in self._timers:
+            return False
+
+        entry = self._timers.pop(tid).pop('entry', None)
+        if entry:
+            self._unschedule(entry)
+        return True
+
+    def _reset_signals(self):
+        for sid in list(self._signals_ids):
+            self._remove_signal(sid)
+
+    def _reset_timers(self):
+        self._timers = {}
+        self._timers_queue = []
+        self._timers_stale = 0
+
+    def _schedule(self, tid, timer):
+        entry = timer.get('entry')
+        if entry:
+            self._unschedule(entry)
+
+        entry = timer['entry'] = [timer['time'], next(self._timers_seq), tid]
+        heapq.heappush(self._timers_queue, entry)
+
+    def _signal(self, signum):
+        watcher = self._signals.get(signum)
+        if watcher:
+            for cb in list(watcher['cbs'].values()):
+                self._sandbox(cb, "Signal {0}".format(signum), signum)
+
+    def _start_waker(self):
+        waker = self._waker = _Waker()
+
+        def wakeup_cb(reactor, write):
+            waker.drain()
+
+        # Register directly, not to show up in statistics
+        fd = waker.fileno()
+        mask = self._mask(True, False)
+        self._ios[fd] = {'cb': wakeup_cb}
+        self._modify(fd, None, mask)
+        self._masks[fd] = mask
+
+    def _stop_waker(self):
+        waker = self._waker
+        if waker:
+            self._waker = None
+            waker.close()
+        self._pending.clear()
+
     def _timer(self, cb, recurring, after):
         tid = None
         while True:
@@ -350,12 +706,95 @@ class Pyjo_Reactor_Select(Pyjo.Reactor.Base.object):
         if recurring:
             timer['recurring'] = after
         self._timers[tid] = timer
+        self._schedule(tid, timer)
 
         if DEBUG:
             warn("-- Reactor adding timer[{0}] = {1}".format(tid, self._timers[tid]))
 
         return tid
 
+    def _uninstall_signal(self, signum, previous):
+        signal.signal(signum, previous)
+        if not self._signals:
+            signal.set_wakeup_fd(self._signals_wakeup)
+
+    def _unschedule(self, entry):
+        # Lazy removal, rebuild the queue once most of it is stale
+        entry[2] = None
+        self._timers_stale += 1
+        queue = self._timers_queue
+        if self._timers_stale > 64 and self._timers_stale * 2 > len(queue):
+            queue[:] = [e for e in queue if e[2] is not None]
+            heapq.heapify(queue)
+            self._timers_stale = 0
+
+
+class _Waker(object):
+    # Readable handle to wake up a reactor from other threads and signal handlers
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+
+    def close(self):
+        with self._lock:
+            if self._reader:
+                self._reader.close()
+                self._writer.close()
+                self._reader = self._writer = None
+
+    def drain(self):
+        try:
+            while self._reader.recv(4096):
+                pass
+        except (IOError, OSError, socket.error):
+            pass
+
+    def fileno(self):
+        return self._reader.fileno()
+
+    def wake(self):
+        # Fails only if the reactor is already awake, signal handlers can interrupt
+        # the lock holder in the same thread
+        with self._lock:
+            try:
+                if self._writer:
+                    self._writer.send(b'\0')
+            except (IOError, OSError, socket.error):
+                pass
+
+    def wakeup_fd(self):
+        return self._writer.fileno()
+
+
+def _watchdog(reactor):
+    reactor = weakref.ref(reactor)
+
+    def watchdog():
+        while True:
+            r = reactor()
+            if r is None or not r.slow:
+                return
+
+            # Snapshot the stack of a callback while it is still blocking
+            busy = r._busy
+            interval = r.slow / 2
+            if busy and busy[2] is None and steady_time() - busy[1] > r.slow:
+                frame = sys._current_frames().get(busy[0])
+                if frame is not None and r._busy is busy:
+                    busy[2] = traceback.format_stack(frame)
+
+            del r, busy
+            time.sleep(interval)
+
+    thread = threading.Thread(target=watchdog, name='Pyjo.Reactor watchdog')
+    thread.daemon = True
+    thread.start()
+
+    return thread
+
 
 new = Pyjo_Reactor_Select.new
 object = Pyjo_Reactor_Select
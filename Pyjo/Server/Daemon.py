@@ -63,8 +63,10 @@ import Pyjo.IOLoop
 import Pyjo.Server.Base
 import Pyjo.URL
 
+import os
 import platform
 import signal
+import socket
 import weakref
 
 from Pyjo.Util import convert, getenv, notnone, warn
@@ -100,6 +102,17 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
         Listen backlog size, defaults to ``SOMAXCONN``.
         """
 
+        self.fast_parse = notnone(kwargs.get('fast_parse'), lambda: bool(getenv('PYJO_FAST_PARSE')))
+        """::
+
+            boolean = daemon.fast_parse
+            daemon.fast_parse = boolean
+
+        Parse request-lines and headers that arrive together in a single pass, see
+        :attr:`Pyjo.Message.Request.fast_parse`, defaults to the value of the
+        ``PYJO_FAST_PARSE`` environment variable or a false value.
+        """
+
         self.inactivity_timeout = notnone(kwargs.get('inactivity_timeout'), lambda: convert(getenv('PYJO_INACTIVITY_TIMEOUT'), int, 15))
         """::
 
@@ -156,6 +169,9 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
             # Or even a custom certificate authority
             daemon.listen = ['https://*:3000?cert=/x/server.crt&key=/y/server.key&ca=/z/ca.crt']
 
+            # Use an already prepared listen socket
+            daemon.listen = ['http://*:3000?fd=3']
+
         These parameters are currently available:
 
         ``ca``
@@ -179,6 +195,16 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
 
             Cipher specification string.
 
+        ``fd``
+            ::
+
+                fd=3
+
+            File descriptor with an already prepared listen socket. Sockets passed
+            along with the ``LISTEN_FDS`` environment variable, like systemd does for
+            socket activated services, are picked up automatically if their port and
+            address match.
+
         ``key``
             ::
 
@@ -256,23 +282,29 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
 
         Run server.
         """
-        # Make sure the event loop can be stopped in regular intervals
-        loop = weakref.proxy(self.ioloop)
+        # Signals wake up the event loop immediately
+        loop = self.ioloop
 
-        def ticker_cb(loop):
-            pass
+        def signal_cb(loop, signum):
+            loop.stop()
 
-        ticker = loop.recurring(ticker_cb, 1)
+        sids = [loop.signal(signal_cb, sig) for sig in (signal.SIGINT, signal.SIGTERM)]
 
-        def signal_cb(signal, frame):
-            if dir(loop):
-                loop.stop()
+        # Log callbacks blocking the event loop
+        daemon = weakref.proxy(self)
+
+        def slow_cb(reactor, name, elapsed, stack):
+            if dir(daemon):
+                daemon.app.log.warn('Callback {0} blocked the event loop for {1:.3f} seconds'.format(name, elapsed),
+                                    *[line.rstrip() for line in stack])
 
-        for sig in signal.SIGINT, signal.SIGTERM:
-            signal.signal(sig, signal_cb)
+        reactor = self.ioloop.reactor
+        reactor.on(slow_cb, 'slow')
 
         self.start().ioloop.start()
-        loop.remove(ticker)
+        for sid in sids:
+            loop.remove(sid)
+        reactor.unsubscribe('slow', slow_cb)
 
     def start(self):
         """::
@@ -322,6 +354,7 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
     def _build_tx(self, cid, c):
         tx = self.build_tx()
         tx.connection = cid
+        tx.req.fast_parse = self.fast_parse
         tx.res.headers.server = 'Pyjoyment ({0})'.format(platform.python_implementation())
         handle = self.ioloop.stream(cid).handle
         tx.local_address, tx.local_port = handle.getsockname()
@@ -361,12 +394,23 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
         if not c:
             return
 
+        self._drained(cid)
         tx = c.get('tx', None)
         if tx:
             tx.server_close()
         del self._connections[cid]
 
-    def _finish(self, cid):
+    def _drained(self, cid):
+        # Responses have been written
+        c = self._connections.get(cid, None)
+        if not c:
+            return
+        finished = c.pop('finished', None)
+        if finished:
+            for tx in finished:
+                tx.server_close()
+
+    def _finish(self, cid, written=True):
         # Always remove connection for WebSockets
         c = self._connections[cid]
         tx = c.get('tx', None)
@@ -376,8 +420,20 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
         if tx.is_websocket:
             self._remove(cid)
 
-        # Finish transaction
-        tx.server_close()
+        # Finish transaction (once the response has been written if anybody is waiting for it)
+        if written or not tx.has_subscribers('finish'):
+            tx.server_close()
+        else:
+            finished = c.setdefault('finished', [])
+            finished.append(tx)
+            if len(finished) == 1:
+                daemon = weakref.proxy(self)
+
+                def drain_cb(stream):
+                    if dir(daemon):
+                        daemon._drained(cid)
+
+                self.ioloop.stream(cid).write(b'', drain_cb)
 
         # Upgrade connection to WebSocket
         ws = c['tx'] = c.get('ws', None)
@@ -409,28 +465,19 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
         tx = c['tx'] = self._build_tx(cid, c)
         tx.server_read(leftovers)
 
+        # Last keep-alive request or corrupted connection
+        if c.get('requests', 0) >= self.max_requests or tx.req.error:
+            tx.res.headers.connection = 'close'
+
+    def _is_pipelined(self, c, tx):
+        # More requests have already been received on a connection that stays open
+        req = tx.req
+        return not (tx.is_websocket or c.get('ws') or req.error or not tx.keep_alive) and \
+            bool(len(req.content.leftovers))
+
     def _listen(self, listen):
-        url = Pyjo.URL.new(listen)
-        query = url.query
-        options = {
-            'address': url.host,
-            'backlog': self.backlog,
-            'reuse': query.param('reuse'),
-        }
-        port = url.port
-        if port:
-            options['port'] = port
-        for param in 'ca', 'cert', 'ciphers', 'key':
-            options['tls_' + param] = query.param(param)
-        verify = query.param('verify')
-        if verify is not None:
-            if verify.startswith('0x'):
-                options['tls_verify'] = int(verify, 16)
-            else:
-                options['tls_verify'] = int(verify)
-        if options['address'] == '*':
-            del options['address']
-        tls = options['tls'] = url.protocol == 'https'
+        url, options = self._listen_options(listen)
+        tls = options['tls']
 
         daemon = weakref.proxy(self)
 
@@ -441,6 +488,7 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
                 if DEBUG:
                     warn("-- Accept {0} {1}\n".format(cid, stream.handle.getpeername()))
                 stream.timeout = daemon.inactivity_timeout
+                stream.zero_copy = True
 
                 def close_cb(stream):
                     if daemon and dir(daemon):
@@ -468,15 +516,78 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
                 stream.on(timeout_cb, 'timeout')
 
         self.acceptors.append(server)
+        self._listening(url)
 
+    def _listening(self, url):
         if self.silent:
             return
         self.app.log.info('Listening at "{0}"'.format(url))
-        query.pairs = []
+        url.query.pairs = []
         if url.host == '*':
             url.host = '127.0.0.1'
         print("Server available at {0}".format(url))
 
+    def _listen_fd(self, url):
+        # Socket activation (sd_listen_fds)
+        fds = convert(getenv('LISTEN_FDS'), int, 0)
+        if not fds:
+            return None
+        pid = convert(getenv('LISTEN_PID'), int)
+        if pid is not None and pid != os.getpid():
+            return None
+
+        host = url.host
+        for fd in range(3, 3 + fds):
+            try:
+                handle = socket.fromfd(fd, socket.AF_INET, socket.SOCK_STREAM)
+            except (OSError, socket.error):
+                continue
+            try:
+                address, port = handle.getsockname()[:2]
+            except (OSError, socket.error):
+                continue
+            finally:
+                handle.close()
+            if port == url.port and host in ('*', address):
+                return fd
+
+        return None
+
+    def _listen_options(self, listen):
+        url = Pyjo.URL.new(listen)
+        query = url.query
+        options = {
+            'address': url.host,
+            'backlog': self.backlog,
+            'reuse': query.param('reuse'),
+        }
+        port = url.port
+        if port:
+            options['port'] = port
+
+        # Socket passed along by the service manager
+        fd = query.param('fd')
+        if fd is not None:
+            options['fd'] = int(fd)
+        else:
+            fd = self._listen_fd(url)
+            if fd is not None:
+                options['fd'] = fd
+
+        for param in 'ca', 'cert', 'ciphers', 'key':
+            options['tls_' + param] = query.param(param)
+        verify = query.param('verify')
+        if verify is not None:
+            if verify.startswith('0x'):
+                options['tls_verify'] = int(verify, 16)
+            else:
+                options['tls_verify'] = int(verify)
+        if options['address'] == '*':
+            del options['address']
+        options['tls'] = url.protocol == 'https'
+
+        return url, options
+
     def _read(self, cid, chunk):
         # Make sure we have a transaction and parse chunk
         c = self._connections[cid]
@@ -487,7 +598,7 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
             c['tx'] = self._build_tx(cid, c)
         tx = c['tx']
         if DEBUG:
-            warn("-- Server <<< Client ({0})\n{1}\n".format(self._url(tx), repr(chunk)))
+            warn("-- Server <<< Client ({0})\n{1}\n".format(self._url(tx), repr(chunk.tobytes())))
         tx.server_read(chunk)
 
         # Last keep-alive request or corrupted connection
@@ -508,43 +619,66 @@ class Pyjo_Server_Daemon(Pyjo.Server.Base.object):
         return tx.req.url.to_abs()
 
     def _write(self, cid):
-        # Get chunk and write
-        c = self._connections.get(cid, None)
-        if not c:
-            return
-        tx = c.get('tx', None)
-        if not tx:
-            return
-
-        if not tx.is_writing or c.get('writing', False):
-            return
-        c['writing'] = True
-        chunk = tx.server_write()
-        c['writing'] = False
-        if DEBUG:
-            warn("-- Server >>> Client ({0})\n{1}\n".format(self._url(tx), repr(chunk)))
-        stream = self.ioloop.stream(cid).write(chunk)
-
-        # Finish or continue writing
         daemon = weakref.proxy(self)
 
         def write_cb(stream):
             if dir(daemon):
                 return daemon._write(cid)
 
-        cb = write_cb
-
-        if tx.is_finished:
-            if tx.has_subscribers('finish'):
+        # Answer all pipelined requests in one pass, their responses get queued in
+        # order and go out together with the next write
+        first = True
+        while True:
+            c = self._connections.get(cid, None)
+            if not c:
+                return
+            tx = c.get('tx', None)
+            if not tx:
+                return
+
+            if not tx.is_writing or c.get('writing', False):
+                return
+
+            # Wait for the client to catch up
+            stream = self.ioloop.stream(cid)
+            if stream.is_full:
+                return None if first else stream.once(write_cb, 'resume')
+            first = False
+
+            # Keep writing until the stream is full
+            while True:
+                c['writing'] = True
+                chunks = tx.server_write(sendfile=True)
+                c['writing'] = False
+                if DEBUG:
+                    warn("-- Server >>> Client ({0})\n{1}\n".format(self._url(tx), repr(chunks)))
+
+                # Parts of files are sent without reading them
+                if not isinstance(chunks, list):
+                    chunks = [chunks]
+                for chunk in chunks:
+                    stream.write(chunk)
+
+                if not any(map(len, chunks)) or stream.is_full or not tx.is_writing:
+                    break
+
+            # Continue writing
+            if not tx.is_finished:
+                if stream.is_full:
+                    return stream.once(write_cb, 'resume')
+                return stream.write(b'', write_cb)
+
+            # Finish once written if somebody is waiting for it and there is nothing
+            # else to answer
+            if tx.has_subscribers('finish') and not self._is_pipelined(c, tx):
                 def finish_cb(stream):
-                    return daemon._finish(cid)
+                    if dir(daemon):
+                        return daemon._finish(cid)
 
-                cb = finish_cb
-            else:
-                self._finish(cid)
-                if not c.get('tx', None):
-                    return
-        stream.write(b'', cb)
+                return stream.write(b'', finish_cb)
+
+            # Finish and continue with the next pipelined request
+            self._finish(cid, False)
 
 
 new = Pyjo_Server_Daemon.new
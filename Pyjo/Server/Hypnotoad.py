@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pyjo.Server.Hypnotoad - Pre-forking server with zero downtime deployment
+========================================================================
+::
+
+    # myapp.py
+    import Pyjo.Server.Hypnotoad
+
+    hypnotoad = Pyjo.Server.Hypnotoad.new()
+    hypnotoad.prefork.listen = ['http://*:8080']
+    hypnotoad.prefork.workers = 8
+    hypnotoad.run()
+
+:mod:`Pyjo.Server.Hypnotoad` is a full featured, UNIX optimized, pre-forking
+non-blocking I/O HTTP and WebSocket server, built around the very well tested
+and reliable :mod:`Pyjo.Server.Prefork`, with IPv6, TLS, Comet (long polling),
+keep-alive, multiple event loop and hot deployment support.
+
+To start the server run the script. It will daemonize itself, unless the
+``PYJO_HYPNOTOAD_FOREGROUND`` environment variable is set. ::
+
+    $ python myapp.py
+    Server available at http://127.0.0.1:8080
+
+You can run the same command again for automatic hot deployment. ::
+
+    $ python myapp.py
+    Starting hot deployment for Hypnotoad server 31841.
+
+This second invocation will load the application again, detect the process id
+file with it, and send a ``USR2`` signal to the already running server.
+
+Hot deployment
+--------------
+
+On ``USR2`` the manager process forks and executes the same script with the
+same arguments again. The listen sockets stay open across :func:`os.execv` and
+are inherited through the ``PYJO_REUSE`` environment variable, so no connection
+gets refused while both servers are running. Once all workers of the new server
+have sent a heartbeat, the old manager gets a ``QUIT`` signal and lets its
+workers finish all requests in progress. If the new server fails to start, or
+takes longer than :attr:`Pyjo_Server_Hypnotoad.upgrade_timeout`, the old one
+just keeps running.
+
+Manager signals
+---------------
+
+The :mod:`Pyjo.Server.Hypnotoad` manager process can be controlled at runtime
+with the following signals.
+
+INT, TERM
+~~~~~~~~~
+
+Shut down server immediately.
+
+QUIT
+~~~~
+
+Shut down server gracefully.
+
+TTIN
+~~~~
+
+Increase worker pool by one.
+
+TTOU
+~~~~
+
+Decrease worker pool by one.
+
+USR2
+~~~~
+
+Attempt zero downtime software upgrade (hot deployment) without losing any
+incoming connections.
+
+Worker signals
+--------------
+
+:mod:`Pyjo.Server.Hypnotoad` worker processes can be controlled at runtime with
+the following signals.
+
+QUIT
+~~~~
+
+Stop worker gracefully.
+
+Classes
+-------
+"""
+
+import Pyjo.Base
+import Pyjo.Server.Prefork
+
+import fcntl
+import os
+import signal
+import sys
+
+from Pyjo.Util import convert, getenv, notnone, setenv, steady_time
+
+
+class Pyjo_Server_Hypnotoad(Pyjo.Base.object):
+    """
+    :mod:`Pyjo.Server.Hypnotoad` inherits all attributes and methods from
+    :mod:`Pyjo.Base` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        self.prefork = notnone(kwargs.get('prefork'), lambda: Pyjo.Server.Prefork.new(listen=['http://*:8080']))
+        """::
+
+            prefork = hypnotoad.prefork
+            hypnotoad.prefork = Pyjo.Server.Prefork.new()
+
+        :mod:`Pyjo.Server.Prefork` object this server manages, listening on
+        ``http://*:8080`` by default.
+        """
+
+        self.upgrade_timeout = kwargs.get('upgrade_timeout', 60)
+        """::
+
+            timeout = hypnotoad.upgrade_timeout
+            hypnotoad.upgrade_timeout = 15
+
+        Maximum amount of time in seconds a zero downtime software upgrade may take
+        before getting canceled, defaults to ``60``.
+        """
+
+        self._finished = False
+        self._new = None
+        self._upgrade = None
+
+    def run(self):
+        """::
+
+            hypnotoad.run()
+
+        Run server, or hot deploy a new version if it is already running.
+        """
+        # Remember how to start again
+        rev = convert(getenv('PYJO_HYPNOTOAD_REV'), int, 0) + 1
+        setenv('PYJO_HYPNOTOAD_REV', str(rev))
+        if not getenv('PYJO_HYPNOTOAD_EXE'):
+            setenv('PYJO_HYPNOTOAD_EXE', os.path.abspath(sys.argv[0]))
+
+        # Clean start (check for existing process)
+        prefork = self.prefork
+        if not getenv('PYJO_HYPNOTOAD_PID'):
+            pid = prefork.check_pid()
+            if pid:
+                print('Starting hot deployment for Hypnotoad server {0}.'.format(pid))
+                os.kill(pid, signal.SIGUSR2)
+                return
+
+        # Daemonize as early as possible (but not for restarts)
+        if not getenv('PYJO_HYPNOTOAD_FOREGROUND') and rev < 2:
+            prefork.daemonize()
+
+        # Clean manager environment
+        def usr2_cb(signum, frame):
+            if self._upgrade is None:
+                self._upgrade = steady_time()
+
+        old = signal.signal(signal.SIGUSR2, usr2_cb)
+        self._finished = False
+        self._new = self._upgrade = None
+
+        def finish_cb(prefork, graceful):
+            self._finished = True
+
+        def reap_cb(prefork, pid):
+            if pid == self._new:
+                prefork.app.log.error('Zero downtime software upgrade failed')
+                self._new = self._upgrade = None
+
+        def wait_cb(prefork):
+            self._manage()
+
+        prefork.on(finish_cb, 'finish')
+        prefork.on(reap_cb, 'reap')
+        prefork.on(wait_cb, 'wait')
+        try:
+            prefork.cleanup = True
+            prefork.run()
+        finally:
+            signal.signal(signal.SIGUSR2, old)
+            prefork.unsubscribe('finish', finish_cb).unsubscribe('reap', reap_cb).unsubscribe('wait', wait_cb)
+
+    def _exec(self):
+        # Listen sockets need to survive exec
+        try:
+            fds = [convert(reuse.rpartition(':')[2], int) for reuse in (getenv('PYJO_REUSE') or '').split(',')]
+            listen_fds = convert(getenv('LISTEN_FDS'), int, 0)
+            if listen_fds:
+                fds.extend(range(3, 3 + listen_fds))
+                setenv('LISTEN_PID', str(os.getpid()))
+            for fd in fds:
+                if fd is not None:
+                    try:
+                        _set_inheritable(fd)
+                    except (IOError, OSError):
+                        pass
+            exe = getenv('PYJO_HYPNOTOAD_EXE')
+            os.execv(sys.executable, [sys.executable, exe] + sys.argv[1:])
+        finally:
+            os._exit(1)
+
+    def _manage(self):
+        prefork = self.prefork
+        log = prefork.app.log
+
+        # Upgraded (wait for all workers to send a heartbeat)
+        pid = os.getpid()
+        old = convert(getenv('PYJO_HYPNOTOAD_PID'), int)
+        if old and old != pid:
+            if prefork.healthy < prefork.workers:
+                return
+            log.info('Upgrade successful, stopping {0}'.format(old))
+            try:
+                os.kill(old, signal.SIGQUIT)
+            except OSError:
+                pass
+        if old != pid:
+            setenv('PYJO_HYPNOTOAD_PID', str(pid))
+
+        # Upgrade
+        if self._upgrade is None or self._finished:
+            return
+
+        # Fresh start
+        ut = self.upgrade_timeout
+        if not self._new:
+            log.info('Starting zero downtime software upgrade ({0} seconds)'.format(ut))
+            self._new = os.fork()
+            if not self._new:
+                self._exec()
+
+        # Timeout
+        if self._upgrade + ut <= steady_time():
+            try:
+                os.kill(self._new, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+def _set_inheritable(fd):
+    # os.set_inheritable requires Python 3.4
+    set_inheritable = getattr(os, 'set_inheritable', None)
+    if set_inheritable:
+        return set_inheritable(fd, True)
+    flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+    fcntl.fcntl(fd, fcntl.F_SETFD, flags & ~fcntl.FD_CLOEXEC)
+
+
+new = Pyjo_Server_Hypnotoad.new
+object = Pyjo_Server_Hypnotoad
@@ -0,0 +1,790 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pyjo.Server.Prefork - Pre-forking non-blocking I/O HTTP and WebSocket server
+============================================================================
+::
+
+    import Pyjo.Server.Prefork
+    from Pyjo.Util import b
+
+    prefork = Pyjo.Server.Prefork.new(listen=['http://*:8080'])
+    prefork.unsubscribe('request')
+
+    @prefork.on
+    def request(prefork, tx):
+        # Request
+        method = tx.req.method
+        path = tx.req.url.path
+
+        # Response
+        tx.res.code = 200
+        tx.res.headers.content_type = 'text/plain'
+        tx.res.body = b("{0} request for {1}!".format(method, path))
+
+        # Resume transaction
+        tx.resume()
+
+    prefork.run()
+
+:mod:`Pyjo.Server.Prefork` is a full featured, UNIX optimized, pre-forking
+non-blocking I/O HTTP and WebSocket server, built around the very well tested
+and reliable :mod:`Pyjo.Server.Daemon`, with IPv6, TLS, Comet (long polling),
+keep-alive and multiple event loop support.
+
+A manager process opens the listen sockets and forks :attr:`Pyjo_Server_Prefork.workers`
+worker processes, which all accept connections on the same sockets with their
+own :mod:`Pyjo.IOLoop`, so one server can use all cores of a machine. Workers
+report to the manager with heartbeat messages and get replaced once they stop,
+which they do gracefully after :attr:`Pyjo_Server_Prefork.accepts` connections
+or when they use more than :attr:`Pyjo_Server_Prefork.max_memory` bytes.
+
+Preforking requires :func:`os.fork` and is not available on Windows.
+
+Autoscaling
+-----------
+
+With :attr:`Pyjo_Server_Prefork.max_workers` the number of workers adapts to the
+load, between :attr:`Pyjo_Server_Prefork.min_workers` and
+:attr:`Pyjo_Server_Prefork.max_workers`. Every heartbeat message also reports
+how busy the event loop of the worker has been since the last one, how many
+connections it has open and how long its requests took on average. At most
+once per :attr:`Pyjo_Server_Prefork.scale_interval` the manager starts one more
+worker if the pool is above :attr:`Pyjo_Server_Prefork.target_utilization`, or
+stops one gracefully if the remaining workers would stay below it. ::
+
+    # Between 2 and 16 workers
+    prefork = Pyjo.Server.Prefork.new(workers=2, min_workers=2, max_workers=16)
+
+Manager signals
+---------------
+
+The :mod:`Pyjo.Server.Prefork` manager process can be controlled at runtime with
+the following signals.
+
+INT, TERM
+~~~~~~~~~
+
+Shut down server immediately.
+
+QUIT
+~~~~
+
+Shut down server gracefully.
+
+TTIN
+~~~~
+
+Increase worker pool by one.
+
+TTOU
+~~~~
+
+Decrease worker pool by one.
+
+Worker signals
+--------------
+
+:mod:`Pyjo.Server.Prefork` worker processes can be controlled at runtime with the
+following signals.
+
+QUIT
+~~~~
+
+Stop worker gracefully.
+
+Events
+------
+
+:mod:`Pyjo.Server.Prefork` inherits all events from :mod:`Pyjo.Server.Daemon` and
+can emit the following new ones.
+
+finish
+~~~~~~
+::
+
+    @prefork.on
+    def finish(prefork, graceful):
+        print('Graceful server shutdown' if graceful else 'Server shutdown')
+
+Emitted when the server shuts down.
+
+heartbeat
+~~~~~~~~~
+::
+
+    @prefork.on
+    def heartbeat(prefork, pid):
+        ...
+
+Emitted when a heartbeat message has been received from a worker.
+
+reap
+~~~~
+::
+
+    @prefork.on
+    def reap(prefork, pid):
+        print('Worker {0} stopped'.format(pid))
+
+Emitted in the manager process when a child process exited.
+
+spawn
+~~~~~
+::
+
+    @prefork.on
+    def spawn(prefork, pid):
+        print('Worker {0} started'.format(pid))
+
+Emitted when a worker process is spawned.
+
+wait
+~~~~
+::
+
+    @prefork.on
+    def wait(prefork):
+        print('Waiting for heartbeat messages')
+
+Emitted when the manager starts waiting for new heartbeat messages.
+
+Debugging
+---------
+
+You can set the ``PYJO_PREFORK_DEBUG`` environment variable to get some advanced
+diagnostics information printed to :attr:`sys.stderr`. ::
+
+    PYJO_PREFORK_DEBUG=1
+
+Classes
+-------
+"""
+
+import Pyjo.IOLoop.Server
+import Pyjo.Server.Daemon
+
+import errno
+import os
+import random
+import re
+import select
+import signal
+import tempfile
+
+from Pyjo.Util import getenv, steady_time, warn
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+DEBUG = getenv('PYJO_PREFORK_DEBUG', False)
+
+re_heartbeat = re.compile(r'(\d+):(\d)(?::([\d.]+):(\d+):([\d.]+))?\n')
+
+
+class Pyjo_Server_Prefork(Pyjo.Server.Daemon.object):
+    """
+    :mod:`Pyjo.Server.Prefork` inherits all attributes and methods from
+    :mod:`Pyjo.Server.Daemon` and implements the following new ones.
+    """
+
+    def __init__(self, **kwargs):
+        super(Pyjo_Server_Prefork, self).__init__(**kwargs)
+
+        self.accepts = kwargs.get('accepts', 10000)
+        """::
+
+            accepts = prefork.accepts
+            prefork.accepts = 100
+
+        Maximum number of connections a worker is allowed to accept, before stopping
+        gracefully and then getting replaced with a newly started worker, passed along
+        to :attr:`Pyjo.IOLoop.max_accepts`, defaults to ``10000``. Setting the value to
+        ``0`` will allow workers to accept new connections indefinitely. Note that up
+        to half of this value can be subtracted randomly to improve load balancing.
+        """
+
+        self.cleanup = kwargs.get('cleanup', True)
+        """::
+
+            boolean = prefork.cleanup
+            prefork.cleanup = boolean
+
+        Delete :attr:`pid_file` automatically once it is not needed anymore, defaults
+        to ``True``.
+        """
+
+        self.graceful_timeout = kwargs.get('graceful_timeout', 20)
+        """::
+
+            timeout = prefork.graceful_timeout
+            prefork.graceful_timeout = 15
+
+        Maximum amount of time in seconds stopping a worker gracefully may take before
+        being forced, defaults to ``20``.
+        """
+
+        self.heartbeat_interval = kwargs.get('heartbeat_interval', 5)
+        """::
+
+            interval = prefork.heartbeat_interval
+            prefork.heartbeat_interval = 2
+
+        Heartbeat interval in seconds, defaults to ``5``.
+        """
+
+        self.heartbeat_timeout = kwargs.get('heartbeat_timeout', 20)
+        """::
+
+            timeout = prefork.heartbeat_timeout
+            prefork.heartbeat_timeout = 2
+
+        Maximum amount of time in seconds before a worker without a heartbeat will be
+        stopped gracefully, defaults to ``20``. Note that this value should usually be
+        a little larger than the maximum amount of time you expect any one operation
+        to block the event loop.
+        """
+
+        self.max_latency = kwargs.get('max_latency', 0)
+        """::
+
+            latency = prefork.max_latency
+            prefork.max_latency = 0.5
+
+        Average request latency in seconds above which more workers get started if
+        autoscaling is enabled, defaults to ``0``. Setting the value to ``0`` disables
+        the check.
+        """
+
+        self.max_memory = kwargs.get('max_memory', 0)
+        """::
+
+            size = prefork.max_memory
+            prefork.max_memory = 512 * 1024 * 1024
+
+        Maximum resident memory size in bytes a worker is allowed to grow to, before
+        stopping gracefully and then getting replaced with a newly started worker,
+        checked with every heartbeat, defaults to ``0``. Setting the value to ``0``
+        disables the check.
+        """
+
+        self.max_workers = kwargs.get('max_workers', 0)
+        """::
+
+            workers = prefork.max_workers
+            prefork.max_workers = 16
+
+        Maximum number of worker processes autoscaling may grow :attr:`workers` to,
+        defaults to ``0``. Setting the value to ``0`` disables autoscaling.
+        """
+
+        self.min_workers = kwargs.get('min_workers', 1)
+        """::
+
+            workers = prefork.min_workers
+            prefork.min_workers = 2
+
+        Minimum number of worker processes autoscaling may shrink :attr:`workers` to,
+        defaults to ``1``.
+        """
+
+        self.pid_file = kwargs.get('pid_file', os.path.join(tempfile.gettempdir(), 'prefork.pid'))
+        """::
+
+            file = prefork.pid_file
+            prefork.pid_file = '/tmp/prefork.pid'
+
+        Full path of process id file, defaults to ``prefork.pid`` in a temporary
+        directory.
+        """
+
+        self.scale_interval = kwargs.get('scale_interval', 10)
+        """::
+
+            interval = prefork.scale_interval
+            prefork.scale_interval = 30
+
+        Minimum amount of time in seconds between two autoscaling decisions, defaults
+        to ``10``. Note that this value should usually be a few times larger than
+        :attr:`heartbeat_interval`.
+        """
+
+        self.spare = kwargs.get('spare', 2)
+        """::
+
+            spare = prefork.spare
+            prefork.spare = 4
+
+        Temporarily spawn up to this number of additional workers if there is a need,
+        defaults to ``2``. This allows for new workers to be started while old ones are
+        still shutting down gracefully, drastically reducing the performance cost of
+        worker restarts.
+        """
+
+        self.target_utilization = kwargs.get('target_utilization', 0.7)
+        """::
+
+            utilization = prefork.target_utilization
+            prefork.target_utilization = 0.5
+
+        Share of time the event loops of all workers should be busy on average, and
+        share of :attr:`Pyjo.IOLoop.max_connections` they should have open, if
+        autoscaling is enabled, defaults to ``0.7``.
+        """
+
+        self.workers = kwargs.get('workers', 4)
+        """::
+
+            workers = prefork.workers
+            prefork.workers = 10
+
+        Number of worker processes, defaults to ``4``. A good rule of thumb is two
+        worker processes per CPU core for applications that perform mostly
+        non-blocking operations, blocking operations often require more and benefit
+        from decreasing concurrency with :attr:`max_clients` (often as low as ``1``).
+        With autoscaling this is the initial number of worker processes and gets
+        changed by the manager.
+        """
+
+        self._finished = False
+        self._graceful = False
+        self._manager = None
+        self._pool = {}
+        self._reader = None
+        self._running = False
+        self._scaled = 0
+        self._sockets = []
+        self._stats = None
+        self._writer = None
+
+    def check_pid(self):
+        """::
+
+            pid = prefork.check_pid()
+
+        Get process id for running server from :attr:`pid_file` or delete it if
+        server is not running. ::
+
+            print('Server is not running' if prefork.check_pid() is None else 'Server is running')
+        """
+        try:
+            with open(self.pid_file) as f:
+                pid = int(f.read().strip() or 0)
+        except (IOError, OSError, ValueError):
+            return None
+
+        # Running
+        if pid:
+            try:
+                os.kill(pid, 0)
+                return pid
+            except OSError as e:
+                if e.errno == errno.EPERM:
+                    return pid
+
+        # Not running
+        try:
+            os.unlink(self.pid_file)
+        except OSError:
+            pass
+        return None
+
+    def ensure_pid_file(self, pid):
+        """::
+
+            prefork.ensure_pid_file(pid)
+
+        Ensure :attr:`pid_file` exists.
+        """
+        # Check if PID file already exists
+        pid_file = self.pid_file
+        if os.path.exists(pid_file):
+            return
+
+        # Create PID file
+        try:
+            fd = os.open(pid_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            with os.fdopen(fd, 'w') as f:
+                f.write('{0}\n'.format(pid))
+        except (IOError, OSError) as e:
+            self.app.log.error('Can\'t create process id file "{0}": {1}'.format(pid_file, e))
+            raise
+        self.app.log.info('Creating process id file "{0}"'.format(pid_file))
+
+    @property
+    def healthy(self):
+        """::
+
+            healthy = prefork.healthy
+
+        Number of currently active worker processes with a heartbeat.
+        """
+        return len([w for w in self._pool.values() if w.get('healthy')])
+
+    def run(self):
+        """::
+
+            prefork.run()
+
+        Run server.
+        """
+        # No Windows support
+        if not hasattr(os, 'fork'):
+            print('Preforking is not available for this platform.')
+            return
+
+        # Pipe for worker communication
+        self._reader, self._writer = os.pipe()
+
+        # Clean manager environment
+        def term_cb(signum, frame):
+            self._term()
+
+        def quit_cb(signum, frame):
+            self._term(True)
+
+        def ttin_cb(signum, frame):
+            self.workers += 1
+
+        def ttou_cb(signum, frame):
+            if self.workers <= 0:
+                return
+            self.workers -= 1
+            for w in self._pool.values():
+                if not w.get('graceful'):
+                    w['graceful'] = steady_time()
+                    break
+
+        handlers = {
+            signal.SIGINT: term_cb,
+            signal.SIGTERM: term_cb,
+            signal.SIGQUIT: quit_cb,
+            signal.SIGTTIN: ttin_cb,
+            signal.SIGTTOU: ttou_cb,
+        }
+        old = dict((signum, signal.signal(signum, cb)) for signum, cb in handlers.items())
+
+        # Open listen sockets before starting workers, so they can share them
+        self._manager = os.getpid()
+        self._finished = self._graceful = False
+        self._open()
+        self.app.log.info('Manager {0} started'.format(self._manager))
+        self._running = True
+        try:
+            while self._running:
+                self._manage()
+        finally:
+            for signum, handler in old.items():
+                signal.signal(signum, handler)
+            for server in self._sockets:
+                server.close()
+            self._sockets = []
+            os.close(self._reader)
+            os.close(self._writer)
+            self._reader = self._writer = None
+            if self.cleanup:
+                try:
+                    os.unlink(self.pid_file)
+                except OSError:
+                    pass
+
+        self.app.log.info('Manager {0} stopped'.format(self._manager))
+
+    def _build_tx(self, cid, c):
+        tx = super(Pyjo_Server_Prefork, self)._build_tx(cid, c)
+
+        # Request latency for autoscaling (transactions are built with the first chunk)
+        stats = self._stats
+        if stats is not None:
+            start = steady_time()
+
+            def finish_cb(tx):
+                stats['latency'] += steady_time() - start
+                stats['requests'] += 1
+
+            tx.on(finish_cb, 'finish')
+
+        return tx
+
+    def _heartbeat(self, finished):
+        # Event loop utilization, open connections and average request latency
+        stats = self._stats
+        now = steady_time()
+        cpu = _cpu()
+        elapsed = now - stats['time']
+        utilization = min((cpu - stats['cpu']) / elapsed, 1.0) if elapsed > 0 else 0.0
+        latency = stats['latency'] / stats['requests'] if stats['requests'] else 0.0
+        stats.update(cpu=cpu, latency=0.0, requests=0, time=now)
+
+        try:
+            os.write(self._writer, '{0}:{1}:{2:.3f}:{3}:{4:.3f}\n'
+                     .format(os.getpid(), int(finished), utilization, len(self._connections), latency)
+                     .encode('ascii'))
+        except OSError:
+            os._exit(0)
+
+    def _manage(self):
+        # Spawn more workers if necessary and check PID file
+        pool = self._pool
+        if not self._finished:
+            if self.max_workers:
+                self._scale()
+            graceful = len([w for w in pool.values() if w.get('graceful')])
+            spare = min(graceful, self.spare)
+            need = self.workers - len(pool) + spare
+            while need > 0:
+                self._spawn()
+                need -= 1
+            self.ensure_pid_file(os.getpid())
+
+        # Shutdown
+        elif not pool:
+            self._running = False
+            return
+
+        # Wait for heartbeats
+        self._wait()
+
+        interval = self.heartbeat_interval
+        ht = self.heartbeat_timeout
+        gt = self.graceful_timeout
+        log = self.app.log
+        now = steady_time()
+
+        for pid in list(pool):
+            w = pool.get(pid)
+            if not w:
+                continue
+
+            # No heartbeat (graceful stop)
+            if not w.get('graceful') and w['time'] + interval + ht <= now:
+                log.error('Worker {0} has no heartbeat ({1} seconds), restarting'.format(pid, ht))
+                w['graceful'] = now
+
+            # Graceful stop with timeout
+            if not w.get('graceful') and self._graceful:
+                w['graceful'] = now
+            graceful = w.get('graceful')
+            if graceful and not w.get('quit'):
+                w['quit'] = True
+                log.info('Stopping worker {0} gracefully ({1} seconds)'.format(pid, gt))
+                self._kill(pid, signal.SIGQUIT)
+            if graceful and graceful + gt <= now:
+                w['force'] = True
+
+            # Normal stop
+            if w.get('force') or (self._finished and not graceful):
+                log.warn('Stopping worker {0} immediately'.format(pid))
+                self._kill(pid, signal.SIGKILL)
+
+    def _kill(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except OSError:
+            self._stopped(pid)
+
+    def _open(self):
+        # Workers find the listen sockets through PYJO_REUSE
+        loop = self.ioloop
+        listen = []
+        for location in self.listen:
+            url, options = self._listen_options(location)
+            server = Pyjo.IOLoop.Server.new(reactor=loop.reactor)
+            server.listen(**options)
+            self._sockets.append(server)
+
+            # Random ports and passed along sockets need to be the same for all workers
+            if not url.port:
+                url.port = server.port
+            if 'fd' in options and url.query.param('fd') is None:
+                url.query.append(fd=options['fd'])
+            listen.append(url.to_str())
+            self._listening(url)
+        self.listen = listen
+
+    def _reap(self):
+        while True:
+            try:
+                pid, unused = os.waitpid(-1, os.WNOHANG)
+            except OSError:
+                return
+            if pid <= 0:
+                return
+            self.emit('reap', pid)._stopped(pid)
+
+    def _scale(self):
+        # Only one decision per interval
+        now = steady_time()
+        if self._scaled + self.scale_interval > now:
+            return
+
+        # Wait for a complete pool of workers to report
+        loads = [w['load'] for w in self._pool.values() if 'load' in w and not w.get('graceful')]
+        n = len(loads)
+        if not n or n < self.workers:
+            return
+        utilization = sum(load[0] for load in loads) / n
+        connections = sum(load[1] for load in loads)
+        latencies = [load[2] for load in loads if load[2]]
+        latency = sum(latencies) / len(latencies) if latencies else 0.0
+
+        target = self.target_utilization
+        capacity = self.ioloop.max_connections * target
+        slow = self.max_latency and latency > self.max_latency
+        workers = self.workers
+        log = self.app.log
+        status = 'utilization {0:.2f}, {1} connections, latency {2:.3f}'.format(utilization, connections, latency)
+
+        # Scale up
+        if utilization > target or connections > n * capacity or slow:
+            if workers >= self.max_workers:
+                return
+            self.workers = workers + 1
+            log.info('Increasing workers to {0} ({1})'.format(self.workers, status))
+
+        # Scale down (if the remaining workers would not be too busy)
+        elif n > 1 and workers > self.min_workers and utilization * n / (n - 1) < target and \
+                connections < (n - 1) * capacity:
+            self.workers = workers - 1
+            log.info('Decreasing workers to {0} ({1})'.format(self.workers, status))
+            for w in self._pool.values():
+                if not w.get('graceful'):
+                    w['graceful'] = now
+                    break
+
+        else:
+            return
+
+        self._scaled = now
+
+    def _spawn(self):
+        # Manager
+        pid = os.fork()
+        if pid:
+            self._pool[pid] = {'time': steady_time()}
+            if DEBUG:
+                warn("-- Spawned worker {0}\n".format(pid))
+            return self.emit('spawn', pid)
+
+        # Worker never returns to the manager loop
+        try:
+            self._work()
+        except BaseException:
+            if DEBUG:
+                import traceback
+                warn(traceback.format_exc())
+        finally:
+            os._exit(0)
+
+    def _stopped(self, pid):
+        w = self._pool.pop(pid, None)
+        if w is None:
+            return
+
+        log = self.app.log
+        log.info('Worker {0} stopped'.format(pid))
+        if not w.get('healthy'):
+            log.error('Worker {0} stopped too early, shutting down'.format(pid))
+            self._term()
+
+    def _term(self, graceful=False):
+        self.emit('finish', graceful)
+        self._finished = True
+        self._graceful = graceful
+
+    def _wait(self):
+        # Poll for heartbeats
+        reader = self.emit('wait')._reader
+        try:
+            readable = select.select([reader], [], [], 1)[0]
+        except (OSError, select.error):
+            readable = None
+        self._reap()
+        if not readable:
+            return
+        chunk = os.read(reader, 4194304)
+        if not chunk:
+            return
+
+        # Update heartbeats (and stop gracefully if necessary)
+        now = steady_time()
+        for pid, finished, utilization, connections, latency in re_heartbeat.findall(chunk.decode('ascii')):
+            w = self._pool.get(int(pid))
+            if not w:
+                continue
+            w['healthy'] = True
+            w['time'] = now
+            if utilization:
+                w['load'] = (float(utilization), int(connections), float(latency))
+            self.emit('heartbeat', int(pid))
+            if finished == '1':
+                if not w.get('graceful'):
+                    w['graceful'] = now
+                w['quit'] = True
+
+    def _work(self):
+        # Clean worker environment
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGQUIT, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, signal.SIG_DFL)
+        os.close(self._reader)
+        self._reader = None
+        self.cleanup = False
+        self.silent = True
+        random.seed()
+
+        # Heartbeat messages
+        loop = self.ioloop
+        loop.max_accepts = self.accepts
+        state = {'finished': False}
+        self._stats = {'cpu': _cpu(), 'latency': 0.0, 'requests': 0, 'time': steady_time()}
+
+        def finish_cb(loop):
+            state['finished'] = True
+            self.max_requests = 1
+
+        loop.on(finish_cb, 'finish')
+
+        def heartbeat_cb(loop):
+            # Replace workers which have grown too large
+            max_memory = self.max_memory
+            if max_memory and not state['finished'] and _rss() > max_memory:
+                self.app.log.info('Worker {0} uses more than {1} bytes of memory, stopping gracefully'
+                                  .format(os.getpid(), max_memory))
+                loop.stop_gracefully()
+            self._heartbeat(state['finished'])
+
+        loop.next_tick(heartbeat_cb)
+        loop.recurring(heartbeat_cb, self.heartbeat_interval)
+        loop.signal(lambda loop, signum: loop.stop_gracefully(), signal.SIGQUIT)
+
+        self.app.log.info('Worker {0} started'.format(os.getpid()))
+        self.start()
+        loop.start()
+
+
+def _cpu():
+    # Processor time used by this process (busy event loop)
+    times = os.times()
+    return times[0] + times[1]
+
+
+def _rss():
+    # Resident set size in bytes
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+
+    # Peak size as fallback, reported in kilobytes by Linux and bytes by macOS
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if os.uname()[0] == 'Darwin' else rss * 1024
+
+
+new = Pyjo_Server_Prefork.new
+object = Pyjo_Server_Prefork
@@ -226,14 +226,21 @@ class Pyjo_Transaction_HTTP(Pyjo.Transaction.object):
 
         self.emit('request')
 
-    def server_write(self):
+    def server_write(self, sendfile=False):
         """::
 
             chunk = tx.server_write()
-
-        Write data server-side, used to implement web servers.
+            chunks = tx.server_write(sendfile=True)
+
+        Write data server-side, used to implement web servers. With ``sendfile``
+        enabled, response bodies backed by :mod:`Pyjo.Asset.File` are not read into
+        memory, a list is returned instead, with the chunk and a
+        ``(asset, offset, size)`` tuple describing the part of the file which
+        remains to be sent, honoring :attr:`Pyjo.Asset.start_range` and
+        :attr:`Pyjo.Asset.end_range`. Both can be passed to
+        :meth:`Pyjo.IOLoop.Stream.write`.
         """
-        return self._write(True)
+        return self._write(True, sendfile)
 
     def _body(self, msg, finish):
         # Prepare body chunk
@@ -274,6 +281,20 @@ class Pyjo_Transaction_HTTP(Pyjo.Transaction.object):
         else:
             return b''
 
+    def _body_file(self, msg):
+        # Describe the rest of the file instead of reading it
+        asset = msg.content.asset
+        msg.emit('progress', 'body', self._offset)
+        start = asset.start_range + self._offset
+        end = asset.end_range + 1 if asset.end_range is not None else asset.size
+        size = max(end - start, 0)
+
+        self._offset += size
+        self._towrite = 0
+        self._state = 'finished'
+
+        return (asset, start, size)
+
     def _headers(self, msg, head):
         # Prepare header chunk
         buf = msg.get_header_chunk(self._offset)
@@ -311,7 +332,7 @@ class Pyjo_Transaction_HTTP(Pyjo.Transaction.object):
 
         return buf
 
-    def _write(self, server):
+    def _write(self, server, sendfile=False):
         # Client starts writing right away
         if not server and self._state is None:
             self._state = 'write'
@@ -351,6 +372,9 @@ class Pyjo_Transaction_HTTP(Pyjo.Transaction.object):
 
         # Body
         if self._http_state == 'body':
+            content = msg.content
+            if sendfile and not content.is_dynamic and getattr(content, 'asset', None) and content.asset.is_file:
+                return [chunk, self._body_file(msg)]
             chunk += self._body(msg, server)
 
         return chunk
@@ -18,7 +18,7 @@ Pyjo.Transaction - Transaction base class
         def server_read(self, chunk):
             ...
 
-        def server_write(self):
+        def server_write(self, sendfile=False):
             ...
 
 :mod:`Pyjo.Transaction` is an abstract base class for transactions.
@@ -318,10 +318,11 @@ class Pyjo_Transaction(Pyjo.EventEmitter.object):
         pass
 
     @not_implemented
-    def server_write(self):
+    def server_write(self, sendfile=False):
         """::
 
             chunk = tx.server_write()
+            chunks = tx.server_write(sendfile=True)
 
         Write data server-side, used to implement web servers. Meant to be overloaded
         in a subclass.
@@ -30,6 +30,9 @@ Classes
 
 import Pyjo.EventEmitter
 import Pyjo.IOLoop
+import Pyjo.IOLoop.Resolver
+import Pyjo.IOLoop.TLSCache
+import Pyjo.Promise
 import Pyjo.UserAgent.CookieJar
 import Pyjo.UserAgent.Proxy
 import Pyjo.UserAgent.Transactor
@@ -63,6 +66,8 @@ class Pyjo_UserAgent(Pyjo.EventEmitter.object):
         self.max_redirects = notnone(kwargs.get('max_redirects'), lambda: getenv('PYJO_MAX_REDIRECTS', 0))
         self.request_timeout = notnone(kwargs.get('request_timeout'), lambda: getenv('PYJO_REQUEST_TIMEOUT', 0))
         self.proxy = notnone(kwargs.get('proxy'), lambda: Pyjo.UserAgent.Proxy.new())
+        self.resolver = notnone(kwargs.get('resolver'), lambda: Pyjo.IOLoop.Resolver.new())
+        self.tls_cache = notnone(kwargs.get('tls_cache'), lambda: Pyjo.IOLoop.TLSCache.new())
         self.transactor = notnone(kwargs.get('transactor'), lambda: Pyjo.UserAgent.Transactor.new())
 
         self._connections = {}
@@ -97,6 +102,22 @@ class Pyjo_UserAgent(Pyjo.EventEmitter.object):
         """
         return self.start(self.build_tx('GET', url, **kwargs), kwargs.get('cb'))
 
+    def get_p(self, url, **kwargs):
+        """::
+
+            promise = ua.get_p('http://example.com')
+
+        Same as :meth:`get`, but performs all requests non-blocking and returns a
+        :mod:`Pyjo.Promise` object instead of accepting a callback, see
+        :meth:`start_p`. ::
+
+            def cb(tx):
+                print(tx.res.body)
+
+            ua.get_p('http://example.com').then(cb).wait()
+        """
+        return self.start_p(self.build_tx('GET', url, **kwargs))
+
     def post(self, url, **kwargs):
         """::
 
@@ -122,6 +143,17 @@ class Pyjo_UserAgent(Pyjo.EventEmitter.object):
         """
         return self.start(self.build_tx('POST', url, **kwargs), kwargs.get('cb'))
 
+    def post_p(self, url, **kwargs):
+        """::
+
+            promise = ua.post_p('http://example.com')
+
+        Same as :meth:`post`, but performs all requests non-blocking and returns a
+        :mod:`Pyjo.Promise` object instead of accepting a callback, see
+        :meth:`start_p`.
+        """
+        return self.start_p(self.build_tx('POST', url, **kwargs))
+
     def start(self, tx, cb=None):
         # TODO Pyjo.UserAgent.Server and fork safety
 
@@ -149,10 +181,35 @@ class Pyjo_UserAgent(Pyjo.EventEmitter.object):
             self.ioloop.start()
             return context.tx
 
+    def start_p(self, tx):
+        """::
+
+            promise = ua.start_p(tx)
+
+        Perform request non-blocking and return a :mod:`Pyjo.Promise` object resolving
+        to the :mod:`Pyjo.Transaction.HTTP` object. The promise is only rejected for
+        connection errors, responses with error codes resolve it as well. ::
+
+            async def main():
+                tx = await ua.start_p(ua.build_tx('GET', 'http://example.com'))
+                print(tx.res.body)
+        """
+        promise = Pyjo.Promise.new(ioloop=Pyjo.IOLoop.singleton)
+
+        def cb(ua, tx):
+            err = tx.error
+            if err and not err.get('code'):
+                promise.reject(Pyjo.Promise.Error(err['message']))
+            else:
+                promise.resolve(tx)
+
+        self.start(tx, cb)
+        return promise
+
     def _connect(self, nb, peer, tx, handle, cb):
         t = self.transactor
         proto, host, port = t.peer(tx) if peer else t.endpoint(tx)
-        options = {'address': host, 'port': port, 'timeout': self.connect_timeout}
+        options = {'address': host, 'port': port, 'resolver': self.resolver, 'timeout': self.connect_timeout}
         local = self.local_address
         if local:
             options['local_address'] = local
@@ -167,6 +224,7 @@ class Pyjo_UserAgent(Pyjo.EventEmitter.object):
             options['tls_ca'] = self.ca
             options['tls_cert'] = self.cert
             options['tls_key'] = self.key
+            options['tls_cache'] = self.tls_cache
 
         class context:
             pass
@@ -207,6 +265,7 @@ class Pyjo_UserAgent(Pyjo.EventEmitter.object):
             def read_cb(ua, chunk):
                 self._read(cid, chunk)
 
+            stream.zero_copy = True
             stream.on(read_cb, 'read')
             cb(cid)
 
@@ -370,7 +429,7 @@ class Pyjo_UserAgent(Pyjo.EventEmitter.object):
 
         # Process incoming data
         if DEBUG:
-            warn("-- Client <<< Server ({0})\n{1}\n".format(self._url(tx), str(chunk)))
+            warn("-- Client <<< Server ({0})\n{1}\n".format(self._url(tx), str(chunk.tobytes())))
 
         tx.client_read(chunk)
         if tx.is_finished:
@@ -0,0 +1,108 @@
+from __future__ import print_function
+
+# Usage:
+#
+#   python examples/parser_benchmark.py
+#   python examples/parser_benchmark.py -r browser -n 50000
+#   python examples/parser_benchmark.py --json > before.json
+
+import argparse
+import gc
+import json
+import os
+import sys
+
+import Pyjo.Transaction.HTTP
+
+from Pyjo.Util import steady_time
+
+
+PARSERS = ['lines', 'fast']
+
+REQUESTS = {
+    'minimal': b'GET / HTTP/1.1\x0d\x0aHost: 127.0.0.1:3000\x0d\x0a\x0d\x0a',
+    'hello': b'GET / HTTP/1.1\x0d\x0aHost: 127.0.0.1:3000\x0d\x0aUser-Agent: wrk\x0d\x0a'
+             b'Accept: */*\x0d\x0aConnection: keep-alive\x0d\x0a\x0d\x0a',
+    'browser': b'GET /static/app.js?v=3 HTTP/1.1\x0d\x0aHost: www.example.com\x0d\x0a'
+               b'User-Agent: Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0\x0d\x0a'
+               b'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8\x0d\x0a'
+               b'Accept-Language: en-US,en;q=0.5\x0d\x0aAccept-Encoding: gzip, deflate, br\x0d\x0a'
+               b'Referer: https://www.example.com/\x0d\x0aConnection: keep-alive\x0d\x0a'
+               b'Cookie: session=eyJleHBpcmVzIjoxNjkwMDAwMDAwfQ; theme=dark\x0d\x0a'
+               b'Upgrade-Insecure-Requests: 1\x0d\x0aSec-Fetch-Dest: script\x0d\x0a'
+               b'Sec-Fetch-Mode: no-cors\x0d\x0aSec-Fetch-Site: same-origin\x0d\x0a'
+               b'If-None-Match: "5d8c72a5edda8d6a"\x0d\x0aCache-Control: max-age=0\x0d\x0a\x0d\x0a',
+    'post': b'POST /login HTTP/1.1\x0d\x0aHost: 127.0.0.1:3000\x0d\x0a'
+            b'Content-Type: application/x-www-form-urlencoded\x0d\x0aContent-Length: 27\x0d\x0a\x0d\x0a'
+            b'user=sri&password=s3cr3t!!!',
+}
+
+
+def cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def run(parser, request, n=10000):
+    chunk = REQUESTS[request]
+    fast = parser == 'fast'
+
+    # Transactions are built before, only parsing is measured
+    txs = []
+    for _ in range(n):
+        tx = Pyjo.Transaction.HTTP.new()
+        tx.req.fast_parse = fast
+        txs.append(tx)
+
+    gc.collect()
+    gc.disable()
+    try:
+        wall = steady_time()
+        cpu = cpu_time()
+        for tx in txs:
+            tx.server_read(chunk)
+        wall = steady_time() - wall
+        cpu = cpu_time() - cpu
+    finally:
+        gc.enable()
+
+    req = tx.req
+    return {
+        'parser': parser,
+        'request': request,
+        'requests': n,
+        'finished': req.is_finished and not req.error,
+        'headers': len(req.headers.names),
+        'requests_per_sec': n / wall if wall else 0,
+        'wall': wall,
+        'cpu': cpu,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Benchmark Pyjo.Message.Request parsers.')
+    parser.add_argument('-p', '--parser', action='append', choices=PARSERS, help='parser, can be repeated (default: all)')
+    parser.add_argument('-r', '--request', action='append', choices=sorted(REQUESTS), help='request, can be repeated (default: all)')
+    parser.add_argument('-n', '--requests', type=int, default=10000, help='number of requests to parse (default: 10000)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    results = []
+    for request in args.request or sorted(REQUESTS):
+        for name in args.parser or PARSERS:
+            results.append(run(name, request, args.requests))
+            if not args.json:
+                report(results[-1])
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+
+def report(result):
+    print('{0:<6} {1:<8} {2:>10.0f} req/s  {3:>2} headers  cpu {4:.2f}s / wall {5:.2f}s'.format(
+        result['parser'], result['request'], result['requests_per_sec'], result['headers'], result['cpu'],
+        result['wall']))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,290 @@
+from __future__ import print_function
+
+# Usage:
+#
+#   python examples/reactor_benchmark.py
+#   python examples/reactor_benchmark.py -r Pyjo.Reactor.Epoll -w timers -s 0.1
+#   python examples/reactor_benchmark.py --json > before.json
+
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from Pyjo.Loader import load_module
+from Pyjo.Util import steady_time
+
+
+REACTORS = ['Pyjo.Reactor.Select', 'Pyjo.Reactor.Poll', 'Pyjo.Reactor.Epoll', 'Pyjo.Reactor.Asyncio']
+
+WORKLOADS = ['idle', 'busy', 'timers', 'next_tick']
+
+
+class Result(object):
+    def __init__(self):
+        self.count = 0
+        self.latency = []
+        self.ticks = 0
+
+    def record(self, latency):
+        self.count += 1
+        self.latency.append(latency)
+
+
+def available(name):
+    try:
+        module = load_module(name)
+        module.new()
+    except Exception:
+        return False
+    return True
+
+
+def cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0
+    return samples[(len(samples) - 1) * p // 100]
+
+
+def raise_nofile(n):
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < n:
+        if hard != resource.RLIM_INFINITY:
+            n = min(n, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (n, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def socketpairs(n):
+    pairs = []
+    for _ in range(n):
+        a, b = socket.socketpair()
+        a.setblocking(False)
+        b.setblocking(False)
+        pairs.append((a, b))
+    return pairs
+
+
+def pingpong(reactor, pair, result, sent):
+    a, b = pair
+
+    def echo_cb(reactor, writable):
+        try:
+            data = b.recv(4096)
+        except socket.error:
+            return
+        if data:
+            b.send(data)
+
+    def pong_cb(reactor, writable):
+        try:
+            a.recv(4096)
+        except socket.error:
+            return
+        result.record(steady_time() - sent[a])
+        sent[a] = steady_time()
+        a.send(b'x')
+
+    reactor.io(echo_cb, b).watch(b, True, False)
+    reactor.io(pong_cb, a).watch(a, True, False)
+    sent[a] = steady_time()
+    a.send(b'x')
+
+
+def workload_idle(reactor, scale, duration):
+    """Many idle sockets and one socket pair bouncing a byte back and forth."""
+    result = Result()
+    pairs = socketpairs(max(int(5000 * scale), 1))
+    for a, b in pairs:
+        reactor.io(lambda reactor, writable: None, a).watch(a, True, False)
+        reactor.io(lambda reactor, writable: None, b).watch(b, True, False)
+
+    busy = socketpairs(1)
+    pingpong(reactor, busy[0], result, {})
+
+    def done():
+        return steady_time() - start >= duration
+
+    start = steady_time()
+    return result, pairs + busy, done
+
+
+def workload_busy(reactor, scale, duration):
+    """Many socket pairs bouncing a byte back and forth at the same time."""
+    result = Result()
+    pairs = socketpairs(max(int(1000 * scale), 1))
+    sent = {}
+    for pair in pairs:
+        pingpong(reactor, pair, result, sent)
+
+    def done():
+        return steady_time() - start >= duration
+
+    start = steady_time()
+    return result, pairs, done
+
+
+def workload_timers(reactor, scale, duration):
+    """Many timers of which some are restarted with a random delay."""
+    result = Result()
+    n = max(int(100000 * scale), 1)
+    afters = {}
+    deadlines = {}
+    tids = []
+
+    def make_cb(i):
+        def cb(reactor):
+            deadline = deadlines.pop(tids[i])
+            result.record(steady_time() - deadline)
+        return cb
+
+    now = steady_time()
+    for i in range(n):
+        after = random.uniform(0, duration)
+        tid = reactor.timer(make_cb(i), after)
+        tids.append(tid)
+        afters[tid] = after
+        deadlines[tid] = now + after
+
+    # Restart random timers, like connections with activity would
+    def again_cb(reactor):
+        for _ in range(max(n // 100, 1)):
+            tid = random.choice(tids)
+            if tid in deadlines:
+                reactor.again(tid)
+                deadlines[tid] = steady_time() + afters[tid]
+
+    again = reactor.recurring(again_cb, duration / 10)
+
+    def done():
+        if not deadlines:
+            reactor.remove(again)
+            return True
+        return False
+
+    return result, [], done
+
+
+def workload_next_tick(reactor, scale, duration):
+    """Many chains of callbacks which keep scheduling the next one."""
+    result = Result()
+    n = max(int(100000 * scale), 1)
+    chains = max(n // 100, 1)
+    state = {'scheduled': 0}
+
+    def schedule():
+        state['scheduled'] += 1
+        queued = steady_time()
+
+        def tick_cb(reactor):
+            result.record(steady_time() - queued)
+            if state['scheduled'] < n:
+                schedule()
+
+        reactor.next_tick(tick_cb)
+
+    for _ in range(chains):
+        schedule()
+
+    def done():
+        return result.count >= n
+
+    return result, [], done
+
+
+def run(name, workload, scale=1.0, duration=1.0):
+    reactor = load_module(name).new()
+    setup = globals()['workload_' + workload]
+
+    handles = []
+    try:
+        result, handles, done = setup(reactor, scale, duration)
+
+        wall = steady_time()
+        cpu = cpu_time()
+        while not done():
+            reactor.one_tick()
+            result.ticks += 1
+        wall = steady_time() - wall
+        cpu = cpu_time() - cpu
+    finally:
+        reactor.reset()
+        for pair in handles:
+            for handle in pair:
+                handle.close()
+
+    latency = sorted(result.latency)
+    return {
+        'reactor': name,
+        'workload': workload,
+        'callbacks': result.count,
+        'ticks': result.ticks,
+        'ticks_per_sec': result.ticks / wall if wall else 0,
+        'latency_p50': percentile(latency, 50),
+        'latency_p99': percentile(latency, 99),
+        'latency_max': latency[-1] if latency else 0,
+        'wall': wall,
+        'cpu': cpu,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Benchmark Pyjo.Reactor implementations.')
+    parser.add_argument('-r', '--reactor', action='append', help='reactor module, can be repeated (default: all available)')
+    parser.add_argument('-w', '--workload', action='append', choices=WORKLOADS, help='workload, can be repeated (default: all)')
+    parser.add_argument('-s', '--scale', type=float, default=1.0, help='scale number of sockets, timers and callbacks (default: 1.0)')
+    parser.add_argument('-d', '--duration', type=float, default=1.0, help='duration of I/O workloads and timer spread in seconds (default: 1.0)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    raise_nofile(int(10000 * args.scale) + 256)
+
+    reactors = args.reactor or [name for name in REACTORS if available(name)]
+    workloads = args.workload or WORKLOADS
+
+    results = []
+    for name in reactors:
+        for workload in workloads:
+            try:
+                results.append(run(name, workload, args.scale, args.duration))
+            except Exception as e:
+                results.append({'reactor': name, 'workload': workload, 'error': str(e)})
+
+            if not args.json:
+                report(results[-1])
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+
+def report(result):
+    name = result['reactor'].replace('Pyjo.Reactor.', '')
+    if 'error' in result:
+        print('{0:<8} {1:<10} skipped: {2}'.format(name, result['workload'], result['error']))
+        return
+
+    print('{0:<8} {1:<10} {2:>10.0f} ticks/s  p50 {3:>8.3f} ms  p99 {4:>8.3f} ms  max {5:>8.3f} ms  cpu {6:.2f}s / wall {7:.2f}s'.format(
+        name, result['workload'], result['ticks_per_sec'], result['latency_p50'] * 1000,
+        result['latency_p99'] * 1000, result['latency_max'] * 1000, result['cpu'], result['wall']))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -221,4 +221,43 @@ Foo: first again
     is_ok(headers.content_type, 'text/plain', 'right value')
     is_ok(headers.header('X-Bender'), 'Bite my shiny, metal ass!', 'right value')
 
+    # Parse complete header block
+    block = b"GET / HTTP/1.1\x0d\x0aContent-Type: text/plain\x0d\x0aX-Bender: Bite my shiny\x0d\x0a" + \
+        b"  metal ass!\x0d\x0aEXPECT:  100-continue\x0d\x0aX-Bender: Kill all humans\x0d\x0a\x0d\x0aHello"
+    headers = Pyjo.Headers.new()
+    isa_ok(headers.parse_block(block, 16, len(block) - 7), Pyjo.Headers.object, 'right return value')
+    ok(headers.is_finished, 'parser is finished')
+    ok(not headers.is_limit_exceeded, 'limit is not exceeded')
+    is_ok(headers.content_type, 'text/plain', 'right value')
+    is_ok(headers.expect, '100-continue', 'right value')
+    is_deeply_ok(headers.to_dict_list()['X-Bender'], ['Bite my shiny metal ass!', 'Kill all humans'], 'right values')
+    is_deeply_ok(headers.names, ['Content-Type', 'X-Bender', 'Expect'], 'right names')
+    is_deeply_ok(headers.to_dict_list(), Pyjo.Headers.new().parse(block[16:]).to_dict_list(), 'same as line parser')
+    headers = Pyjo.Headers.new().parse_block(b"Host: a\nAccept: */*\n")
+    is_deeply_ok(headers.to_dict(), {'Host': 'a', 'Accept': '*/*'}, 'right structure')
+
+    # Parse header block exceeding limits
+    headers = Pyjo.Headers.new(max_lines=1)
+    is_ok(headers.parse_block(b"Host: a\x0d\x0aAccept: */*\x0d\x0a"), None, 'block refused')
+    ok(not headers.is_finished, 'parser is not finished')
+    ok(not headers.is_limit_exceeded, 'limit is not exceeded yet')
+    is_deeply_ok(headers.names, [], 'no headers')
+    headers = Pyjo.Headers.new(max_line_size=10)
+    is_ok(headers.parse_block(b"Host: a\x0d\x0aAccept: */*\x0d\x0a"), None, 'block refused')
+    is_deeply_ok(headers.names, [], 'no headers')
+
+    # Parse unusual header blocks like the line parser
+    for block in [b"Host: a\x0d\x0aBadline\x0d\x0aX-Test: b\x0d\x0a", b"Foo : bar\x0d\x0a",
+                  b"Foo: bar\x0d\x0a\x0d\x0aHost: a\x0d\x0a", b": bar\x0d\x0aHost: a\x0d\x0a",
+                  b"Foo:bar\x0d\x0a\x0bcontinued\x0d\x0a", b"Foo:  bar  \x0d\x0a\x0d\x0d\x0a",
+                  b"".join(b"X-" + str(i).encode('ascii') + b": a\x0d\x0a" for i in range(100)),
+                  b"".join(b"X-" + str(i).encode('ascii') + b": a\x0d\x0a" for i in range(101))]:
+        fast = Pyjo.Headers.new()
+        if fast.parse_block(block) is None:
+            fast.parse(block + b"\x0d\x0a")
+        slow = Pyjo.Headers.new().parse(block + b"\x0d\x0a")
+        is_deeply_ok(fast.to_dict_list(), slow.to_dict_list(), 'same headers as line parser')
+        is_deeply_ok(fast.names, slow.names, 'same names as line parser')
+        is_ok(fast.is_limit_exceeded, slow.is_limit_exceeded, 'same limit as line parser')
+
     done_testing()
@@ -21,20 +21,30 @@ if __name__ == '__main__':
     setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
     setenv('PYJO_REACTOR_DIE', '1')
 
+    import Pyjo.IOLoop.BufferPool
     import Pyjo.IOLoop.Client
     import Pyjo.IOLoop.Delay
     import Pyjo.IOLoop.Server
     import Pyjo.IOLoop.Stream
 
+    import os
     import platform
+    import signal
     import socket
+    import sys
+    import threading
 
     from t.lib.Value import Value
 
+    try:
+        import concurrent.futures
+    except ImportError:
+        concurrent = None
+
     # Reactor detection
     setenv('PYJO_REACTOR', 'MyReactorDoesNotExist')
     loop = Pyjo.IOLoop.new()
-    like_ok(loop.reactor.__class__.__name__, '^Pyjo.Reactor.(Select|Poll)$', 'right class')
+    like_ok(loop.reactor.__class__.__name__, '^Pyjo.Reactor.(Select|Poll|Epoll)$', 'right class')
     setenv('PYJO_REACTOR', 't.lib.TestReactor')
     loop = Pyjo.IOLoop.new()
     is_ok(loop.reactor.__class__.__name__, 'TestReactor', 'right class')
@@ -53,6 +63,19 @@ if __name__ == '__main__':
     is_ok(loop.max_connections, 1000, 'right value')
     is_ok(loop.multi_accept, 10, 'right value')
 
+    # Singleton and buffer pool created on first use
+    loops = []
+    thread = threading.Thread(target=lambda: loops.append(Pyjo.IOLoop._singleton()))
+    thread.start()
+    thread.join()
+    isa_ok(loops[0], Pyjo.IOLoop.object, 'singleton created in thread')
+    ok(loops[0] is not Pyjo.IOLoop._singleton(), 'thread has its own instance')
+    isa_ok(loops[0].pool, Pyjo.IOLoop.BufferPool.object, 'buffer pool created on first use')
+    ok(loops[0].pool is loops[0].pool, 'same buffer pool')
+    ok(loops[0].pool is not Pyjo.IOLoop._singleton().pool, 'thread has its own buffer pool')
+    pool = Pyjo.IOLoop.BufferPool.new()
+    is_ok(Pyjo.IOLoop.new(pool=pool).pool, pool, 'right buffer pool')
+
     # Double start
     err = Value('')
 
@@ -144,6 +167,90 @@ if __name__ == '__main__':
     Pyjo.IOLoop.reset()
     ok(steady_time() < time + 10, 'stopped automatically')
 
+    # Thread-safe callbacks
+    loop = Pyjo.IOLoop.new()
+    results = []
+
+    def work():
+        for i in range(3):
+            loop.call_soon_threadsafe(lambda loop, i=i: results.append(i))
+        loop.call_soon_threadsafe(lambda loop: loop.stop())
+
+    threading.Timer(0.1, work).start()
+    tid = loop.timer(lambda loop: loop.stop(), 5)
+    start = steady_time()
+    loop.start()
+    loop.remove(tid)
+    is_deeply_ok(results, [0, 1, 2], 'right results')
+    ok(steady_time() - start < 1, 'event loop has been woken up')
+
+    # Offload blocking functions
+    if concurrent:
+        loop = Pyjo.IOLoop.new(max_workers=2)
+        results = []
+        threads = set()
+
+        def blocking(x, factor=1):
+            threading.Event().wait(0.1)
+            return x * factor
+
+        def offload_cb(loop, err, result):
+            threads.add(threading.current_thread())
+            results.append((err, result))
+
+        for i in range(3):
+            loop.offload(blocking, i, factor=2, cb=offload_cb)
+        stats = loop.offload_stats
+        is_ok(stats['workers'], 2, 'right number of workers')
+        is_ok(stats['queued'] + stats['running'], 3, 'three functions offloaded')
+        ok(stats['running'] <= 2, 'not more than two functions running')
+
+        def die():
+            raise Exception('offload failed')
+
+        errors = []
+        loop.offload(die, cb=lambda loop, err, result: errors.append(err))
+        start = steady_time()
+        loop.start()
+        is_deeply_ok(sorted(results), [(None, 0), (None, 2), (None, 4)], 'right results')
+        is_deeply_ok(threads, set([threading.current_thread()]), 'callbacks invoked in event loop thread')
+        is_ok(str(errors[0]), 'offload failed', 'right error')
+        is_deeply_ok(loop.offload_stats, {'workers': 2, 'queued': 0, 'running': 0, 'done': 4}, 'right counters')
+        ok(steady_time() - start < 1, 'event loop stopped automatically')
+        loop.reset()
+    else:
+        skip('concurrent.futures required', 8)
+
+    # Signals
+    loop = Pyjo.IOLoop.new()
+    signals = []
+
+    @loop.signal(signal.SIGUSR2)
+    def sid(loop, signum):
+        signals.append(signum)
+        loop.stop()
+
+    tid = loop.timer(lambda loop: loop.stop(), 5)
+    threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGUSR2)).start()
+    start = steady_time()
+    loop.start()
+    loop.remove(tid)
+    loop.remove(sid)
+    is_deeply_ok(signals, [signal.SIGUSR2], 'signal received')
+    ok(steady_time() - start < 1, 'event loop has been woken up')
+    is_ok(signal.getsignal(signal.SIGUSR2), signal.SIG_DFL, 'previous signal handler restored')
+
+    # Singleton per thread
+    if sys.version_info >= (3, 7):
+        singletons = []
+        thread = threading.Thread(target=lambda: singletons.append(Pyjo.IOLoop.singleton))
+        thread.start()
+        thread.join()
+        ok(singletons[0] is not Pyjo.IOLoop.singleton, 'thread has its own singleton')
+        ok(Pyjo.IOLoop.singleton is Pyjo.IOLoop.singleton, 'same singleton in the same thread')
+    else:
+        skip('per-thread singletons require Python 3.7', 2)
+
     # Stream
     buf = Value(b'')
 
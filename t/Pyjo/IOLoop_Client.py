@@ -0,0 +1,126 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import setenv, steady_time
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import Pyjo.IOLoop
+    import Pyjo.IOLoop.Client
+    import Pyjo.IOLoop.Server
+
+    import errno
+    import socket
+
+    from t.lib.Value import Value
+
+    class Resolver(object):
+        def __init__(self, *addresses):
+            self.addresses = [(family, socket.SOCK_STREAM, 6, '', address) for family, address in addresses]
+
+        def resolve(self, cb, host, port, **kwargs):
+            kwargs['reactor'].next_tick(lambda reactor: cb(self, None, self.addresses))
+
+    def listen(family, address):
+        handle = socket.socket(family, socket.SOCK_STREAM)
+        handle.bind((address, 0))
+        handle.listen(0)
+        return handle
+
+    def connect(loop, resolver, **kwargs):
+        result = Value(None)
+
+        def cb(loop, err, stream):
+            result.set((err, stream))
+            loop.stop()
+
+        start = steady_time()
+        cid = loop.client(cb, address='dual.test', port=80, resolver=resolver, **kwargs)
+        client = loop._connections[cid]['client']
+        loop.start()
+        return result.get() + (steady_time() - start, client)
+
+    ipv6 = socket.has_ipv6
+    if ipv6:
+        try:
+            listen(socket.AF_INET6, '::1').close()
+        except socket.error:
+            ipv6 = False
+
+    # Interleave address families
+    client = Pyjo.IOLoop.Client.new()
+    addresses = [(socket.AF_INET6, 1, 6, '', ('::1', 1)), (socket.AF_INET6, 1, 6, '', ('::2', 1)),
+                 (socket.AF_INET6, 1, 6, '', ('::3', 1)), (socket.AF_INET, 1, 6, '', ('127.0.0.1', 1)),
+                 (socket.AF_INET, 1, 6, '', ('127.0.0.2', 1))]
+    is_deeply_ok([address[4][0] for address in client._interleave(addresses)],
+                 ['::1', '127.0.0.1', '::2', '127.0.0.2', '::3'], 'right order')
+    is_deeply_ok([address[4][0] for address in client._interleave(addresses[3:] + addresses[:3])],
+                 ['127.0.0.1', '::1', '127.0.0.2', '::2', '::3'], 'right order')
+
+    # Refused address is skipped right away
+    loop = Pyjo.IOLoop.new()
+    server = listen(socket.AF_INET, '127.0.0.1')
+    refused = Pyjo.IOLoop.Server.generate_port()
+    resolver = Resolver((socket.AF_INET, ('127.0.0.1', refused)), (socket.AF_INET, server.getsockname()))
+    err, stream, elapsed, client = connect(loop, resolver, attempt_delay=5)
+    is_ok(err, None, 'no error')
+    is_ok(stream.handle.getpeername(), server.getsockname(), 'connected to second address')
+    ok(elapsed < 1, 'did not wait for attempt delay')
+
+    # Unresponsive address loses the race
+    blackhole = listen(socket.AF_INET, '127.0.0.1')
+    filler = socket.create_connection(blackhole.getsockname())
+    if ipv6:
+        server6 = listen(socket.AF_INET6, '::1')
+        resolver = Resolver((socket.AF_INET, blackhole.getsockname()), (socket.AF_INET6, server6.getsockname()[:2]))
+        err, stream, elapsed, client = connect(loop, resolver, attempt_delay=0.1)
+        is_ok(err, None, 'no error')
+        is_ok(stream.handle.family, socket.AF_INET6, 'right family')
+        is_ok(stream.handle.getpeername()[:2], server6.getsockname()[:2], 'connected to second address')
+        ok(elapsed < 1, 'did not wait for first attempt')
+        is_deeply_ok(client._attempts, [], 'other attempts canceled')
+        server6.close()
+    else:
+        skip('IPv6 not available', 4)
+
+    server.close()
+    server = listen(socket.AF_INET, '127.0.0.1')
+    resolver = Resolver((socket.AF_INET, blackhole.getsockname()), (socket.AF_INET, server.getsockname()))
+    err, stream, elapsed, client = connect(loop, resolver, attempt_delay=0.1)
+    is_ok(err, None, 'no error')
+    is_ok(stream.handle.getpeername(), server.getsockname(), 'connected to second address')
+    is_deeply_ok(client._attempts, [], 'other attempts canceled')
+
+    # Every address fails
+    resolver = Resolver((socket.AF_INET, ('127.0.0.1', refused)), (socket.AF_INET, ('127.0.0.1', refused)))
+    err, stream, elapsed, client = connect(loop, resolver)
+    isa_ok(err, socket.error, 'right error')
+    is_ok(err.errno, errno.ECONNREFUSED, 'connection refused')
+    is_ok(stream, None, 'no stream')
+
+    # Timeout cancels all attempts
+    resolver = Resolver((socket.AF_INET, blackhole.getsockname()), (socket.AF_INET, blackhole.getsockname()))
+    err, stream, elapsed, client = connect(loop, resolver, attempt_delay=0.05, timeout=0.2)
+    is_ok(err, 'Connect timeout', 'right error')
+    is_deeply_ok(client._attempts, [], 'attempts canceled')
+    filler.close()
+    blackhole.close()
+    server.close()
+
+    done_testing()
@@ -0,0 +1,213 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import setenv
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import Pyjo.IOLoop
+    import Pyjo.IOLoop.Client
+    import Pyjo.IOLoop.Resolver
+    import Pyjo.IOLoop.Server
+    import Pyjo.UserAgent
+
+    import errno
+    import socket
+    import threading
+    import time
+
+    from t.lib.Value import Value
+
+    # Numeric address
+    loop = Pyjo.IOLoop.new()
+    resolver = Pyjo.IOLoop.Resolver.new(reactor=loop.reactor)
+    result = Value(None)
+    resolver.resolve(lambda resolver, err, addresses: result.set((err, addresses)) and loop.stop(), '127.0.0.1', 80,
+                     family=socket.AF_INET)
+    is_ok(result.get(), None, 'not resolved yet')
+    loop.start()
+    err, addresses = result.get()
+    is_ok(err, None, 'no error')
+    is_ok(addresses[0][0], socket.AF_INET, 'right family')
+    is_ok(addresses[0][1], socket.SOCK_STREAM, 'right type')
+    is_deeply_ok(addresses[0][4], ('127.0.0.1', 80), 'right address')
+
+    # Slow name server
+    getaddrinfo = socket.getaddrinfo
+    lookups = []
+    threads = []
+
+    def slow_getaddrinfo(host, port, family=0, socktype=0, proto=0, flags=0):
+        args = (port, family, socktype, proto)
+        if flags & socket.AI_NUMERICHOST:
+            return getaddrinfo(host, port, family, socktype, proto, flags)
+        threads.append(threading.current_thread())
+        lookups.append(host)
+        if host == 'slow.test':
+            time.sleep(0.2)
+            return getaddrinfo('127.0.0.1', *args)
+        if host == 'missing.test':
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return getaddrinfo(host, *args)
+
+    socket.getaddrinfo = slow_getaddrinfo
+
+    ticks = Value(0)
+    loop.recurring(lambda loop: ticks.inc(), 0.01)
+    result = Value(None)
+    resolver.resolve(lambda resolver, err, addresses: result.set((err, addresses)) and loop.stop(), 'slow.test', 80,
+                     family=socket.AF_INET)
+    loop.start()
+    err, addresses = result.get()
+    is_ok(err, None, 'no error')
+    is_deeply_ok(addresses[0][4], ('127.0.0.1', 80), 'right address')
+    ok(ticks.get() > 5, 'event loop was not blocked')
+    ok(threading.current_thread() not in threads, 'resolved in another thread')
+
+    result = Value(None)
+    resolver.resolve(lambda resolver, err, addresses: result.set((err, addresses)) and loop.stop(), 'missing.test', 80)
+    loop.start()
+    err, addresses = result.get()
+    isa_ok(err, socket.gaierror, 'right error')
+    is_ok(addresses, None, 'no addresses')
+
+    # Connect with slow name server
+    loop = Pyjo.IOLoop.new()
+    ticks = Value(0)
+    loop.recurring(lambda loop: ticks.inc(), 0.01)
+    server = Value(None)
+    cid = loop.server(address='127.0.0.1', cb=lambda loop, stream, cid: server.set(cid))
+    port = loop.acceptor(cid).port
+    client = Value(None)
+
+    @loop.client(address='slow.test', port=port)
+    def cid2(loop, err, stream):
+        client.set((err, stream))
+        loop.stop()
+
+    loop.start()
+    err, stream = client.get()
+    is_ok(err, None, 'no error')
+    isa_ok(stream, Pyjo.IOLoop.Stream.object, 'right object')
+    ok(ticks.get() > 5, 'event loop was not blocked')
+    is_ok(loop.resolver.reactor, loop.reactor, 'right reactor')
+
+    # Unknown host
+    client = Value(None)
+
+    @loop.client(address='missing.test', port=port)
+    def cid3(loop, err, stream):
+        client.set((err, stream))
+        loop.stop()
+
+    loop.start()
+    err, stream = client.get()
+    isa_ok(err, socket.gaierror, 'right error')
+    is_ok(stream, None, 'no stream')
+
+    # Cache
+    loop = Pyjo.IOLoop.new()
+    resolver = Pyjo.IOLoop.Resolver.new(reactor=loop.reactor, cache_ttl=0.4, negative_ttl=0.2, prefetch=1)
+    results = []
+    del lookups[:]
+
+    def resolve(host, n=1):
+        del results[:]
+        for _ in range(n):
+            resolver.resolve(lambda resolver, err, addresses: results.append(err or addresses[0][4]), host, 80,
+                             family=socket.AF_INET)
+        loop.one_tick()
+        while len(results) < n:
+            loop.one_tick()
+        return results
+
+    is_deeply_ok(resolve('slow.test', 3), [('127.0.0.1', 80)] * 3, 'right addresses')
+    is_deeply_ok(lookups, ['slow.test'], 'concurrent lookups shared')
+    is_deeply_ok(resolver.stats, {'hits': 0, 'misses': 3, 'prefetches': 0, 'size': 1}, 'right stats')
+    is_deeply_ok(resolve('slow.test'), [('127.0.0.1', 80)], 'right address')
+    is_deeply_ok(lookups, ['slow.test'], 'cached')
+    is_deeply_ok(resolver.stats, {'hits': 1, 'misses': 3, 'prefetches': 0, 'size': 1}, 'right stats')
+    isa_ok(resolve('missing.test')[0], socket.gaierror, 'right error')
+    isa_ok(resolve('missing.test')[0], socket.gaierror, 'right error')
+    is_deeply_ok(lookups, ['slow.test', 'missing.test'], 'failure cached')
+    time.sleep(0.2)
+    isa_ok(resolve('missing.test')[0], socket.gaierror, 'right error')
+    is_deeply_ok(lookups, ['slow.test', 'missing.test', 'missing.test'], 'failure expired')
+    time.sleep(0.2)
+    is_deeply_ok(resolve('slow.test'), [('127.0.0.1', 80)], 'right address')
+    is_deeply_ok(lookups, ['slow.test', 'missing.test', 'missing.test', 'slow.test'], 'result expired')
+
+    # Prefetch
+    resolver = Pyjo.IOLoop.Resolver.new(reactor=loop.reactor, cache_ttl=1, prefetch=0.1)
+    del lookups[:]
+    is_deeply_ok(resolve('localhost'), [('127.0.0.1', 80)], 'right address')
+    is_deeply_ok(resolve('localhost'), [('127.0.0.1', 80)], 'right address')
+    is_deeply_ok(lookups, ['localhost'], 'cached')
+    time.sleep(0.15)
+    is_deeply_ok(resolve('localhost'), [('127.0.0.1', 80)], 'right address')
+    is_deeply_ok(resolve('localhost'), [('127.0.0.1', 80)], 'right address')
+    time.sleep(0.1)
+    is_deeply_ok(lookups, ['localhost', 'localhost'], 'refreshed once in the background')
+    is_ok(resolver.stats['prefetches'], 1, 'right number of prefetches')
+    is_ok(resolver.stats['misses'], 1, 'right number of misses')
+
+    # Cache size
+    resolver = Pyjo.IOLoop.Resolver.new(reactor=loop.reactor, max_cache=1)
+    resolve('slow.test')
+    resolve('localhost')
+    is_ok(resolver.stats['size'], 1, 'right size')
+
+    # Cache disabled
+    resolver = Pyjo.IOLoop.Resolver.new(reactor=loop.reactor, cache_ttl=0)
+    del lookups[:]
+    resolve('localhost')
+    resolve('localhost')
+    is_deeply_ok(lookups, ['localhost', 'localhost'], 'not cached')
+    is_ok(resolver.stats['size'], 0, 'right size')
+
+    socket.getaddrinfo = getaddrinfo
+
+    # Connection refused
+    port = Pyjo.IOLoop.Server.generate_port()
+    client = Value(None)
+
+    @loop.client(address='127.0.0.1', port=port)
+    def cid4(loop, err, stream):
+        client.set((err, stream))
+        loop.stop()
+
+    loop.start()
+    err, stream = client.get()
+    isa_ok(err, socket.error, 'right error')
+    is_ok(err.errno, errno.ECONNREFUSED, 'connection refused')
+    is_ok(stream, None, 'no stream')
+
+    # Removed while resolving
+    client = Value(None)
+    loop.remove(loop.client(address='127.0.0.1', port=port, cb=lambda loop, err, stream: client.set(err)))
+    loop.timer(lambda loop: loop.stop(), 0.1)
+    loop.start()
+    is_ok(client.get(), None, 'connection has been removed')
+
+    # Defaults
+    is_ok(Pyjo.IOLoop.Client.new().resolver, Pyjo.IOLoop.singleton.resolver, 'right default')
+    is_ok(Pyjo.IOLoop.Resolver.new().reactor, Pyjo.IOLoop.singleton.reactor, 'right default')
+    isa_ok(Pyjo.UserAgent.new().resolver, Pyjo.IOLoop.Resolver.object, 'right default')
+
+    done_testing()
@@ -0,0 +1,276 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import setenv
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import Pyjo.IOLoop
+    import Pyjo.IOLoop.BufferPool
+    import Pyjo.IOLoop.Stream
+
+    import errno
+    import socket
+    import threading
+
+    from t.lib.Value import Value
+
+    # Write queue
+    loop = Pyjo.IOLoop.new()
+    reader, writer = socket.socketpair()
+    writer.setblocking(False)
+    writer.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    stream = Pyjo.IOLoop.Stream.new(writer, reactor=loop.reactor)
+    stream.timeout = 0
+    stream.start()
+
+    chunks = [bytes(bytearray([i % 256])) * (1000 + i) for i in range(200)]
+    written = []
+    drained = Value(0)
+    stream.on(lambda stream, chunk: written.append(chunk), 'write')
+    mutable = bytearray(b'mutable')
+    view = bytearray(b'view')
+    for chunk in chunks:
+        stream.write(chunk)
+    stream.write(mutable)
+    stream.write(memoryview(view))
+    stream.write(b'')
+    mutable[:] = b'changed'
+    view[:] = b'VIEW'
+    ok(stream.is_writing, 'stream is writing')
+
+    received = bytearray()
+    expected = b''.join(chunks) + b'mutable' + b'view'
+
+    def read_cb(reactor, writable):
+        if writable:
+            return
+        received.extend(reader.recv(1024))
+        if len(received) >= len(expected):
+            loop.stop()
+
+    loop.reactor.io(read_cb, reader).watch(reader, True, False)
+
+    def drain_cb(stream):
+        drained.inc()
+
+    stream.write(b'', drain_cb)
+    loop.start()
+    ok(received == expected, 'right data in right order')
+    ok(b''.join(written) == expected, 'write events for all data')
+    ok(len(written) > 1, 'multiple partial writes')
+    is_ok(drained.get(), 1, 'drained once')
+    ok(not stream.is_writing, 'stream is not writing')
+
+    # Close gracefully after writing
+    closed = Value(False)
+    stream.on(lambda stream: closed.set(True), 'close')
+    stream.write(b'bye').close_gracefully()
+    received = bytearray()
+    expected = b'bye'
+    loop.start()
+    ok(received == expected, 'right data')
+    ok(closed.get(), 'stream closed')
+    loop.reactor.remove(reader)
+    reader.close()
+
+    # Watermarks
+    loop = Pyjo.IOLoop.new()
+    reader, writer = socket.socketpair()
+    writer.setblocking(False)
+    writer.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    stream = Pyjo.IOLoop.Stream.new(writer, reactor=loop.reactor, high_watermark=10000, low_watermark=5000)
+    stream.timeout = 0
+    stream.start()
+    is_ok(stream.high_watermark, 10000, 'right high watermark')
+    is_ok(stream.low_watermark, 5000, 'right low watermark')
+
+    events = []
+    stream.on(lambda stream: events.append('pause'), 'pause')
+    stream.on(lambda stream: events.append('resume'), 'resume')
+    stream.write(b'x' * 10000)
+    ok(not stream.is_full, 'stream is not full')
+    stream.write(b'x')
+    ok(stream.is_full, 'stream is full')
+    stream.write(b'x' * 10000)
+    is_deeply_ok(events, ['pause'], 'paused once')
+
+    received = bytearray()
+    expected = b'x' * 20001
+
+    def watermark_cb(stream):
+        events.append(stream._buffered <= 5000)
+
+    stream.on(watermark_cb, 'resume')
+    loop.reactor.io(read_cb, reader).watch(reader, True, False)
+    loop.start()
+    ok(received == expected, 'right data')
+    is_deeply_ok(events, ['pause', 'resume', True], 'resumed once')
+    ok(not stream.is_full, 'stream is not full')
+
+    stream.write((reader, 0, 100000))
+    ok(not stream.is_full, 'parts of files do not count')
+    stream.close()
+    loop.reactor.remove(reader)
+    reader.close()
+
+    # Buffer pool
+    pool = Pyjo.IOLoop.BufferPool.new(max_buffers=1)
+    buffer = pool.acquire(4096)
+    is_ok(len(buffer), 4096, 'right size')
+    pool.release(buffer)
+    ok(pool.acquire(4096) is buffer, 'buffer reused')
+    ok(pool.acquire(4096) is not buffer, 'new buffer')
+    pool.release(bytearray(4096))
+    pool.release(bytearray(4096))
+    is_deeply_ok(pool.stats, {'allocated': 2, 'reused': 1}, 'right stats')
+
+    # Read buffers
+    loop = Pyjo.IOLoop.new()
+    isa_ok(loop.pool, Pyjo.IOLoop.BufferPool.object, 'right object')
+    reader, writer = socket.socketpair()
+    reader.setblocking(False)
+    stream = Pyjo.IOLoop.Stream.new(reader)
+    loop.stream(stream)
+    stream.timeout = 0
+    is_ok(stream.pool, loop.pool, 'stream uses buffer pool')
+
+    received = []
+    data = b'x' * 1000000
+    expected = Value(100)
+
+    def read_cb(stream, chunk):
+        received.append(chunk)
+        if sum(map(len, received)) >= expected.get():
+            loop.stop()
+
+    stream.on(read_cb, 'read')
+    writer.sendall(data[:100])
+    loop.start()
+    isa_ok(received[0], bytes, 'right chunk')
+
+    def write_cb():
+        writer.setblocking(True)
+        writer.sendall(data[100:])
+
+    expected.set(len(data))
+    threading.Thread(target=write_cb).start()
+    loop.start()
+    ok(b''.join(received) == data, 'right data')
+    ok(stream._read_size > 16384, 'read size has grown')
+    ok(loop.pool.stats['reused'] > 0, 'buffers reused')
+
+    received = []
+    stream.zero_copy = True
+    stream.on(lambda stream, chunk: received.append(bytes(chunk)), 'read')
+    stream.unsubscribe('read', read_cb)
+    stream.on(lambda stream, chunk: isa_ok(chunk, memoryview, 'right chunk') and loop.stop(), 'read')
+    writer.sendall(b'zero copy')
+    loop.start()
+    is_deeply_ok(received, [b'zero copy'], 'right data')
+    writer.close()
+
+    # Send file
+    import Pyjo.Asset.File
+    import os
+
+    asset = Pyjo.Asset.File.new().add_chunk(b''.join(bytes(bytearray([i % 256])) * 1000 for i in range(300)))
+    content = asset.slurp()
+
+    def send_file(regions, chunks=False, errors=None):
+        loop = Pyjo.IOLoop.new()
+        reader, writer = socket.socketpair()
+        writer.setblocking(False)
+        stream = Pyjo.IOLoop.Stream.new(writer, reactor=loop.reactor)
+        stream.timeout = 0
+        stream.start()
+        written = []
+        if chunks:
+            stream.on(lambda stream, chunk: written.append(chunk), 'write')
+        if errors is not None:
+            stream.on(lambda stream, err: errors.append(err), 'error')
+
+        stream.write(b'head')
+        for region in regions:
+            stream.write(region)
+        stream.write(b'tail', lambda stream: stream.close())
+
+        received = bytearray()
+
+        def read_cb(reactor, writable):
+            if writable:
+                return
+            chunk = reader.recv(65536)
+            if not chunk:
+                loop.stop()
+            received.extend(chunk)
+
+        loop.reactor.io(read_cb, reader).watch(reader, True, False)
+        loop.start()
+        loop.reactor.remove(reader)
+        reader.close()
+        return bytes(received), b''.join(written)
+
+    calls = Value(0)
+    sendfile = getattr(os, 'sendfile', None)
+
+    def sendfile_cb(*args):
+        calls.inc()
+        return sendfile(*args)
+
+    if sendfile:
+        os.sendfile = sendfile_cb
+
+    received, written = send_file([(asset, 0, asset.size)])
+    ok(received == b'head' + content + b'tail', 'right data')
+    if sendfile:
+        ok(calls.get() > 0, 'sent with sendfile')
+    else:
+        skip('sendfile not available', 1)
+
+    received, written = send_file([(asset, 1000, 5000), (asset, 0, 0), (asset, 299000, 1000)])
+    ok(received == b'head' + content[1000:6000] + content[299000:] + b'tail', 'right ranges')
+
+    calls.set(0)
+    received, written = send_file([(asset, 5, 200000)], chunks=True)
+    ok(received == b'head' + content[5:200005] + b'tail', 'right data')
+    ok(written == received, 'write events for all data')
+    is_ok(calls.get(), 0, 'not sent with sendfile')
+
+    errors = []
+    received, written = send_file([(asset, 299000, 5000)], errors=errors)
+    ok(received == b'head' + content[299000:], 'data until end of file')
+    is_ok(errors[0].errno, errno.EIO, 'right error')
+
+    calls.set(0)
+    Pyjo.IOLoop.Stream.sendfile = False
+    received, written = send_file([(asset, 0, asset.size)])
+    ok(received == b'head' + content + b'tail', 'right data')
+    is_ok(calls.get(), 0, 'not sent with sendfile')
+
+    errors = []
+    received, written = send_file([(asset, 299000, 5000)], errors=errors)
+    ok(received == b'head' + content[299000:], 'data until end of file')
+    is_ok(errors[0].errno, errno.EIO, 'right error')
+    Pyjo.IOLoop.Stream.sendfile = bool(sendfile)
+
+    if sendfile:
+        os.sendfile = sendfile
+
+    done_testing()
@@ -0,0 +1,132 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import setenv
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import Pyjo.IOLoop
+    import Pyjo.IOLoop.Subprocess
+
+    import json
+    import os
+
+    from t.lib.Value import Value
+
+    # Huge result
+    fail = Value(None)
+    result = Value(None)
+    subprocess = Pyjo.IOLoop.Subprocess.new()
+
+    def child(subprocess):
+        return [os.getpid(), '♥' * 100000]
+
+    def parent(subprocess, err, res):
+        fail.set(err)
+        result.set(res)
+
+    subprocess.run(child, parent)
+    ok(subprocess.pid, 'subprocess spawned')
+    Pyjo.IOLoop.start()
+    ok(not fail.get(), 'no error')
+    is_ok(result.get()[0], subprocess.pid, 'right process id')
+    ok(result.get()[1] == '♥' * 100000, 'right result')
+
+    # Custom event loop
+    loop = Pyjo.IOLoop.new()
+    result = Value(None)
+    subprocess = loop.subprocess(lambda subprocess: 'works!', lambda subprocess, err, res: result.set(res))
+    is_ok(subprocess.ioloop, loop, 'right event loop')
+    loop.start()
+    is_ok(result.get(), 'works!', 'right result')
+
+    # Multiple return values
+    result = Value(None)
+    Pyjo.IOLoop.subprocess(lambda subprocess: ('♥', [{'two': 2}], 3), lambda subprocess, err, res: result.set(res))
+    Pyjo.IOLoop.start()
+    is_deeply_ok(result.get(), ('♥', [{'two': 2}], 3), 'right structure')
+
+    # Concurrent subprocesses
+    results = []
+
+    def parent_cb(subprocess, err, res):
+        results.append(res)
+
+    Pyjo.IOLoop.subprocess(lambda subprocess: 1, parent_cb)
+    Pyjo.IOLoop.subprocess(lambda subprocess: 2, parent_cb)
+    Pyjo.IOLoop.start()
+    is_deeply_ok(sorted(results), [1, 2], 'right results')
+
+    # Non-zero exit status
+    fail = Value(None)
+    Pyjo.IOLoop.subprocess(lambda subprocess: os._exit(3), lambda subprocess, err, res: fail.set(err))
+    Pyjo.IOLoop.start()
+    isa_ok(fail.get(), Pyjo.IOLoop.Subprocess.Error, 'right error')
+    like_ok(str(fail.get()), r'exited without result', 'right error')
+
+    # Exception
+    fail = Value(None)
+
+    def die(subprocess):
+        raise Exception('Whatever')
+
+    Pyjo.IOLoop.subprocess(die, lambda subprocess, err, res: fail.set(err))
+    Pyjo.IOLoop.start()
+    is_ok(str(fail.get()), 'Whatever', 'right error')
+
+    # Unserializable result
+    fail = Value(None)
+    Pyjo.IOLoop.subprocess(lambda subprocess: lambda: None, lambda subprocess, err, res: fail.set(err))
+    Pyjo.IOLoop.start()
+    like_ok(str(fail.get()), r'^Unable to serialize result', 'right error')
+
+    # Progress
+    progress = []
+    result = Value(None)
+
+    def child_progress(subprocess):
+        subprocess.progress(20)
+        subprocess.progress({'percentage': 45}, 'half')
+        subprocess.progress(90)
+        return 'yay'
+
+    subprocess = Pyjo.IOLoop.Subprocess.new()
+    subprocess.on(lambda subprocess, *data: progress.append(data), 'progress')
+    subprocess.run(child_progress, lambda subprocess, err, res: result.set(res))
+    Pyjo.IOLoop.start()
+    is_deeply_ok(progress, [(20,), ({'percentage': 45}, 'half'), (90,)], 'right progress')
+    is_ok(result.get(), 'yay', 'right result')
+
+    # Spawn event
+    spawned = Value(None)
+    subprocess = Pyjo.IOLoop.Subprocess.new()
+    subprocess.on(lambda subprocess: spawned.set(subprocess.pid), 'spawn')
+    subprocess.run(lambda subprocess: None, lambda subprocess, err, res: None)
+    Pyjo.IOLoop.start()
+    is_ok(spawned.get(), subprocess.pid, 'right process id')
+
+    # Custom serializer
+    result = Value(None)
+    subprocess = Pyjo.IOLoop.Subprocess.new(deserialize=lambda data: json.loads(data.decode('utf-8')),
+                                            serialize=lambda data: json.dumps(data).encode('utf-8'))
+    subprocess.run(lambda subprocess: {'works': True}, lambda subprocess, err, res: result.set(res))
+    Pyjo.IOLoop.start()
+    is_deeply_ok(result.get(), {'works': True}, 'right result')
+
+    done_testing()
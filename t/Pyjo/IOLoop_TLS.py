@@ -0,0 +1,115 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import getenv, setenv
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import Pyjo.IOLoop
+    import Pyjo.IOLoop.TLSCache
+    import Pyjo.UserAgent
+
+    try:
+        import ssl
+    except ImportError:
+        ssl = None
+
+    if not ssl or getenv('PYJO_NO_TLS'):
+        plan_skip_all('ssl required for this test!')
+    if not hasattr(ssl, 'SSLSession'):
+        plan_skip_all('Python 3.6 required for this test!')
+
+    from t.lib.Value import Value
+
+    # Server and client
+    loop = Pyjo.IOLoop.new()
+    server = Value(b'')
+
+    def server_cb(loop, stream, cid):
+        stream.on(lambda stream, chunk: stream.write(b'pong:' + chunk), 'read')
+
+    cid = loop.server(server_cb, address='127.0.0.1', tls=True)
+    acceptor = loop.acceptor(cid)
+    port = acceptor.port
+    context = acceptor._tls_context
+    isa_ok(context, ssl.SSLContext, 'right object')
+
+    def ping(**kwargs):
+        result = Value(None)
+        kwargs.setdefault('address', '127.0.0.1')
+
+        @loop.client(port=port, tls=True, **kwargs)
+        def client_cb(loop, err, stream):
+            if err:
+                result.set((err, None))
+                return loop.stop()
+            handle = stream.handle
+
+            def read_cb(stream, chunk):
+                result.set((chunk, handle.session_reused))
+                stream.close()
+                loop.stop()
+
+            stream.on(read_cb, 'read')
+            stream.write(b'ping')
+
+        loop.start()
+        return result.get()
+
+    is_deeply_ok(ping(), (b'pong:ping', False), 'full handshake')
+    is_deeply_ok(ping(), (b'pong:ping', True), 'session resumed')
+    is_deeply_ok(ping(), (b'pong:ping', True), 'session resumed again')
+    ok(acceptor._tls_context is context, 'same context')
+    is_ok(context.session_stats()['hits'], 2, 'right number of resumed sessions')
+    is_deeply_ok(loop.tls_cache.stats, {'handshakes': 3, 'resumed': 2, 'sessions': 1}, 'right stats')
+    ok(loop.tls_cache.context() is loop.tls_cache.context(), 'context reused')
+
+    # Separate cache
+    cache = Pyjo.IOLoop.TLSCache.new()
+    is_deeply_ok(ping(tls_cache=cache), (b'pong:ping', False), 'full handshake')
+    is_deeply_ok(ping(tls_cache=cache), (b'pong:ping', True), 'session resumed')
+    is_deeply_ok(cache.stats, {'handshakes': 2, 'resumed': 1, 'sessions': 1}, 'right stats')
+
+    # Session resumption disabled
+    cache = Pyjo.IOLoop.TLSCache.new(max_sessions=0)
+    is_deeply_ok(ping(tls_cache=cache), (b'pong:ping', False), 'full handshake')
+    is_deeply_ok(ping(tls_cache=cache), (b'pong:ping', False), 'full handshake')
+    is_deeply_ok(cache.stats, {'handshakes': 2, 'resumed': 0, 'sessions': 0}, 'right stats')
+
+    # Sessions of other contexts
+    cache = Pyjo.IOLoop.TLSCache.new()
+    ping(tls_cache=cache)
+    ok(cache.session('127.0.0.1', port) is not None, 'session cached')
+    ok(cache.session('127.0.0.1', port, cache.context()) is not None, 'session cached for context')
+    is_ok(cache.session('127.0.0.1', port, ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)), None, 'no session')
+    is_ok(cache.session('localhost', port), None, 'no session')
+
+    # Cache size
+    cache = Pyjo.IOLoop.TLSCache.new(max_sessions=1)
+    ping(tls_cache=cache, address='127.0.0.1')
+    ping(tls_cache=cache, address='localhost')
+    is_ok(cache.stats['sessions'], 1, 'right number of sessions')
+    is_ok(cache.session('127.0.0.1', port), None, 'no session')
+    ok(cache.session('localhost', port) is not None, 'session cached')
+
+    # Defaults
+    is_ok(Pyjo.IOLoop.Client.new().tls_cache, Pyjo.IOLoop.singleton.tls_cache, 'right default')
+    isa_ok(Pyjo.UserAgent.new().tls_cache, Pyjo.IOLoop.TLSCache.object, 'right default')
+
+    done_testing()
@@ -0,0 +1,118 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import setenv, steady_time
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import Pyjo.IOLoop
+    import Pyjo.IOLoop.Wheel
+
+    import threading
+
+    from t.lib.Value import Value
+
+    # Defaults
+    wheel = Pyjo.IOLoop.Wheel.new()
+    is_ok(wheel.reactor, Pyjo.IOLoop.singleton.reactor, 'right default')
+    is_ok(wheel.resolution, 0.25, 'right default')
+    is_ok(wheel.slots, 256, 'right default')
+    isa_ok(Pyjo.IOLoop.singleton.wheel, Pyjo.IOLoop.Wheel.object, 'right object')
+
+    # Expire timeouts
+    loop = Pyjo.IOLoop.new()
+    wheel = loop.wheel.set(resolution=0.05, slots=8)
+    expired = Value(0)
+    wheel.timer(lambda wheel: expired.inc(), 0.1)
+    wheel.timer(lambda wheel: expired.inc(), 0.15)
+    removed = wheel.timer(lambda wheel: expired.inc(), 0.1)
+    ok(wheel.remove(removed), 'timeout removed')
+    ok(not wheel.remove(removed), 'timeout already removed')
+    start = steady_time()
+    loop.start()
+    is_ok(expired.get(), 2, 'two timeouts expired')
+    ok(steady_time() - start >= 0.15, 'not expired too early')
+    ok(steady_time() - start < 1, 'stopped automatically')
+
+    # Restart timeout
+    expired = Value(None)
+    key = wheel.timer(lambda wheel: expired.set(steady_time()), 0.2)
+    start = steady_time()
+
+    @loop.recurring(0.05)
+    def again(loop):
+        if steady_time() - start < 0.4:
+            wheel.again(key)
+        else:
+            loop.remove(tid.get())
+
+    tid = Value(again)
+    loop.start()
+    ok(expired.get() - start >= 0.5, 'timeout has been restarted')
+
+    # Timeouts longer than one turn of the wheel
+    expired = Value(None)
+    wheel.timer(lambda wheel: expired.set(steady_time()), 0.7)
+    start = steady_time()
+    loop.start()
+    ok(expired.get() - start >= 0.7, 'long timeout expired')
+    ok(expired.get() - start < 1.5, 'long timeout expired in time')
+
+    # Timeout created by an expiring timeout
+    expired = []
+
+    def first_cb(wheel):
+        expired.append('first')
+        wheel.timer(lambda wheel: expired.append('second'), 0.1)
+
+    wheel.timer(first_cb, 0.1)
+    watchdog = threading.Timer(5, loop.call_soon_threadsafe, (lambda loop: loop.stop(),))
+    watchdog.start()
+    start = steady_time()
+    loop.start()
+    watchdog.cancel()
+    is_deeply_ok(expired, ['first', 'second'], 'both timeouts expired')
+    ok(steady_time() - start < 1, 'event loop stopped automatically')
+
+    # Reset
+    expired = Value(0)
+    wheel.timer(lambda wheel: expired.inc(), 0.05)
+    loop.reset()
+    loop.timer(lambda loop: loop.stop(), 0.2)
+    loop.start()
+    is_ok(expired.get(), 0, 'timeout was removed')
+
+    # Stream inactivity timeout
+    loop = Pyjo.IOLoop.new()
+    loop.wheel.resolution = 0.05
+    timeout = Value(0)
+
+    @loop.server(address='127.0.0.1')
+    def server(loop, stream, cid):
+        is_ok(stream.wheel, loop.wheel, 'stream uses timing wheel')
+        stream.timeout = 0.2
+        stream.on(lambda stream: timeout.inc(), 'timeout')
+        stream.on(lambda stream: loop.stop(), 'close')
+
+    port = loop.acceptor(server).port
+    loop.client(port=port, cb=lambda loop, err, stream: stream.set(timeout=0))
+    loop.start()
+    is_ok(timeout.get(), 1, 'stream timed out')
+
+    done_testing()
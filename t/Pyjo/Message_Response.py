@@ -1016,6 +1016,14 @@ if __name__ == '__main__':
     res.json()['baz'][1] = 4
     is_deeply_ok(res.json('/baz'), [1, 4, 3], 'right result')
 
+    # Parse response from memoryview chunks
+    res = Pyjo.Message.Response.new()
+    res.parse(memoryview(b"HTTP/1.1 200 OK\x0d\x0aContent-Length: 12\x0d\x0a\x0d\x0aHello"))
+    res.parse(memoryview(bytearray(b" World!")))
+    ok(res.is_finished, 'response is finished')
+    is_ok(res.code, 200, 'right status')
+    is_ok(res.body, b'Hello World!', 'right content')
+
     # Parse response and extract HTML
     res = Pyjo.Message.Response.new()
     res.parse(b"HTTP/1.1 200 OK\x0a")
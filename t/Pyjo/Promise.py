@@ -0,0 +1,326 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import setenv
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import Pyjo.IOLoop
+    import Pyjo.Promise
+
+    import sys
+
+    from t.lib.Value import Value
+
+    # Resolved
+    promise = Pyjo.Promise.new()
+    results = []
+    promise.then(lambda *result: results.extend(result))
+    promise.resolve('hello', 'world')
+    is_deeply_ok(results, [], 'not resolved yet')
+    Pyjo.IOLoop.one_tick()
+    is_deeply_ok(results, ['hello', 'world'], 'promise resolved')
+
+    # Already resolved
+    promise = Pyjo.Promise.new().resolve('early')
+    results = []
+    promise.then(lambda *result: results.extend(result), lambda *reason: results.append('fail'))
+    Pyjo.IOLoop.one_tick()
+    is_deeply_ok(results, ['early'], 'promise resolved')
+
+    # Resolved with promise
+    promise = Pyjo.Promise.new().resolve('works')
+    promise2 = Pyjo.Promise.new().resolve(promise)
+    result = Value(None)
+    promise2.then(lambda value: result.set(value))
+    Pyjo.IOLoop.start()
+    is_ok(result.get(), 'works', 'promise followed')
+
+    # Rejected
+    promise = Pyjo.Promise.new()
+    errors = []
+    promise.then(None, lambda *reason: errors.extend(reason))
+    promise.reject('bye', 'world')
+    Pyjo.IOLoop.one_tick()
+    is_deeply_ok(errors, ['bye', 'world'], 'promise rejected')
+
+    # Settled only once
+    promise = Pyjo.Promise.new()
+    results = []
+    promise.then(lambda value: results.append(value), lambda value: results.append('fail'))
+    promise.resolve('first').resolve('second').reject('third')
+    Pyjo.IOLoop.start()
+    is_deeply_ok(results, ['first'], 'promise resolved once')
+    ok(not promise.is_pending, 'promise not pending')
+
+    # Chained
+    promise = Pyjo.Promise.new()
+    result = Value(None)
+    promise.then(lambda value: value + ':1').then(lambda value: Pyjo.Promise.new().resolve(value + ':2')) \
+           .then(lambda value: result.set(value))
+    promise.resolve('test')
+    Pyjo.IOLoop.start()
+    is_ok(result.get(), 'test:1:2', 'chained')
+
+    # Exception in handler
+    promise = Pyjo.Promise.new()
+    errors = []
+
+    def die(value):
+        raise Exception('Whatever')
+
+    promise.then(die).then(lambda value: errors.append('fail')).catch(lambda err: errors.append(str(err)))
+    promise.resolve('test')
+    Pyjo.IOLoop.start()
+    is_deeply_ok(errors, ['Whatever'], 'exception passed along')
+
+    # Catch passes fulfillment value along
+    promise = Pyjo.Promise.new()
+    result = Value(None)
+    promise.catch(lambda err: 'fail').then(lambda value: result.set(value))
+    promise.resolve('pass')
+    Pyjo.IOLoop.start()
+    is_ok(result.get(), 'pass', 'value passed along')
+
+    # Catch recovers
+    promise = Pyjo.Promise.new()
+    result = Value(None)
+    promise.catch(lambda err: 'recovered from ' + err).then(lambda value: result.set(value))
+    promise.reject('error')
+    Pyjo.IOLoop.start()
+    is_ok(result.get(), 'recovered from error', 'recovered')
+
+    # Finally
+    promise = Pyjo.Promise.new()
+    finally_ = Value(0)
+    results = []
+    promise.finally_(lambda: finally_.inc()).then(lambda *result: results.extend(result))
+    promise.resolve('hello', 'world')
+    Pyjo.IOLoop.start()
+    is_ok(finally_.get(), 1, 'finally called')
+    is_deeply_ok(results, ['hello', 'world'], 'result passed along')
+
+    promise = Pyjo.Promise.new()
+    finally_ = Value(0)
+    errors = []
+    promise.finally_(lambda: finally_.inc()).catch(lambda *reason: errors.extend(reason))
+    promise.reject('bye')
+    Pyjo.IOLoop.start()
+    is_ok(finally_.get(), 1, 'finally called')
+    is_deeply_ok(errors, ['bye'], 'reason passed along')
+
+    # All
+    promise = Pyjo.Promise.new()
+    promise2 = Pyjo.Promise.new()
+    promise3 = Pyjo.Promise.new()
+    result = Value(None)
+    Pyjo.Promise.all(promise, promise2, promise3).then(lambda values: result.set(values))
+    promise2.resolve('second')
+    promise3.resolve('third', 'more')
+    promise.resolve('first')
+    Pyjo.IOLoop.start()
+    is_deeply_ok(result.get(), ['first', 'second', ('third', 'more')], 'promises resolved in order')
+
+    promise = Pyjo.Promise.new()
+    promise2 = Pyjo.Promise.new()
+    result = Value(None)
+    error = Value(None)
+    Pyjo.Promise.all(promise, promise2).then(lambda values: result.set(values), lambda err: error.set(err))
+    promise2.reject('second')
+    promise.resolve('first')
+    Pyjo.IOLoop.start()
+    is_ok(result.get(), None, 'not resolved')
+    is_ok(error.get(), 'second', 'rejected')
+
+    result = Value(None)
+    Pyjo.Promise.all().then(lambda values: result.set(values))
+    Pyjo.IOLoop.start()
+    is_deeply_ok(result.get(), [], 'no promises')
+
+    # Race
+    promise = Pyjo.Promise.new()
+    promise2 = Pyjo.Promise.new()
+    result = Value(None)
+    Pyjo.Promise.race(promise, promise2).then(lambda value: result.set(value))
+    promise2.resolve('second')
+    promise.resolve('first')
+    Pyjo.IOLoop.start()
+    is_ok(result.get(), 'second', 'fastest promise won')
+
+    # Any
+    promise = Pyjo.Promise.new()
+    promise2 = Pyjo.Promise.new()
+    result = Value(None)
+    Pyjo.Promise.any(promise, promise2).then(lambda value: result.set(value))
+    promise.reject('first')
+    promise2.resolve('second')
+    Pyjo.IOLoop.start()
+    is_ok(result.get(), 'second', 'first fulfilled promise won')
+
+    promise = Pyjo.Promise.new()
+    promise2 = Pyjo.Promise.new()
+    error = Value(None)
+    Pyjo.Promise.any(promise, promise2).catch(lambda err: error.set(err))
+    promise2.reject('second')
+    promise.reject('first')
+    Pyjo.IOLoop.start()
+    isa_ok(error.get(), Pyjo.Promise.Error, 'right error')
+    is_deeply_ok(error.get().args[0], ['first', 'second'], 'all reasons')
+
+    # Timeout
+    promise = Pyjo.Promise.new().timeout(0.05)
+    error = Value(None)
+    promise.catch(lambda err: error.set(err))
+    Pyjo.IOLoop.start()
+    isa_ok(error.get(), Pyjo.Promise.Timeout, 'right error')
+    is_ok(str(error.get()), 'Promise timeout', 'right message')
+
+    result = Value(None)
+    Pyjo.Promise.race(Pyjo.Promise.timeout(0.05, 'Timeout!'), Pyjo.Promise.new().resolve('fast')) \
+        .then(lambda value: result.set(value))
+    Pyjo.IOLoop.start()
+    is_ok(result.get(), 'fast', 'resolved before timeout')
+
+    promise = Pyjo.Promise.new().timeout(10)
+    promise.resolve('done')
+    ok(not Pyjo.IOLoop.singleton.reactor._timers, 'timer removed')
+
+    # Cancel
+    promise = Pyjo.Promise.new()
+    tid = Pyjo.IOLoop.timer(lambda loop: promise.resolve('fail'), 10)
+    promise.on_cancel(lambda promise: Pyjo.IOLoop.remove(tid))
+    error = Value(None)
+    promise.catch(lambda err: error.set(err))
+    promise.cancel()
+    Pyjo.IOLoop.start()
+    isa_ok(error.get(), Pyjo.Promise.Cancelled, 'right error')
+    ok(not Pyjo.IOLoop.singleton.reactor._timers, 'timer removed')
+
+    # Wait
+    promise = Pyjo.Promise.new()
+    Pyjo.IOLoop.timer(lambda loop: promise.resolve('waited'), 0.05)
+    is_ok(promise.wait(), 'waited', 'right result')
+
+    promise = Pyjo.Promise.new()
+    Pyjo.IOLoop.timer(lambda loop: promise.reject(Exception('Whatever')), 0.05)
+    error = Value(None)
+    try:
+        promise.wait()
+    except Exception as e:
+        error.set(e)
+    is_ok(str(error.get()), 'Whatever', 'right error')
+
+    # Custom event loop
+    loop = Pyjo.IOLoop.new()
+    promise = Pyjo.Promise.new(ioloop=loop)
+    loop.timer(lambda loop: promise.resolve('custom'), 0.05)
+    is_ok(promise.wait(), 'custom', 'right result')
+
+    # Finally with custom event loop
+    loop = Pyjo.IOLoop.new()
+    promise = Pyjo.Promise.new(ioloop=loop)
+    finally_ = Value(0)
+    new = promise.finally_(lambda: finally_.inc()).then(lambda value: value + ' again')
+    is_ok(new.ioloop, loop, 'right event loop')
+    loop.timer(lambda loop: promise.resolve('custom'), 0.05)
+    loop.timer(lambda loop: loop.stop(), 5)
+    is_ok(new.wait(), 'custom again', 'right result')
+    is_ok(finally_.get(), 1, 'finally called')
+
+    # Generator
+    results = []
+
+    def generator(value):
+        promise = Pyjo.Promise.new()
+        Pyjo.IOLoop.timer(lambda loop: promise.resolve(value + ' world'), 0.05)
+        result = yield promise
+        try:
+            yield Pyjo.Promise.new().reject(Exception(result))
+        except Exception as e:
+            results.append(str(e) + '!')
+
+    Pyjo.IOLoop.spawn(generator('hello')).wait()
+    is_deeply_ok(results, ['hello world!'], 'right result')
+
+    # Coroutines
+    if sys.version_info >= (3, 5):
+        exec('''
+async def fetch(value, after):
+    promise = Pyjo.Promise.new()
+    Pyjo.IOLoop.timer(lambda loop: promise.resolve(value), after)
+    return await promise
+
+async def main():
+    results = await Pyjo.Promise.all(Pyjo.IOLoop.spawn(fetch('first', 0.1)), Pyjo.IOLoop.spawn(fetch('second', 0.05)))
+    try:
+        await Pyjo.Promise.timeout(0.01)
+    except Pyjo.Promise.Timeout as e:
+        results.append(str(e))
+    return results
+''')
+        is_deeply_ok(Pyjo.IOLoop.spawn(main()).wait(), ['first', 'second', 'Promise timeout'], 'right results')
+    else:
+        skip('async def requires Python 3.5', 1)
+
+    # Exception in coroutine
+    def die_generator():
+        yield Pyjo.Promise.new().resolve()
+        raise Exception('Whatever')
+
+    error = Value(None)
+    Pyjo.IOLoop.spawn(die_generator()).catch(lambda err: error.set(str(err)))
+    Pyjo.IOLoop.start()
+    is_ok(error.get(), 'Whatever', 'right error')
+
+    # Connect
+    @Pyjo.IOLoop.server(address='127.0.0.1')
+    def server(loop, stream, cid):
+        stream.write(b'hello', lambda stream: stream.close())
+
+    port = Pyjo.IOLoop.acceptor(server).port
+    stream = Pyjo.IOLoop.client_p(address='127.0.0.1', port=port).wait()
+    isa_ok(stream, Pyjo.IOLoop.Stream.object, 'right object')
+    Pyjo.IOLoop.remove(server)
+
+    # Delay
+    delay = Pyjo.IOLoop.delay()
+
+    @delay.step
+    def step1(delay):
+        Pyjo.IOLoop.timer(delay.begin(0), 0.05)
+
+    @delay.step
+    def step2(delay, loop):
+        end = delay.begin(0)
+        end('delay', 'done')
+
+    result = Value(None)
+    delay.promise.then(lambda *args: result.set(args))
+    delay.wait()
+    Pyjo.IOLoop.start()
+    is_deeply_ok(result.get(), ('delay', 'done'), 'right result')
+
+    delay = Pyjo.IOLoop.delay(die)
+    error = Value(None)
+    delay.promise.catch(lambda err: error.set(str(err)))
+    delay.wait()
+    Pyjo.IOLoop.start()
+    is_ok(error.get(), 'Whatever', 'right error')
+
+    done_testing()
@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    try:
+        import asyncio
+    except ImportError:
+        plan_skip_all('asyncio is required for this test!')
+
+    import Pyjo.Reactor.Asyncio
+
+    from Pyjo.Util import setenv, steady_time
+
+    import os
+    import signal
+    import socket
+    import threading
+    import time
+
+    from t.lib.Value import Value
+
+    # Instantiation
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Asyncio')
+    reactor = Pyjo.Reactor.Asyncio.new()
+    is_ok(reactor.__class__.__name__, 'Pyjo_Reactor_Asyncio', 'right object')
+    is_ok(Pyjo.Reactor.Asyncio.new().__class__.__name__, 'Pyjo_Reactor_Asyncio', 'right object')
+    reactor = None
+    is_ok(Pyjo.Reactor.Asyncio.new().__class__.__name__, 'Pyjo_Reactor_Asyncio', 'right object')
+    import Pyjo.IOLoop
+    reactor = Pyjo.IOLoop.singleton.reactor
+    is_ok(reactor.__class__.__name__, 'Pyjo_Reactor_Asyncio', 'right object')
+    is_ok(type(asyncio.get_event_loop_policy()), asyncio.DefaultEventLoopPolicy, 'event loop policy unchanged')
+
+    # Make sure it stops automatically when not watching for events
+    triggered = Value(0)
+    Pyjo.IOLoop.next_tick(lambda reactor: triggered.inc())
+    Pyjo.IOLoop.start()
+    is_ok(triggered.get(), 1, 'reactor waited for one event')
+    t = steady_time()
+    Pyjo.IOLoop.start()
+    Pyjo.IOLoop.one_tick()
+    ok(steady_time() < (t + 10), 'stopped automatically')
+
+    # Listen
+    listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen.bind(('127.0.0.1', 0))
+    listen.listen(5)
+    port = listen.getsockname()[1]
+    readable = Value(0)
+    writable = Value(0)
+    reactor.io(lambda reactor, write: writable.inc() if write else readable.inc(), listen) \
+           .watch(listen, False, False).watch(listen, True, True)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(not readable.get(), 'handle is not readable')
+    ok(not writable.get(), 'handle is not writable')
+
+    # Connect
+    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    client.connect(('127.0.0.1', port))
+    reactor.timer(lambda reactor: reactor.stop(), 1)
+    reactor.start()
+    ok(readable.get(), 'handle is readable')
+    ok(not writable.get(), 'handle is not writable')
+
+    # Accept
+    server, addr = listen.accept()
+    reactor.remove(listen)
+    readable.set(0)
+    writable.set(0)
+    reactor.io(lambda reactor, write: writable.inc() if write else readable.inc(), client)
+    reactor.again(reactor.timer(lambda reactor: reactor.stop(), 0.025))
+    reactor.start()
+    ok(not readable.get(), 'handle is not readable')
+    ok(writable.get(), 'handle is writable')
+    client.send(b"hello!\n")
+    time.sleep(1)
+    reactor.remove(client)
+    readable.set(0)
+    writable.set(0)
+    reactor.io(lambda reactor, write: writable.inc() if write else readable.inc(), server)
+    reactor.watch(server, True, False)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(readable.get(), 'handle is readable')
+    ok(not writable.get(), 'handle is not writable')
+    readable.set(0)
+    writable.set(0)
+    reactor.watch(server, True, True)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(readable.get(), 'handle is readable')
+    ok(writable.get(), 'handle is writable')
+    readable.set(0)
+    writable.set(0)
+    reactor.watch(server, False, False)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(not readable.get(), 'handle is not readable')
+    ok(not writable.get(), 'handle is not writable')
+    readable.set(0)
+    writable.set(0)
+    reactor.watch(server, True, False)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(readable.get(), 'handle is readable')
+    ok(not writable.get(), 'handle is not writable')
+    readable.set(0)
+    writable.set(0)
+    reactor.io(lambda reactor, write: writable.inc() if write else readable.inc(), server)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(readable.get(), 'handle is readable')
+    ok(writable.get(), 'handle is writable')
+
+    # Timers
+    timer = Value(0)
+    recurring = Value(0)
+    reactor.timer(lambda reactor: timer.inc(), 0)
+    reactor.remove(reactor.timer(lambda reactor: timer.inc(), 0))
+    tid = reactor.recurring(lambda reactor: recurring.inc(), 0)
+    readable.set(0)
+    writable.set(0)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(readable.get(), 'handle is readable again')
+    ok(writable.get(), 'handle is writable again')
+    ok(timer.get(), 'timer was triggered')
+    ok(recurring.get(), 'recurring was triggered')
+    done = Value(False)
+    readable.set(0)
+    writable.set(0)
+    timer.set(0)
+    recurring.set(0)
+    reactor.timer(lambda reactor: done.set(reactor.is_running), 0.025)
+    while not done.get():
+        reactor.one_tick()
+    ok(readable.get(), 'handle is readable again')
+    ok(writable.get(), 'handle is writable again')
+    ok(not timer.get(), 'timer was not triggered')
+    ok(recurring.get(), 'recurring was triggered again')
+    readable.set(0)
+    writable.set(0)
+    timer.set(0)
+    recurring.set(0)
+    reactor.timer(lambda reactor: done.set(reactor.stop()), 0.025)
+    reactor.start()
+    ok(readable.get(), 'handle is readable again')
+    ok(writable.get(), 'handle is writable again')
+    ok(not timer.get(), 'timer was not triggered')
+    ok(recurring.get(), 'recurring was triggered again')
+    reactor.remove(tid)
+    readable.set(0)
+    writable.set(0)
+    timer.set(0)
+    recurring.set(0)
+    reactor.timer(lambda reactor: done.set(reactor.stop()), 0.025)
+    reactor.start()
+    ok(readable.get(), 'handle is readable again')
+    ok(writable.get(), 'handle is writable again')
+    ok(not timer.get(), 'timer was not triggered')
+    ok(not recurring.get(), 'recurring was not triggered again')
+    readable.set(0)
+    writable.set(0)
+    timer.set(0)
+    recurring.set(0)
+    tid = reactor.recurring(lambda reactor: recurring.inc(), 0)
+    is_ok(reactor.next_tick(lambda reactor: reactor.stop()), None, 'returned None')
+    reactor.start()
+    ok(readable.get(), 'handle is readable again')
+    ok(writable.get(), 'handle is writable again')
+    ok(not timer.get(), 'timer was not triggered')
+    ok(recurring.get(), 'recurring was triggered again')
+
+    # Reset
+    reactor.reset()
+    readable.set(0)
+    writable.set(0)
+    timer.set(0)
+    recurring.set(0)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(not readable.get(), 'io event was not triggered again')
+    ok(not writable.get(), 'io event was not triggered again')
+    ok(not recurring.get(), 'recurring was not triggered again')
+    reactor2 = Pyjo.Reactor.Asyncio.new()
+    is_ok(reactor2.__class__.__name__, 'Pyjo_Reactor_Asyncio', 'right object')
+
+    # Reset while watchers are active
+    writable = Value(0)
+    for handle in client, server:
+        reactor.io(lambda reactor, write: writable.inc() and reactor.reset(), handle).watch(handle, False, True)
+    reactor.start()
+    is_ok(writable.get(), 1, 'only one handle was writable')
+
+    # Concurrent reactors
+    timer.set(0)
+    reactor.recurring(lambda reactor: timer.inc(), 0)
+    timer2 = Value(0)
+    reactor2.recurring(lambda reactor: timer2.inc(), 0)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(timer.get(), 'timer was triggered')
+    ok(not timer2.get(), 'timer was not triggered')
+    timer.set(0)
+    timer2.set(0)
+    reactor2.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor2.start()
+    ok(not timer.get(), 'timer was not triggered')
+    ok(timer2.get(), 'timer was triggered')
+    timer.set(0)
+    timer2.set(0)
+    reactor.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor.start()
+    ok(timer.get(), 'timer was triggered')
+    ok(not timer2.get(), 'timer was not triggered')
+    timer.set(0)
+    timer2.set(0)
+    reactor2.timer(lambda reactor: reactor.stop(), 0.025)
+    reactor2.start()
+    ok(not timer.get(), 'timer was not triggered')
+    ok(timer2, 'timer was triggered')
+
+    # Restart timer
+    single = Value(0)
+    pair = Value(0)
+    last = Value(0)
+    one = Value(None)
+    two = Value(None)
+    reactor.timer(lambda reactor: single.inc(), 0.025)
+
+    def one_cb(reactor):
+        if single.get() and pair.get():
+            last.inc()
+        if pair.get():
+            pair.inc()
+            reactor.stop()
+        else:
+            pair.inc()
+            reactor.again(two.get())
+
+    one.set(reactor.timer(one_cb, 0.025))
+
+    def two_cb(reactor):
+        if single.get() and pair.get():
+            last.inc()
+        if pair.get():
+            pair.inc()
+            reactor.stop()
+        else:
+            pair.inc()
+            reactor.again(one.get())
+
+    two.set(reactor.timer(two_cb, 0.025))
+
+    reactor.start()
+    is_ok(pair.get(), 2, 'timer pair was triggered')
+    ok(single.get(), 'single timer was triggered')
+    ok(last.get(), 'timers were triggered in the right order')
+
+    # Timer queue
+    fired = []
+    tids = [reactor.timer(lambda reactor, i=i: fired.append(i), 0.01 * (i % 5)) for i in range(200)]
+    for _ in range(3):
+        for tid in tids:
+            reactor.again(tid)
+    for tid in tids[100:]:
+        reactor.remove(tid)
+    reactor.timer(lambda reactor: reactor.stop(), 0.1)
+    reactor.start()
+    is_ok(len(fired), 100, 'removed timers were not triggered')
+    is_deeply_ok(fired, sorted(range(100), key=lambda i: i % 5), 'timers were triggered in the right order')
+
+    # Watch statistics
+    reactor2 = reactor.new()
+    handle, peer = socket.socketpair()
+    events = []
+    reactor2.io(lambda reactor, write: events.append(write) or reactor.stop(), handle)
+    for _ in range(10):
+        reactor2.watch(handle, True, False)
+    is_deeply_ok([reactor2.stats[k] for k in ('watch', 'modify', 'skip')], [11, 2, 9], 'unchanged watchers were skipped')
+    peer.send(b'x')
+    reactor2.timer(lambda reactor: reactor.stop(), 1)
+    reactor2.start()
+    is_deeply_ok(events, [False], 'handle is readable')
+    reactor2.watch(handle, True, True)
+    ok(reactor2.remove(handle), 'handle removed')
+    reactor2.io(lambda reactor, write: events.append(write) or reactor.stop(), handle).watch(handle, False, True)
+    is_deeply_ok([reactor2.stats[k] for k in ('watch', 'modify', 'skip')], [14, 5, 9], 'removed handle was registered again')
+    reactor2.start()
+    is_deeply_ok(events, [False, True], 'handle is writable')
+    reactor2.reset()
+    handle.close()
+    peer.close()
+
+    # Slow callbacks
+    reactor2 = reactor.new(slow=0.05)
+    slow = []
+    reactor2.on(lambda reactor, *args: slow.append(args), 'slow')
+
+    def blocking_cb(reactor):
+        time.sleep(0.3)
+
+    reactor2.timer(blocking_cb, 0)
+    reactor2.timer(lambda reactor: None, 0.01)
+    reactor2.start()
+    is_ok(len(slow), 1, 'one slow callback')
+    is_ok(slow[0][0], '__main__.blocking_cb', 'right name')
+    ok(slow[0][1] >= 0.3, 'right time')
+    in_ok(''.join(slow[0][2]), 'time.sleep(0.3)', 'stack snapshot of blocking callback')
+    stats = reactor2.stats
+    is_ok(stats['slow'], 1, 'slow callback counted')
+    ok(stats['lag_max'] >= 0.2, 'loop lag measured')
+    ok(stats['lag_p50'] <= stats['lag_p99'] <= stats['lag_max'], 'right loop lag percentiles')
+    loop = Pyjo.IOLoop.new(reactor=reactor2)
+    loop.next_tick(lambda loop: time.sleep(0.1))
+    loop.start()
+    is_ok(len(slow), 2, 'two slow callbacks')
+    like_ok(slow[1][0], r'<lambda>$', 'right name of wrapped callback')
+    reactor2.slow = 0
+    loop.next_tick(lambda loop: time.sleep(0.1))
+    loop.start()
+    is_ok(len(slow), 2, 'watchdog disabled')
+    loop = reactor2 = None
+
+    # Thread-safe callbacks
+    reactor2 = reactor.new()
+    called = []
+    tid = reactor2.timer(lambda reactor: reactor.stop(), 5)
+
+    def work():
+        time.sleep(0.1)
+        reactor2.call_soon_threadsafe(lambda reactor: called.append(threading.current_thread()) or reactor.stop())
+
+    threading.Thread(target=work).start()
+    start = steady_time()
+    reactor2.start()
+    is_deeply_ok(called, [threading.current_thread()], 'callback invoked in reactor thread')
+    ok(steady_time() - start < 1, 'reactor has been woken up')
+    reactor2.remove(tid)
+    reactor2.call_soon_threadsafe(lambda reactor: called.append(None))
+    reactor2.start()
+    is_ok(len(called), 2, 'pending callback has been invoked')
+    ok(not reactor2.is_running, 'reactor stopped automatically')
+    reactor2 = None
+
+    # Signals
+    reactor2 = reactor.new()
+    signals = []
+    sid = reactor2.signal(lambda reactor, signum: signals.append(signum) or reactor.stop(), signal.SIGUSR1)
+    tid = reactor2.timer(lambda reactor: reactor.stop(), 5)
+    threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGUSR1)).start()
+    start = steady_time()
+    reactor2.start()
+    is_deeply_ok(signals, [signal.SIGUSR1], 'signal received')
+    ok(steady_time() - start < 1, 'reactor has been woken up')
+    ok(reactor2.remove(sid), 'signal removed')
+    ok(not reactor2.remove(sid), 'signal already removed')
+    is_ok(signal.getsignal(signal.SIGUSR1), signal.SIG_DFL, 'previous signal handler restored')
+    reactor2.remove(tid)
+    reactor2 = None
+
+    # Error
+    err = Value('')
+
+    def error_cb(reactor, e, event):
+        reactor.stop()
+        err.set(e)
+
+    reactor.unsubscribe('error').on(error_cb, 'error')
+
+    def die_cb(reactor):
+        raise Exception('works!')
+
+    reactor.timer(die_cb, 0)
+    reactor.start()
+
+    in_ok(err.get().args[0], 'works!', 'right error')
+
+    # Recursion
+    timer = Value(0)
+    reactor = reactor.new()
+    reactor.timer(lambda reactor: timer.inc() and reactor.one_tick(), 0)
+    reactor.one_tick()
+    is_ok(timer.get(), 1, 'timer was triggered once')
+
+    # Detection
+    is_ok(Pyjo.Reactor.Base.detect(), 'Pyjo.Reactor.Asyncio', 'right class')
+
+    setenv('PYJO_REACTOR', 't.lib.TestReactor')
+
+    # Detection (env)
+    is_ok(Pyjo.Reactor.Base.detect(), 't.lib.TestReactor', 'right class')
+
+    # Reactor in control
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Asyncio')
+
+    is_ok(Pyjo.IOLoop.singleton.reactor.__class__.__name__, 'Pyjo_Reactor_Asyncio', 'right object')
+    ok(not Pyjo.IOLoop.is_running(), 'loop is not running')
+    buf = Value('')
+    server_err = Value('')
+    server_running = Value(False)
+    client_err = Value('')
+    client_running = Value(False)
+
+    @Pyjo.IOLoop.server(address='127.0.0.1')
+    def server(loop, stream, cid):
+        stream.write(b'test', lambda stream: stream.write(b'321'))
+        server_running.set(Pyjo.IOLoop.is_running())
+        try:
+            Pyjo.IOLoop.start()
+        except Exception as ex:
+            server_err.set(ex.args[0])
+
+    port = Pyjo.IOLoop.acceptor(server).port
+
+    @Pyjo.IOLoop.client(port=port)
+    def client(loop, err, stream):
+
+        @stream.on
+        def read(stream, chunk):
+            buf.set(buf.get() + chunk)
+            if buf.get() == b'test321':
+                Pyjo.IOLoop.singleton.reactor.stop()
+
+        client_running.set(Pyjo.IOLoop.is_running())
+        try:
+            Pyjo.IOLoop.start()
+        except Exception as ex:
+            client_err.set(ex.args[0])
+
+    Pyjo.IOLoop.singleton.reactor.start()
+    ok(not Pyjo.IOLoop.is_running(), 'loop is not running')
+    in_ok(server_err.get(), 'Pyjo.IOLoop already running', 'right error')
+    in_ok(client_err.get(), 'Pyjo.IOLoop already running', 'right error')
+    ok(server_running.get(), 'loop is running')
+    ok(client_running.get(), 'loop is running')
+
+    # Shared event loop
+    aloop = asyncio.new_event_loop()
+    reactor = Pyjo.Reactor.Asyncio.new(loop=aloop)
+    is_ok(reactor.loop, aloop, 'right loop')
+    running = Value(None)
+    reactor.timer(lambda reactor: running.set(reactor.is_running), 0.01)
+    aloop.run_until_complete(asyncio.sleep(0.1))
+    ok(running.get(), 'timer was triggered by asyncio event loop')
+    reactor.reset()
+    aloop.close()
+
+    done_testing()
@@ -20,7 +20,10 @@ if __name__ == '__main__':
 
     from Pyjo.Util import setenv, steady_time
 
+    import os
+    import signal
     import socket
+    import threading
     import time
 
     from t.lib.Value import Value
@@ -263,6 +266,108 @@ if __name__ == '__main__':
     ok(single.get(), 'single timer was triggered')
     ok(last.get(), 'timers were triggered in the right order')
 
+    # Timer queue
+    fired = []
+    tids = [reactor.timer(lambda reactor, i=i: fired.append(i), 0.01 * (i % 5)) for i in range(200)]
+    for _ in range(3):
+        for tid in tids:
+            reactor.again(tid)
+    for tid in tids[100:]:
+        reactor.remove(tid)
+    reactor.timer(lambda reactor: reactor.stop(), 0.1)
+    reactor.start()
+    is_ok(len(fired), 100, 'removed timers were not triggered')
+    is_deeply_ok(fired, sorted(range(100), key=lambda i: i % 5), 'timers were triggered in the right order')
+
+    # Watch statistics
+    reactor2 = reactor.new()
+    handle, peer = socket.socketpair()
+    events = []
+    reactor2.io(lambda reactor, write: events.append(write) or reactor.stop(), handle)
+    for _ in range(10):
+        reactor2.watch(handle, True, False)
+    is_deeply_ok([reactor2.stats[k] for k in ('watch', 'modify', 'skip')], [11, 2, 9], 'unchanged watchers were skipped')
+    peer.send(b'x')
+    reactor2.timer(lambda reactor: reactor.stop(), 1)
+    reactor2.start()
+    is_deeply_ok(events, [False], 'handle is readable')
+    reactor2.watch(handle, True, True)
+    ok(reactor2.remove(handle), 'handle removed')
+    reactor2.io(lambda reactor, write: events.append(write) or reactor.stop(), handle).watch(handle, False, True)
+    is_deeply_ok([reactor2.stats[k] for k in ('watch', 'modify', 'skip')], [14, 5, 9], 'removed handle was registered again')
+    reactor2.start()
+    is_deeply_ok(events, [False, True], 'handle is writable')
+    reactor2.reset()
+    handle.close()
+    peer.close()
+
+    # Slow callbacks
+    reactor2 = reactor.new(slow=0.05)
+    slow = []
+    reactor2.on(lambda reactor, *args: slow.append(args), 'slow')
+
+    def blocking_cb(reactor):
+        time.sleep(0.3)
+
+    reactor2.timer(blocking_cb, 0)
+    reactor2.timer(lambda reactor: None, 0.01)
+    reactor2.start()
+    is_ok(len(slow), 1, 'one slow callback')
+    is_ok(slow[0][0], '__main__.blocking_cb', 'right name')
+    ok(slow[0][1] >= 0.3, 'right time')
+    in_ok(''.join(slow[0][2]), 'time.sleep(0.3)', 'stack snapshot of blocking callback')
+    stats = reactor2.stats
+    is_ok(stats['slow'], 1, 'slow callback counted')
+    ok(stats['lag_max'] >= 0.2, 'loop lag measured')
+    ok(stats['lag_p50'] <= stats['lag_p99'] <= stats['lag_max'], 'right loop lag percentiles')
+    loop = Pyjo.IOLoop.new(reactor=reactor2)
+    loop.next_tick(lambda loop: time.sleep(0.1))
+    loop.start()
+    is_ok(len(slow), 2, 'two slow callbacks')
+    like_ok(slow[1][0], r'<lambda>$', 'right name of wrapped callback')
+    reactor2.slow = 0
+    loop.next_tick(lambda loop: time.sleep(0.1))
+    loop.start()
+    is_ok(len(slow), 2, 'watchdog disabled')
+    loop = reactor2 = None
+
+    # Thread-safe callbacks
+    reactor2 = reactor.new()
+    called = []
+    tid = reactor2.timer(lambda reactor: reactor.stop(), 5)
+
+    def work():
+        time.sleep(0.1)
+        reactor2.call_soon_threadsafe(lambda reactor: called.append(threading.current_thread()) or reactor.stop())
+
+    threading.Thread(target=work).start()
+    start = steady_time()
+    reactor2.start()
+    is_deeply_ok(called, [threading.current_thread()], 'callback invoked in reactor thread')
+    ok(steady_time() - start < 1, 'reactor has been woken up')
+    reactor2.remove(tid)
+    reactor2.call_soon_threadsafe(lambda reactor: called.append(None))
+    reactor2.start()
+    is_ok(len(called), 2, 'pending callback has been invoked')
+    ok(not reactor2.is_running, 'reactor stopped automatically')
+    reactor2 = None
+
+    # Signals
+    reactor2 = reactor.new()
+    signals = []
+    sid = reactor2.signal(lambda reactor, signum: signals.append(signum) or reactor.stop(), signal.SIGUSR1)
+    tid = reactor2.timer(lambda reactor: reactor.stop(), 5)
+    threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGUSR1)).start()
+    start = steady_time()
+    reactor2.start()
+    is_deeply_ok(signals, [signal.SIGUSR1], 'signal received')
+    ok(steady_time() - start < 1, 'reactor has been woken up')
+    ok(reactor2.remove(sid), 'signal removed')
+    ok(not reactor2.remove(sid), 'signal already removed')
+    is_ok(signal.getsignal(signal.SIGUSR1), signal.SIG_DFL, 'previous signal handler restored')
+    reactor2.remove(tid)
+    reactor2 = None
+
     # Error
     err = Value('')
 
@@ -0,0 +1,108 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import setenv
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import Pyjo.IOLoop
+    import Pyjo.Server.Daemon
+
+    import re
+
+    from Pyjo.Util import b
+
+    zero_copy = []
+
+    def pipeline(daemon, requests, finish=None):
+        loop = daemon.ioloop
+        writes = []
+        response = bytearray()
+        finished = []
+
+        daemon.unsubscribe('request')
+
+        @daemon.on
+        def request(daemon, tx):
+            stream = loop.stream(tx.connection)
+            zero_copy.append(stream.zero_copy)
+            if not stream.has_subscribers('write'):
+                stream.on(lambda stream, chunk: writes.append(chunk), 'write')
+            if finish:
+                tx.on(lambda tx: finished.append(tx.req.url.path.to_str()), 'finish')
+            tx.res.code = 200
+            tx.res.body = b('Hello {0}!'.format(tx.req.url.path))
+            if tx.req.url.path == '/delayed':
+                return loop.timer(lambda loop: tx.resume(), 0.1)
+            tx.resume()
+
+        daemon.start()
+        port = loop.acceptor(daemon.acceptors[0]).port
+
+        @loop.client(address='127.0.0.1', port=port)
+        def client(loop, err, stream):
+            stream.on(lambda stream, chunk: response.extend(chunk), 'read')
+            stream.on(lambda stream: loop.stop(), 'close')
+            stream.write(b''.join(b('GET {0} HTTP/1.1\x0d\x0aHost: 127.0.0.1\x0d\x0a\x0d\x0a'.format(path))
+                                  for path in requests))
+
+        loop.timer(lambda loop: loop.stop(), 5)
+        loop.start()
+        daemon.stop()
+        return writes, bytes(response), finished
+
+    # Pipelined requests answered with one write
+    daemon = Pyjo.Server.Daemon.new(ioloop=Pyjo.IOLoop.new(), listen=['http://127.0.0.1'])
+    daemon.max_requests = 3
+    daemon.silent = True
+    writes, response, finished = pipeline(daemon, ['/one', '/two', '/three'])
+    is_deeply_ok(re.findall(br'Hello (\S+)!', response), [b'/one', b'/two', b'/three'], 'right order')
+    is_ok(response.count(b'HTTP/1.1 200 OK'), 3, 'three responses')
+    is_ok(response.count(b'Connection: close'), 1, 'last response closes connection')
+    is_ok(len(writes), 1, 'one write')
+    is_ok(b''.join(writes), response, 'everything has been written')
+    is_deeply_ok(zero_copy, [True, True, True], 'requests read without copies')
+
+    # Pipelined requests with "finish" event
+    daemon = Pyjo.Server.Daemon.new(ioloop=Pyjo.IOLoop.new(), listen=['http://127.0.0.1'])
+    daemon.max_requests = 4
+    daemon.silent = True
+    writes, response, finished = pipeline(daemon, ['/one', '/two', '/three', '/four'], finish=True)
+    is_deeply_ok(re.findall(br'Hello (\S+)!', response), [b'/one', b'/two', b'/three', b'/four'], 'right order')
+    is_ok(len(writes), 1, 'one write')
+    is_deeply_ok(finished, ['/one', '/two', '/three', '/four'], 'all transactions finished in order')
+
+    # Pipelined requests with delayed response
+    daemon = Pyjo.Server.Daemon.new(ioloop=Pyjo.IOLoop.new(), listen=['http://127.0.0.1'])
+    daemon.max_requests = 4
+    daemon.silent = True
+    writes, response, finished = pipeline(daemon, ['/one', '/delayed', '/three', '/four'], finish=True)
+    is_deeply_ok(re.findall(br'Hello (\S+)!', response), [b'/one', b'/delayed', b'/three', b'/four'], 'right order')
+    is_ok(len(writes), 2, 'two writes')
+    is_deeply_ok(finished, ['/one', '/delayed', '/three', '/four'], 'all transactions finished in order')
+
+    # More pipelined requests than allowed
+    daemon = Pyjo.Server.Daemon.new(ioloop=Pyjo.IOLoop.new(), listen=['http://127.0.0.1'])
+    daemon.max_requests = 2
+    daemon.silent = True
+    writes, response, finished = pipeline(daemon, ['/one', '/two', '/three'])
+    is_deeply_ok(re.findall(br'Hello (\S+)!', response), [b'/one', b'/two'], 'right order')
+    is_ok(response.count(b'Connection: close'), 1, 'last response closes connection')
+
+    done_testing()
@@ -0,0 +1,192 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import setenv
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import os
+
+    if not hasattr(os, 'fork'):
+        plan_skip_all('fork required for this test!')
+
+    import Pyjo.IOLoop
+    import Pyjo.IOLoop.Server
+    import Pyjo.Server.Daemon
+    import Pyjo.Server.Hypnotoad
+
+    import shutil
+    import signal
+    import socket
+    import subprocess
+    import sys
+    import tempfile
+    import time
+
+    tempdir = tempfile.mkdtemp()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path), PYJO_HYPNOTOAD_FOREGROUND='1')
+    for name in 'PYJO_REUSE', 'PYJO_HYPNOTOAD_PID', 'PYJO_HYPNOTOAD_REV', 'PYJO_HYPNOTOAD_EXE':
+        env.pop(name, None)
+
+    def get(port, path='/'):
+        response = b''
+        try:
+            handle = socket.create_connection(('127.0.0.1', port))
+            handle.sendall('GET {0} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.format(path)
+                           .encode('ascii'))
+            while True:
+                chunk = handle.recv(65536)
+                if not chunk:
+                    break
+                response += chunk
+            handle.close()
+        except socket.error:
+            return None
+        return response.partition(b'\r\n\r\n')[2].decode('ascii')
+
+    def wait_for(cb, timeout=20):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            result = cb()
+            if result:
+                return result
+            time.sleep(0.1)
+
+    def write_script(version, port):
+        with open(script, 'w') as f:
+            f.write('''
+import os
+import sys
+
+import Pyjo.Server.Hypnotoad
+
+hypnotoad = Pyjo.Server.Hypnotoad.new()
+prefork = hypnotoad.prefork
+prefork.set(heartbeat_interval=0.1, listen=['http://127.0.0.1:{1}'], pid_file=sys.argv[1], silent=True, workers=2)
+prefork.app.log.level = 'fatal'
+prefork.unsubscribe('request')
+
+
+@prefork.on
+def request(prefork, tx):
+    tx.res.code = 200
+    tx.res.body = '{0}:{{0}}'.format(os.getppid()).encode('ascii')
+    tx.resume()
+
+
+hypnotoad.run()
+'''.format(version, port))
+
+    # Use already prepared listen socket
+    listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen.bind(('127.0.0.1', 0))
+    port = listen.getsockname()[1]
+    loop = Pyjo.IOLoop.new()
+    daemon = Pyjo.Server.Daemon.new(ioloop=loop, listen=['http://127.0.0.1:{0}?fd={1}'.format(port, listen.fileno())])
+    daemon.silent = True
+    daemon.app.log.level = 'fatal'
+    daemon.start()
+    is_ok(loop.acceptor(daemon.acceptors[0]).port, port, 'right port')
+    daemon.stop()
+    listen.close()
+
+    # Socket activation
+    listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen.bind(('127.0.0.1', 0))
+    listen.listen(5)
+    port = listen.getsockname()[1]
+    daemon = Pyjo.Server.Daemon.new(listen=['http://127.0.0.1:{0}'.format(port), 'http://*:1'])
+    setenv('LISTEN_FDS', '1')
+    setenv('LISTEN_PID', str(os.getpid()))
+    fd = os.dup(3) if os.path.exists('/proc/self/fd/3') else None
+    os.dup2(listen.fileno(), 3)
+    is_ok(daemon._listen_options(daemon.listen[0])[1].get('fd'), 3, 'socket picked up')
+    is_ok(daemon._listen_options(daemon.listen[1])[1].get('fd'), None, 'no socket for other port')
+    setenv('LISTEN_PID', '1')
+    is_ok(daemon._listen_options(daemon.listen[0])[1].get('fd'), None, 'socket for other process')
+    if fd is None:
+        os.close(3)
+    else:
+        os.dup2(fd, 3)
+        os.close(fd)
+    setenv('LISTEN_FDS', None)
+    setenv('LISTEN_PID', None)
+    listen.close()
+
+    # Start server
+    script = os.path.join(tempdir, 'myapp.py')
+    pid_file = os.path.join(tempdir, 'hypnotoad.pid')
+    port = Pyjo.IOLoop.Server.generate_port()
+    write_script(1, port)
+    manager = subprocess.Popen([sys.executable, script, pid_file], env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    body = wait_for(lambda: get(port))
+    is_ok(body, '1:{0}'.format(manager.pid), 'right manager')
+    is_ok(Pyjo.Server.Hypnotoad.new().prefork.set(pid_file=pid_file).check_pid(), manager.pid, 'right process id')
+
+    # Request in progress
+    slow = socket.create_connection(('127.0.0.1', port))
+    slow.sendall(b'GET /slow HTTP/1.1\r\nHost: 127.0.0.1\r\n')
+    time.sleep(0.2)
+
+    # Hot deployment
+    write_script(2, port)
+    output = subprocess.check_output([sys.executable, script, pid_file], env=env)
+    is_ok(output.decode('ascii'), 'Starting hot deployment for Hypnotoad server {0}.\n'.format(manager.pid),
+          'right output')
+    body = wait_for(lambda: (get(port) or '').startswith('2:') and get(port))
+    ok(body, 'new version deployed')
+    new = int(body.split(':')[1])
+    ok(new != manager.pid, 'new manager')
+    slow.sendall(b'Connection: close\r\n\r\n')
+    response = b''
+    while True:
+        chunk = slow.recv(65536)
+        if not chunk:
+            break
+        response += chunk
+    slow.close()
+    ok(response.endswith('1:{0}'.format(manager.pid).encode('ascii')), 'request in progress finished by old version')
+    is_ok(manager.wait(20), 0, 'old manager stopped')
+    is_ok(wait_for(lambda: Pyjo.Server.Prefork.new(pid_file=pid_file).check_pid()), new, 'right process id')
+    is_ok(get(port), '2:{0}'.format(new), 'right manager')
+
+    # Stop server
+    os.kill(new, signal.SIGTERM)
+    ok(wait_for(lambda: get(port) is None), 'server stopped')
+
+    shutil.rmtree(tempdir)
+
+    # Listen sockets survive exec without os.set_inheritable
+    import fcntl
+    listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    fd = listen.fileno()
+    fcntl.fcntl(fd, fcntl.F_SETFD, fcntl.fcntl(fd, fcntl.F_GETFD) | fcntl.FD_CLOEXEC)
+    set_inheritable = getattr(os, 'set_inheritable', None)
+    if set_inheritable:
+        del os.set_inheritable
+    try:
+        Pyjo.Server.Hypnotoad._set_inheritable(fd)
+    finally:
+        if set_inheritable:
+            os.set_inheritable = set_inheritable
+    ok(not fcntl.fcntl(fd, fcntl.F_GETFD) & fcntl.FD_CLOEXEC, 'close-on-exec flag cleared')
+    listen.close()
+
+    done_testing()
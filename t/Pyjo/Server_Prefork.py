@@ -0,0 +1,240 @@
+# coding: utf-8
+
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    from Pyjo.Util import setenv
+
+    setenv('PYJO_REACTOR', 'Pyjo.Reactor.Select')
+    setenv('PYJO_REACTOR_DIE', '1')
+
+    import os
+
+    if not hasattr(os, 'fork'):
+        plan_skip_all('fork required for this test!')
+
+    import Pyjo.IOLoop.Server
+    import Pyjo.Server.Prefork
+    import Pyjo.URL
+
+    import shutil
+    import signal
+    import socket
+    import tempfile
+
+    from Pyjo.Util import b
+
+    tempdir = tempfile.mkdtemp()
+
+    def get(port, path='/'):
+        handle = socket.create_connection(('127.0.0.1', port))
+        handle.sendall(b('GET {0} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.format(path)))
+        response = b''
+        while True:
+            chunk = handle.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+        handle.close()
+        return response
+
+    # Manage and clean up PID file
+    pid_file = os.path.join(tempdir, 'pid')
+    prefork = Pyjo.Server.Prefork.new(pid_file=pid_file)
+    prefork.app.log.level = 'fatal'
+    is_ok(prefork.check_pid(), None, 'no process id')
+    prefork.ensure_pid_file(-23)
+    ok(os.path.exists(pid_file), 'file exists')
+    with open(pid_file) as f:
+        is_ok(f.read(), '-23\n', 'right process id')
+    is_ok(prefork.check_pid(), None, 'no process id')
+    ok(not os.path.exists(pid_file), 'file has been cleaned up')
+    prefork.ensure_pid_file(os.getpid())
+    is_ok(prefork.check_pid(), os.getpid(), 'right process id')
+    os.unlink(pid_file)
+
+    # Multiple workers and graceful shutdown
+    port = Pyjo.IOLoop.Server.generate_port()
+    prefork = Pyjo.Server.Prefork.new(heartbeat_interval=0.1, listen=['http://*:{0}'.format(port)], pid_file=pid_file,
+                                      workers=2)
+    prefork.silent = True
+    prefork.app.log.level = 'fatal'
+    is_ok(prefork.workers, 2, 'start with two workers')
+    events = {'spawn': [], 'reap': [], 'heartbeat': [], 'finish': [], 'wait': 0}
+    responses = []
+    pids = []
+
+    @prefork.on
+    def spawn(prefork, pid):
+        events['spawn'].append(pid)
+
+    @prefork.on
+    def reap(prefork, pid):
+        events['reap'].append(pid)
+
+    @prefork.on
+    def finish(prefork, graceful):
+        events['finish'].append(graceful)
+
+    @prefork.on
+    def wait(prefork):
+        events['wait'] += 1
+
+    @prefork.on
+    def heartbeat(prefork, pid):
+        events['heartbeat'].append(pid)
+        if responses or prefork.healthy < prefork.workers:
+            return
+        pids.append(prefork.check_pid())
+        responses.append(get(port))
+        responses.append(get(port))
+        os.kill(os.getpid(), signal.SIGQUIT)
+
+    prefork.run()
+    is_ok(len(responses), 2, 'two responses')
+    ok(responses[0].startswith(b'HTTP/1.1 200 OK'), 'right status')
+    ok(responses[0].endswith(b'Hello, world!\n'), 'right content')
+    ok(responses[1].endswith(b'Hello, world!\n'), 'right content')
+    is_deeply_ok(pids, [os.getpid()], 'right process id')
+    is_ok(len(events['spawn']), 2, 'two workers spawned')
+    is_deeply_ok(sorted(events['reap']), sorted(events['spawn']), 'all workers reaped')
+    ok(set(events['heartbeat']) <= set(events['spawn']), 'heartbeats from workers')
+    ok(events['wait'] > 0, 'waited for heartbeats')
+    is_deeply_ok(events['finish'], [True], 'graceful shutdown')
+    is_ok(prefork.healthy, 0, 'no healthy workers')
+    ok(not os.path.exists(pid_file), 'PID file has been removed')
+
+    # Immediate shutdown (and single pass request parser)
+    prefork = Pyjo.Server.Prefork.new(fast_parse=True, heartbeat_interval=0.1, listen=['http://127.0.0.1'],
+                                      pid_file=pid_file, workers=1)
+    prefork.silent = True
+    prefork.app.log.level = 'fatal'
+    reaped = []
+    prefork.on(lambda prefork, pid: reaped.append(pid), 'reap')
+    prefork.on(lambda prefork, graceful: reaped.append(graceful), 'finish')
+
+    def heartbeat_cb(prefork, pid):
+        if not reaped:
+            responses.append(get(Pyjo.URL.new(prefork.listen[0]).port))
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    prefork.on(heartbeat_cb, 'heartbeat')
+
+    prefork.run()
+    ok(responses[-1].endswith(b'Hello, world!\n'), 'right content with random port')
+    is_ok(len(reaped), 2, 'worker reaped')
+    is_ok(reaped[0], False, 'not graceful')
+
+    # Replace workers after accepting connections
+    port = Pyjo.IOLoop.Server.generate_port()
+    prefork = Pyjo.Server.Prefork.new(accepts=1, heartbeat_interval=0.1, listen=['http://*:{0}'.format(port)],
+                                      pid_file=pid_file, workers=1)
+    prefork.silent = True
+    prefork.app.log.level = 'fatal'
+    spawned = []
+    prefork.on(lambda prefork, pid: spawned.append(pid), 'spawn')
+    requested = []
+
+    def heartbeat_cb(prefork, pid):
+        if len(spawned) > 2:
+            return os.kill(os.getpid(), signal.SIGQUIT)
+        if pid not in requested:
+            requested.append(pid)
+            responses.append(get(port))
+
+    prefork.on(heartbeat_cb, 'heartbeat')
+
+    prefork.run()
+    ok(len(spawned) > 2, 'workers have been replaced')
+    ok(responses[-1].endswith(b'Hello, world!\n'), 'right content')
+
+    # Replace workers using too much memory
+    prefork = Pyjo.Server.Prefork.new(heartbeat_interval=0.1, listen=['http://127.0.0.1'], max_memory=1,
+                                      pid_file=pid_file, workers=1)
+    prefork.silent = True
+    prefork.app.log.level = 'fatal'
+    spawned = []
+    prefork.on(lambda prefork, pid: spawned.append(pid), 'spawn')
+
+    def heartbeat_cb(prefork, pid):
+        if len(spawned) > 2:
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    prefork.on(heartbeat_cb, 'heartbeat')
+
+    prefork.run()
+    ok(len(spawned) > 2, 'workers have been replaced')
+
+    # Autoscaling decisions
+    prefork = Pyjo.Server.Prefork.new(max_workers=3, scale_interval=0, workers=2)
+    prefork.app.log.level = 'fatal'
+    prefork._pool = {1: {'load': (0.9, 1, 0.01)}, 2: {'load': (0.8, 2, 0.01)}}
+    prefork._scale()
+    is_ok(prefork.workers, 3, 'one more worker for busy event loops')
+    prefork._scale()
+    is_ok(prefork.workers, 3, 'waiting for new worker to report')
+    prefork._pool[3] = {'load': (0.9, 0, 0.0)}
+    prefork._scale()
+    is_ok(prefork.workers, 3, 'not more than maximum')
+    prefork._pool = {1: {'load': (0.3, 1, 0.01)}, 2: {'load': (0.3, 1, 0.01)}, 3: {'load': (0.3, 1, 0.01)}}
+    prefork._scale()
+    is_ok(prefork.workers, 2, 'one worker less for idle event loops')
+    is_ok(len([w for w in prefork._pool.values() if w.get('graceful')]), 1, 'one worker stopping gracefully')
+    prefork._pool = {1: {'load': (0.4, 1, 0.01)}, 2: {'load': (0.4, 1, 0.01)}}
+    prefork._scale()
+    is_ok(prefork.workers, 2, 'remaining worker would be too busy')
+    prefork.max_latency = 0.005
+    prefork._scale()
+    is_ok(prefork.workers, 3, 'one more worker for slow requests')
+    prefork = Pyjo.Server.Prefork.new(max_workers=3, scale_interval=0, workers=1)
+    prefork.app.log.level = 'fatal'
+    prefork.ioloop.max_connections = 10
+    prefork._pool = {1: {'load': (0.1, 8, 0.0)}}
+    prefork._scale()
+    is_ok(prefork.workers, 2, 'one more worker for many connections')
+    prefork._pool = {1: {'load': (0.1, 2, 0.0)}, 2: {'load': (0.1, 2, 0.0)}}
+    prefork._scale()
+    is_ok(prefork.workers, 1, 'one worker less for few connections')
+    prefork._pool = {1: {'load': (0.1, 8, 0.0)}}
+    prefork.scale_interval = 60
+    prefork._scale()
+    is_ok(prefork.workers, 1, 'no decision before interval has passed')
+
+    # Autoscaling with reported load
+    port = Pyjo.IOLoop.Server.generate_port()
+    prefork = Pyjo.Server.Prefork.new(heartbeat_interval=0.1, listen=['http://*:{0}'.format(port)], max_workers=2,
+                                      pid_file=pid_file, scale_interval=0, target_utilization=1, workers=2)
+    prefork.silent = True
+    prefork.app.log.level = 'fatal'
+    loads = []
+
+    def heartbeat_cb(prefork, pid):
+        w = prefork._pool[pid]
+        if 'load' in w and not loads:
+            get(port)
+            loads.append(w['load'])
+        if prefork.workers < 2:
+            os.kill(os.getpid(), signal.SIGQUIT)
+
+    prefork.on(heartbeat_cb, 'heartbeat')
+
+    prefork.run()
+    ok(loads and 0 <= loads[0][0] <= 1, 'utilization reported')
+    is_ok(prefork.workers, 1, 'workers have been decreased')
+
+    shutil.rmtree(tempdir)
+
+    done_testing()
@@ -0,0 +1,57 @@
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    # Usage:
+    #
+    #   python test.py t/bench
+    #   PYJO_BENCH_REQUESTS=50000 PYJO_BENCH_BASELINE=before.json python test.py t/bench
+
+    from Pyjo.Util import getenv
+
+    import json
+    import os
+    import runpy
+
+    bench = runpy.run_path(os.path.join(os.path.dirname(__file__), '..', '..', 'examples', 'parser_benchmark.py'))
+
+    n = int(getenv('PYJO_BENCH_REQUESTS', 1000))
+    tolerance = float(getenv('PYJO_BENCH_TOLERANCE', 0.2))
+
+    baseline = {}
+    if getenv('PYJO_BENCH_BASELINE'):
+        with open(getenv('PYJO_BENCH_BASELINE')) as f:
+            for result in json.load(f):
+                baseline[(result['parser'], result['request'])] = result
+
+    for request in sorted(bench['REQUESTS']):
+        headers = set()
+        for name in bench['PARSERS']:
+            result = bench['run'](name, request, n)
+            diag('{0} {1}: {2:.0f} req/s, cpu {3:.2f}s'.format(name, request, result['requests_per_sec'],
+                                                               result['cpu']))
+            ok(result['finished'], '{0} {1} parsed'.format(name, request))
+            headers.add(result['headers'])
+
+            before = baseline.get((name, request))
+            if before and 'requests_per_sec' in before:
+                ok(result['requests_per_sec'] >= before['requests_per_sec'] * (1 - tolerance),
+                   '{0} {1} not slower than baseline'.format(name, request))
+            else:
+                pass_ok('{0} {1} has no baseline'.format(name, request))
+
+        is_ok(len(headers), 1, '{0} same headers with all parsers'.format(request))
+
+    done_testing()
@@ -0,0 +1,66 @@
+import Pyjo.Test
+
+
+class NoseTest(Pyjo.Test.NoseTest):
+    script = __file__
+    srcdir = '../..'
+
+
+class UnitTest(Pyjo.Test.UnitTest):
+    script = __file__
+
+
+if __name__ == '__main__':
+
+    from Pyjo.Test import *  # noqa
+
+    # Usage:
+    #
+    #   python test.py t/bench
+    #   PYJO_BENCH_SCALE=1 PYJO_BENCH_BASELINE=before.json python test.py t/bench
+
+    from Pyjo.Util import getenv
+
+    import json
+    import os
+    import random
+    import runpy
+
+    bench = runpy.run_path(os.path.join(os.path.dirname(__file__), '..', '..', 'examples', 'reactor_benchmark.py'))
+
+    scale = float(getenv('PYJO_BENCH_SCALE', 0.01))
+    duration = float(getenv('PYJO_BENCH_DURATION', 0.2))
+    tolerance = float(getenv('PYJO_BENCH_TOLERANCE', 0.2))
+
+    baseline = {}
+    if getenv('PYJO_BENCH_BASELINE'):
+        with open(getenv('PYJO_BENCH_BASELINE')) as f:
+            for result in json.load(f):
+                baseline[(result['reactor'], result['workload'])] = result
+
+    random.seed(0)
+
+    for name in bench['REACTORS']:
+        if not bench['available'](name):
+            skip('{0} not available'.format(name), len(bench['WORKLOADS']) * 3)
+            continue
+
+        for workload in bench['WORKLOADS']:
+            if workload == 'idle' and name == 'Pyjo.Reactor.Select' and scale * 10000 >= 1000:
+                skip('select is limited to 1024 descriptors', 3)
+                continue
+
+            result = bench['run'](name, workload, scale, duration)
+            diag('{0} {1}: {2:.0f} ticks/s, p99 {3:.3f} ms, cpu {4:.2f}s'.format(
+                name, workload, result['ticks_per_sec'], result['latency_p99'] * 1000, result['cpu']))
+            ok(result['callbacks'] > 0, '{0} {1} invoked callbacks'.format(name, workload))
+            ok(result['ticks'] > 0, '{0} {1} ticked'.format(name, workload))
+
+            before = baseline.get((name, workload))
+            if before and 'ticks_per_sec' in before:
+                ok(result['ticks_per_sec'] >= before['ticks_per_sec'] * (1 - tolerance),
+                   '{0} {1} not slower than baseline'.format(name, workload))
+            else:
+                pass_ok('{0} {1} has no baseline'.format(name, workload))
+
+    done_testing()
@@ -0,0 +1,4 @@
+if __name__ == '__main__':
+    from Pyjo.Test import *  # noqa
+    pass_ok('__init__')
+    done_testing()
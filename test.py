@@ -4,6 +4,7 @@
 #
 #   python test.py
 #   PROVE= python test.py
+#   python test.py t/bench
 #   python setup.py
 #   PYTHONPATH=`pwd` nosetests
 